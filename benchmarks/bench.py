@@ -0,0 +1,350 @@
+"""
+效能測試 - 離線對 HTML 語料執行 SEOAnalyzer，量測各階段耗時、吞吐量與記憶體
+
+抓取透過記憶體中的 transport adapter 回應，不連網路；每個解析後端在獨立的
+子 process 執行，peak RSS 才不會互相影響。
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py --backends lxml html.parser --iterations 10 --output bench.json
+    python benchmarks/bench.py --corpus path/to/recorded/pages    # 另外加入錄下來的 *.html
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse, urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import requests  # noqa: E402
+from requests.adapters import HTTPAdapter  # noqa: E402
+from urllib3 import HTTPResponse  # noqa: E402
+
+from src.seo_roaster.analyzer import SEOAnalyzer  # noqa: E402
+from src.seo_roaster.app import build_report  # noqa: E402
+from src.seo_roaster.results import AnalysisResult  # noqa: E402
+
+BASE_URL = "http://bench.test"
+DEFAULT_BACKENDS = ("lxml", "html.parser", "stream")
+DEFAULT_ITERATIONS = 5
+DEFAULT_SEED = 1
+
+
+# ===== 語料 =====
+
+def _landing_page(rng: random.Random, n: int) -> str:
+    words = ["fast", "simple", "secure", "cloud", "team", "launch", "growth", "pricing"]
+    features = "".join(
+        f"<section><h2>{rng.choice(words).title()}</h2><p>{' '.join(rng.choices(words, k=40))}</p>"
+        f'<img src="/img/{i}.png" alt="{rng.choice(words)}"></section>'
+        for i in range(6)
+    )
+    return f"""<!doctype html>
+<html lang="en"><head><meta charset="utf-8">
+<title>Landing page {n} - the {rng.choice(words)} way to ship</title>
+<meta name="description" content="{' '.join(rng.choices(words, k=20))}">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<link rel="canonical" href="{BASE_URL}/landing-{n}.html"><link rel="icon" href="/favicon.ico">
+<meta property="og:title" content="Landing {n}"><meta property="og:description" content="Landing page">
+<meta property="og:image" content="{BASE_URL}/og.png"><meta name="twitter:card" content="summary">
+<script type="application/ld+json">{{"@context":"https://schema.org","@type":"WebPage","name":"Landing {n}"}}</script>
+</head><body><header><nav><a href="/">Home</a><a href="/pricing">Pricing</a></nav></header>
+<main><h1>Ship {rng.choice(words)} products</h1>{features}</main><footer>&copy; 2024</footer></body></html>"""
+
+
+def _spa_shell(rng: random.Random, size: int = 2 * 1024 * 1024) -> str:
+    """單頁應用的外殼：幾乎整頁都是內嵌的 JS bundle"""
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+    statements = []
+    total = 0
+    while total < size:
+        name = "".join(rng.choices(alphabet, k=8))
+        statement = f"function {name}(e,t){{return e&&t?e[{rng.randint(0, 99)}]+t.{name}:void 0}};"
+        statements.append(statement)
+        total += len(statement)
+    return f"""<!doctype html><html lang="en"><head><meta charset="utf-8"><title>App</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<link rel="icon" href="/favicon.ico"><link rel="preload" as="script" href="/static/main.js">
+</head><body><div id="root"></div><script>{''.join(statements)}</script></body></html>"""
+
+
+def _product_catalog(rng: random.Random, products: int = 1500) -> str:
+    """JSON-LD 很重的商品頁（@graph 內大量 Product 與麵包屑）"""
+    graph = [{
+        "@type": "BreadcrumbList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": i + 1, "name": f"Category {i}", "item": f"{BASE_URL}/c/{i}"}
+            for i in range(5)
+        ],
+    }]
+    for i in range(products):
+        graph.append({
+            "@type": "Product",
+            "@id": f"{BASE_URL}/p/{i}",
+            "name": f"Product {i}",
+            "sku": f"SKU-{rng.randint(100000, 999999)}",
+            "description": "A very good product " * rng.randint(1, 4),
+            "image": [f"{BASE_URL}/img/p{i}-{j}.jpg" for j in range(3)],
+            "offers": {
+                "@type": "Offer",
+                "price": f"{rng.uniform(5, 500):.2f}",
+                "priceCurrency": "USD",
+                "availability": "https://schema.org/InStock",
+            },
+            "aggregateRating": {"@type": "AggregateRating", "ratingValue": round(rng.uniform(1, 5), 1), "reviewCount": rng.randint(0, 999)},
+        })
+    data = json.dumps({"@context": "https://schema.org", "@graph": graph}, separators=(",", ":"))
+    items = "".join(f'<li><a href="/p/{i}"><img src="/img/p{i}-0.jpg" alt="Product {i}">Product {i}</a></li>' for i in range(200))
+    return f"""<!doctype html><html lang="en"><head><meta charset="utf-8">
+<title>Catalog - all products in one convenient place</title>
+<meta name="description" content="Browse our catalog of products with prices, ratings and availability for everyone.">
+<meta property="og:title" content="Catalog"><meta property="article:published_time" content="2024-01-01">
+<script type="application/ld+json">{data}</script>
+</head><body><h1>Catalog</h1><ul>{items}</ul></body></html>"""
+
+
+def _malformed(rng: random.Random) -> str:
+    """標籤沒關、屬性沒引號、巢狀錯亂、JSON-LD 語法錯誤"""
+    junk = "".join(
+        rng.choice([
+            "<div><p>unclosed paragraph",
+            "</span></div></div>",
+            "<table><tr><td>cell<td>cell</table>",
+            "<img src=x alt=>",
+            "<b><i>misnested</b></i>",
+            "<!-- comment without end",
+            "<a href=/x>link",
+            "&nbsp;&amp&lt;&#x27;",
+        ])
+        for _ in range(400)
+    )
+    return f"""<html><head><title>Broken <b>page</title>
+<meta name=description content=unquoted description that never ends
+<meta property="og:title" content="OG"><link rel=canonical href=/broken>
+<script type="application/ld+json">{{"@type": "Article", "datePublished": "2024-01-01",}}</script>
+<script type="application/ld+json">[{{"@type":"Organization"}}, [{{"@type":"WebSite"}}]]</script>
+<body><h1>One<h1>Two</h1>{junk}</html>"""
+
+
+def build_corpus(seed: int = DEFAULT_SEED, extra_dir: Optional[str] = None) -> dict[str, bytes]:
+    """
+    產生測試語料（相同 seed 產生相同內容）
+
+    Returns:
+        dict: 頁面名稱 → HTML 內容（UTF-8）
+    """
+    rng = random.Random(seed)
+    corpus = {f"landing-{i}": _landing_page(rng, i) for i in range(3)}
+    corpus["spa-shell"] = _spa_shell(rng)
+    corpus["product-jsonld"] = _product_catalog(rng)
+    corpus["malformed"] = _malformed(rng)
+    pages = {name: html.encode("utf-8") for name, html in corpus.items()}
+
+    if extra_dir:
+        for path in sorted(Path(extra_dir).glob("*.htm*")):
+            pages[path.stem] = path.read_bytes()
+    return pages
+
+
+# ===== 抓取替身 =====
+
+class FixtureAdapter(HTTPAdapter):
+    """從記憶體中的語料回應請求的 transport adapter（/<頁面名稱>.html）"""
+
+    def __init__(self, pages: dict[str, bytes]):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        name = urlsplit(request.url).path.strip("/").removesuffix(".html")
+        body = self.pages.get(name)
+        raw = HTTPResponse(
+            body=io.BytesIO(body or b""),
+            headers={"Content-Type": "text/html; charset=utf-8", "Content-Length": str(len(body or b""))},
+            status=200 if body is not None else 404,
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+class BenchAnalyzer(SEOAnalyzer):
+    """抓取改走 FixtureAdapter 的 SEOAnalyzer（保留靜態 URL 檢查與重定向流程，不做 DNS）"""
+
+    def __init__(self, session: requests.Session, **kwargs):
+        super().__init__(**kwargs)
+        self._session = session
+
+    def _validate_url(self, url: str, redirect_count: int = 0) -> str:
+        return self._check_url(url, redirect_count)
+
+    def _get(self, url: str, deadline: float, previous: Optional[AnalysisResult] = None) -> requests.Response:
+        return self._session.get(
+            url,
+            headers=self._request_headers(url, previous),
+            allow_redirects=False,
+            stream=True,
+        )
+
+
+# ===== 量測 =====
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 回傳 bytes，Linux 回傳 KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _summarize(samples: list[int]) -> dict:
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples) / 1e6, 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] / 1e6, 4),
+        "total_ms": round(sum(samples) / 1e6, 3),
+    }
+
+
+def run_backend(backend: str, pages: dict[str, bytes], iterations: int) -> dict:
+    """
+    在目前的 process 量測單一解析後端
+
+    各階段分開計時：fetch（含重定向與讀取內容）、parse、每個檢測、score、report；
+    另外計時完整的 analyze() 求得每秒頁數。JSON-LD 在第一個需要它的檢測中解碼，
+    解碼時間算在該檢測上。
+    """
+    session = requests.Session()
+    session.mount(BASE_URL, FixtureAdapter(pages))
+    analyzer = BenchAnalyzer(session, parser=backend)
+    report_rng = random.Random(DEFAULT_SEED)
+
+    phases: dict[str, list[int]] = {}
+    analyze_ns: dict[str, list[int]] = {name: [] for name in pages}
+    clock = time.perf_counter_ns
+
+    def record(phase: str, started: int) -> int:
+        now = clock()
+        phases.setdefault(phase, []).append(now - started)
+        return now
+
+    # 預熱一輪（匯入、lxml 初始化）
+    for name in pages:
+        analyzer.analyze(f"{BASE_URL}/{name}.html")
+
+    for _ in range(iterations):
+        for name in pages:
+            url = f"{BASE_URL}/{name}.html"
+
+            t = clock()
+            fetched = analyzer.fetch(url)
+            t = record("fetch", t)
+            index = analyzer._parse_fetched(fetched)
+            t = record("parse", t)
+
+            parsed_url = urlparse(fetched.url)
+            results = []
+            for check in analyzer.CHECKS:
+                results.append((check, check.run(analyzer, index, parsed_url)))
+                t = record(f"check:{check.key}", t)
+            checks, score, grade = analyzer._score(results)
+            result = AnalysisResult(
+                fetched.url, fetched.status_code, parsed_url.scheme == "https", checks, score, grade, analyzer.WEIGHTS
+            )
+            t = record("score", t)
+            build_report(result, report_rng)
+            record("report", t)
+
+            t = clock()
+            analyzer.analyze(url)
+            analyze_ns[name].append(clock() - t)
+
+    total_ns = sum(sum(samples) for samples in analyze_ns.values())
+    page_count = iterations * len(pages)
+    return {
+        "backend": backend,
+        "iterations": iterations,
+        "pages_per_sec": round(page_count / (total_ns / 1e9), 2) if total_ns else None,
+        "peak_rss_kb": _peak_rss_kb(),
+        "phases": {phase: _summarize(samples) for phase, samples in phases.items()},
+        "pages": {
+            name: {"bytes": len(pages[name]), "analyze": _summarize(samples)}
+            for name, samples in analyze_ns.items()
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(results: list[dict]) -> None:
+    for result in results:
+        print(f"\n== {result['backend']}: {result['pages_per_sec']} pages/s, peak RSS {result['peak_rss_kb'] / 1024:.1f} MB")
+        print(f"{'phase':<28}{'median ms':>12}{'p95 ms':>12}")
+        for phase, stats in result["phases"].items():
+            print(f"{phase:<28}{stats['median_ms']:>12.3f}{stats['p95_ms']:>12.3f}")
+        print(f"{'page':<28}{'bytes':>12}{'analyze ms':>12}")
+        for name, page in result["pages"].items():
+            print(f"{name:<28}{page['bytes']:>12}{page['analyze']['median_ms']:>12.3f}")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="SEOAnalyzer 離線效能測試")
+    parser.add_argument("--backends", nargs="+", default=list(DEFAULT_BACKENDS), choices=SEOAnalyzer.PARSERS)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="產生語料的亂數種子")
+    parser.add_argument("--corpus", help="額外加入此目錄下的 *.html（例如錄下來的真實頁面）")
+    parser.add_argument("--output", help="寫出 JSON 結果的路徑（方便跨 commit 比較）")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    pages = build_corpus(args.seed, args.corpus)
+
+    if args.worker:
+        # 子 process：只量測一個後端，結果以 JSON 寫到 stdout
+        print(json.dumps(run_backend(args.worker, pages, args.iterations)))
+        return
+
+    results = []
+    for backend in args.backends:
+        command = [sys.executable, __file__, "--worker", backend, "--iterations", str(args.iterations), "--seed", str(args.seed)]
+        if args.corpus:
+            command += ["--corpus", args.corpus]
+        completed = subprocess.run(command, capture_output=True, text=True, check=True, env={**os.environ, "PYTHONHASHSEED": "0"})
+        results.append(json.loads(completed.stdout))
+
+    _print_table(results)
+
+    if args.output:
+        report = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seed": args.seed,
+            "corpus": {name: len(body) for name, body in pages.items()},
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+"""非同步抓取 - asyncio 原生的 HTTP/1.1 抓取流程與背景 event loop"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import ssl
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, Callable, Iterator, Optional
+from urllib.parse import urljoin, urlsplit
+
+import idna
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, requote_uri
+
+from .net import POOL_HOSTS, POOL_IDLE_TIMEOUT, POOL_MAXSIZE, FetchResult
+from .resolver import RESOLVER
+from .results import AnalysisResult
+from .timing import hop_name, now
+
+logger = logging.getLogger(__name__)
+
+# 解析／檢測是 CPU 工作，用有上限的 executor 執行，避免塞住 event loop
+PARSE_WORKERS = 4
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# 回應標頭大小上限
+MAX_HEADER_BYTES = 64 * 1024
+# 重定向回應的內容不超過這個大小時讀掉，連線可以留給下一個請求
+MAX_DISCARD_BYTES = 64 * 1024
+
+
+async def _within(aw, deadline: float, timeout: float):
+    """等待 awaitable，逾時取單次逾時與總時限剩餘時間的較小值"""
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        raise asyncio.TimeoutError()
+    return await asyncio.wait_for(aw, min(timeout, remaining))
+
+
+class _Connection:
+    """
+    一條 HTTP/1.1 連線與目前請求的回應
+
+    回應內容已完整讀取（或沒有內容）且伺服器沒有要求關閉時，close() 把連線放回
+    連線池給同一主機的下一個請求使用，否則關閉。
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, key: tuple, pool: "_ConnectionPool"):
+        self.reader = reader
+        self.writer = writer
+        self.key = key
+        self.pool = pool
+        self.method = "GET"
+        self.status_code = 0
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict()
+        self.keep_alive = False
+        # 目前的回應已讀到結尾，連線上沒有殘留的內容
+        self.complete = False
+        self.last_used = 0.0
+
+    @property
+    def alive(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        if self.keep_alive and self.complete and self.alive and self.pool.put(self):
+            return
+        self.writer.close()
+
+
+class _ConnectionPool:
+    """
+    閒置連線池（每個 event loop 一個，只在該 loop 上使用，不需要鎖）
+
+    以 (scheme, 主機名稱, port) 為 key，數量與閒置時限與同步版的連線池相同。
+    連線建立時已通過 SSRF 檢查，重用時不再解析 DNS。
+    """
+
+    def __init__(self):
+        self._idle: "OrderedDict[tuple, deque[_Connection]]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[_Connection]:
+        conns = self._idle.get(key)
+        conn = None
+        while conns and conn is None:
+            # 最近用過的連線最不可能已被伺服器關閉
+            conn = conns.pop()
+            if not conn.alive or time.monotonic() - conn.last_used > POOL_IDLE_TIMEOUT:
+                conn.writer.close()
+                conn = None
+        if conns is not None and not conns:
+            del self._idle[key]
+        return conn
+
+    def put(self, conn: _Connection) -> bool:
+        conns = self._idle.setdefault(conn.key, deque())
+        self._idle.move_to_end(conn.key)
+        if len(conns) >= POOL_MAXSIZE:
+            return False
+        conn.last_used = time.monotonic()
+        conns.append(conn)
+        while len(self._idle) > POOL_HOSTS:
+            _, evicted = self._idle.popitem(last=False)
+            for idle in evicted:
+                idle.writer.close()
+        return True
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ConnectionPool]" = weakref.WeakKeyDictionary()
+
+
+def _get_pool() -> _ConnectionPool:
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = _ConnectionPool()
+    return pool
+
+
+@lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """
+    TLS 設定（整個 process 共用，不必每次請求重新載入憑證）
+
+    與同步版相同使用 certifi 的 CA（Session 設定 trust_env = False，requests
+    一律使用 DEFAULT_CA_BUNDLE_PATH），同一個網址在兩條路徑的驗證結果一致。
+    """
+    return ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+
+
+def _ascii_host(hostname: str) -> str:
+    """
+    主機名稱轉成 ASCII（國際化域名以 IDNA 編碼，與 requests 的作法相同）
+
+    Raises:
+        UnicodeError: 無法編碼的主機名稱（ValueError 的子類別，分析器回報 invalid_url）
+    """
+    if hostname.isascii():
+        return hostname
+    try:
+        return idna.encode(hostname, uts46=True).decode("ascii")
+    except idna.IDNAError:
+        raise UnicodeError("無效的網址：主機名稱無法編碼") from None
+
+
+async def _request(
+    analyzer,
+    url: str,
+    deadline: float,
+    previous: Optional[AnalysisResult] = None,
+    redirect_count: int = 0,
+    method: str = "GET",
+    headers: Optional[dict] = None,
+) -> _Connection:
+    """連線（或重用同一主機的閒置連線）、送出請求（預設 GET）並讀取回應標頭"""
+    # urlsplit 不拆出 ;params，請求目標與 requests 相同（路徑含 ;params）
+    parsed = urlsplit(url)
+    https = parsed.scheme == "https"
+    port = parsed.port or (443 if https else 80)
+    hostname = _ascii_host(parsed.hostname)
+    key = (parsed.scheme, hostname, port)
+    pool = _get_pool()
+
+    # 請求行與 Host 只能是 ASCII：路徑與查詢字串中的非 ASCII 字元以 UTF-8 百分比編碼
+    path = requote_uri(parsed.path or "/")
+    if parsed.query:
+        path += "?" + requote_uri(parsed.query)
+    host = f"[{hostname}]" if ":" in hostname else hostname
+    if parsed.port is not None:
+        host += f":{parsed.port}"
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}"]
+    lines += [f"{k}: {v}" for k, v in analyzer._request_headers(url, previous).items()]
+    if headers:
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+    lines += ["Accept: */*", "", ""]
+    # 標頭值（例如 ETag）來自先前以 latin-1 解碼的回應，原樣編碼回去
+    request = "\r\n".join(lines).encode("latin-1")
+
+    timings = analyzer.timings
+    started = now()
+    conn = pool.get(key)
+    if conn is not None:
+        try:
+            await _exchange(analyzer, conn, method, request, deadline)
+        except asyncio.TimeoutError:
+            raise
+        except (OSError, asyncio.IncompleteReadError):
+            # 閒置連線可能剛好被伺服器關閉：GET / HEAD 可以安全地改用新連線重送
+            conn = None
+            started = now()
+    if conn is None:
+        # 非同步 DNS 解析並檢查所有位址，之後直接連線到驗證過的位址（避免二次解析）
+        addresses = await _within(RESOLVER.resolve_safe_async(hostname), deadline, analyzer.timeout)
+        if timings is not None:
+            timings.add("dns", started)
+            started = now()
+        conn = await _connect(analyzer, addresses, hostname, port, https, key, pool, deadline)
+        await _exchange(analyzer, conn, method, request, deadline)
+
+    if timings is not None:
+        timings.add(hop_name(redirect_count), started)
+    return conn
+
+
+async def _connect(
+    analyzer,
+    addresses: list[str],
+    hostname: str,
+    port: int,
+    https: bool,
+    key: tuple,
+    pool: _ConnectionPool,
+    deadline: float,
+) -> _Connection:
+    """依序連線到驗證過的位址"""
+    ssl_context = _ssl_context() if https else None
+    for i, ip in enumerate(addresses):
+        try:
+            reader, writer = await _within(
+                asyncio.open_connection(
+                    ip,
+                    port,
+                    ssl=ssl_context,
+                    server_hostname=hostname if https else None,
+                    limit=MAX_HEADER_BYTES,
+                ),
+                deadline,
+                analyzer.timeout,
+            )
+            return _Connection(reader, writer, key, pool)
+        except OSError:
+            # 連線被拒、無法連線或逾時（TimeoutError 也是 OSError）時嘗試下一個位址，
+            # 與同步版的 _PinnedAddressMixin 相同
+            if i == len(addresses) - 1:
+                raise
+
+
+async def _exchange(analyzer, conn: _Connection, method: str, request: bytes, deadline: float) -> None:
+    """在連線上送出請求並讀取回應標頭（失敗時關閉連線）"""
+    reader = conn.reader
+    conn.method = method
+    conn.status_code = 0
+    conn.headers = CaseInsensitiveDict()
+    conn.keep_alive = False
+    conn.complete = False
+    try:
+        conn.writer.write(request)
+        await _within(conn.writer.drain(), deadline, analyzer.timeout)
+
+        # 略過 1xx 中間回應
+        while True:
+            head = await _within(reader.readuntil(b"\r\n\r\n"), deadline, analyzer.timeout)
+            status_line, *header_lines = head.decode("latin-1").split("\r\n")
+            parts = status_line.split(None, 2)
+            if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+                raise requests.exceptions.ConnectionError(f"無效的回應：{status_line[:50]}")
+            conn.status_code = int(parts[1])
+            if conn.status_code >= 200:
+                break
+
+        for line in header_lines:
+            if ":" not in line:
+                continue
+            key, value = line.split(":", 1)
+            key, value = key.strip(), value.strip()
+            if key in conn.headers:
+                conn.headers[key] += ", " + value
+            else:
+                conn.headers[key] = value
+    except BaseException:
+        conn.writer.close()
+        raise
+
+    conn.keep_alive = parts[0] == "HTTP/1.1" and "close" not in conn.headers.get("Connection", "").lower()
+    # HEAD、204 與 304 沒有內容，讀完標頭就是回應的結尾
+    conn.complete = method == "HEAD" or conn.status_code in (204, 304)
+
+
+async def _iter_raw_body(conn: _Connection, chunk_size: int, read) -> AsyncIterator[bytes]:
+    """依 Transfer-Encoding / Content-Length 讀取回應內容（讀到結尾時 conn.complete 設為 True）"""
+    reader = conn.reader
+    if conn.complete:
+        return
+
+    if "chunked" in conn.headers.get("Transfer-Encoding", "").lower():
+        while True:
+            size_line = await read(reader.readuntil(b"\r\n"))
+            try:
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            except ValueError:
+                raise requests.exceptions.ConnectionError("無效的 chunked 編碼")
+            if size == 0:
+                # 略過 trailer，讀到最後的空行
+                while await read(reader.readuntil(b"\r\n")) != b"\r\n":
+                    pass
+                conn.complete = True
+                return
+            while size > 0:
+                chunk = await read(reader.read(min(size, chunk_size)))
+                if not chunk:
+                    return
+                size -= len(chunk)
+                yield chunk
+            await read(reader.readexactly(2))
+        return
+
+    length = conn.headers.get("Content-Length")
+    remaining = int(length) if length and length.isdigit() else None
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(remaining, chunk_size)
+        chunk = await read(reader.read(size))
+        if not chunk:
+            # 沒有 Content-Length 時以關閉連線表示結尾，連線不能重用
+            return
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+    conn.complete = True
+
+
+async def _read_body(analyzer, conn: _Connection, result: FetchResult, deadline: float) -> bytes:
+    """讀取並解壓內容，超過大小上限、壓縮比例上限或總時限時截斷"""
+    loop = asyncio.get_running_loop()
+    chunks = []
+    decoder = analyzer._body_decoder(conn.headers)
+
+    async def read(aw):
+        return await _within(aw, deadline, analyzer.timeout)
+
+    body = _iter_raw_body(conn, analyzer.STREAM_CHUNK_SIZE, read)
+    try:
+        async for data in body:
+            chunk = decoder.decode(data)
+            result.bytes_read = decoder.decoded_bytes
+            result.wire_bytes = decoder.wire_bytes
+            if chunk:
+                chunks.append(chunk)
+            if decoder.limited:
+                analyzer._log_limited(decoder, result)
+                result.truncated = True
+                break
+    except asyncio.TimeoutError:
+        if loop.time() < deadline:
+            raise
+        logger.warning(f"Body read deadline exceeded, truncating: {result.url}")
+        result.truncated = True
+    finally:
+        await body.aclose()
+
+    return b"".join(chunks)
+
+
+async def _discard_body(analyzer, conn: _Connection, deadline: float) -> None:
+    """讀掉重定向回應的小內容，讓連線可以重用（長度未知或太大時不讀，直接關閉）"""
+    length = conn.headers.get("Content-Length")
+    if not (length and length.isdigit() and int(length) <= MAX_DISCARD_BYTES):
+        return
+
+    async def read(aw):
+        return await _within(aw, deadline, analyzer.timeout)
+
+    try:
+        async for _ in _iter_raw_body(conn, MAX_DISCARD_BYTES, read):
+            pass
+    except (OSError, asyncio.IncompleteReadError, requests.exceptions.ConnectionError):
+        # 讀不完就不重用（conn.complete 仍為 False），不影響跟隨重定向
+        pass
+
+
+async def open_async(
+    analyzer,
+    url: str,
+    deadline: float,
+    previous: Optional[AnalysisResult] = None,
+    method: str = "GET",
+    headers: Optional[dict] = None,
+) -> tuple[_Connection, str]:
+    """
+    送出請求並跟隨重定向（每個重定向目標都重新做 SSRF 檢查）
+
+    Returns:
+        tuple: (最終回應的連線，內容尚未讀取、呼叫端負責關閉, 最終網址)
+
+    Raises:
+        ValueError: URL 不安全或重定向次數過多
+    """
+    url = analyzer._check_url(url)
+    redirect_count = 0
+    while True:
+        conn = await _request(analyzer, url, deadline, previous, redirect_count, method, headers)
+        location = conn.headers.get("Location")
+        if conn.status_code not in REDIRECT_STATUSES or not location:
+            return conn, url
+
+        await _discard_body(analyzer, conn, deadline)
+        conn.close()
+        redirect_count += 1
+        if redirect_count > analyzer.MAX_REDIRECTS:
+            raise ValueError("重定向次數過多")
+        # 處理相對路徑重定向，並驗證重定向目標
+        url = analyzer._check_url(urljoin(url, location), redirect_count)
+
+
+async def fetch_async(
+    analyzer,
+    url: str,
+    previous: Optional[AnalysisResult] = None,
+    decode: Optional[bool] = None,
+) -> FetchResult:
+    """
+    非同步抓取網頁 HTML（含 SSRF 防護、大小上限與總時限）
+
+    錯誤會轉成對應的 requests 例外，與同步版 fetch 共用錯誤處理。
+
+    Args:
+        analyzer: SEOAnalyzer，提供逾時、上限與 URL 檢查設定
+        url: 要抓取的網址
+        previous: 先前的分析結果，用於條件式請求
+        decode: 同 SEOAnalyzer.fetch；False 時不解碼，原始內容放在 body（例如 sitemap.xml.gz）
+
+    Returns:
+        FetchResult: 抓取結果（html 或 body，以及偵測到的 encoding）；伺服器回 304 時 not_modified 為 True
+
+    Raises:
+        ValueError: URL 不安全
+        requests.exceptions.*: 網路相關錯誤
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + analyzer.total_timeout
+
+    try:
+        conn, url = await open_async(analyzer, url, deadline, previous)
+        try:
+            if conn.status_code >= 400:
+                response = requests.Response()
+                response.status_code = conn.status_code
+                response.url = url
+                raise requests.exceptions.HTTPError(f"HTTP {conn.status_code}", response=response)
+
+            result = FetchResult(url, conn.status_code, conn.headers)
+            if result.not_modified:
+                return result
+            started = now()
+            body = await _read_body(analyzer, conn, result, deadline)
+            if analyzer.timings is not None:
+                analyzer.timings.add("body", started)
+                analyzer.timings.bytes_read += result.bytes_read
+                analyzer.timings.wire_bytes += result.wire_bytes
+        finally:
+            conn.close()
+    except requests.exceptions.RequestException:
+        raise
+    except asyncio.TimeoutError:
+        raise requests.exceptions.Timeout("網站回應逾時")
+    except (ssl.SSLError, ssl.CertificateError) as e:
+        raise requests.exceptions.SSLError(e)
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        raise requests.exceptions.ConnectionError(e)
+
+    analyzer._store_body(result, body, decode)
+    return result
+
+
+_parse_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _get_parse_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _parse_executor
+    if _parse_executor is None:
+        with _lock:
+            if _parse_executor is None:
+                _parse_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=PARSE_WORKERS,
+                    thread_name_prefix="seo-parse",
+                )
+    return _parse_executor
+
+
+async def run_in_parse_executor(func: Callable, *args):
+    """在解析專用的 executor 執行 CPU 工作"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_parse_executor(), func, *args)
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """取得背景 event loop（每個 process 一個，fork 後自動重建）"""
+    global _loop, _loop_pid, _parse_executor
+
+    pid = os.getpid()
+    if _loop is not None and _loop_pid == pid:
+        return _loop
+
+    with _lock:
+        if _loop is None or _loop_pid != pid:
+            if _loop_pid is not None and _loop_pid != pid:
+                # fork 後父 process 的執行緒不存在，executor 也要重建
+                _parse_executor = None
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="seo-event-loop", daemon=True)
+            thread.start()
+            _loop = loop
+            _loop_pid = pid
+        return _loop
+
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """
+    在背景 event loop 執行 coroutine 並等待結果
+
+    讓同步的 Flask view 把等待網路的工作交給共用的 event loop，
+    同一個 process 可以同時掛著大量慢速抓取。
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    return future.result(timeout)
+
+
+def iter_sync(aiterable: AsyncIterable) -> Iterator:
+    """
+    在背景 event loop 消費 async iterator，轉成同步 iterator
+
+    用於把非同步產生的結果逐筆串流給 Flask 回應；同步端提早結束時會取消背景工作。
+    """
+    items: queue.Queue = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in aiterable:
+                items.put((item, None))
+        except Exception as e:
+            items.put((None, e))
+        finally:
+            items.put((done, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _get_loop())
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        future.cancel()
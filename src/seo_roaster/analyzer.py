@@ -1,14 +1,28 @@
 """SEO 分析器 - 解析網頁 HTML 並檢測 SEO 元素"""
 
-import ipaddress
-import json
+import codecs
 import logging
 import re
-import socket
+import time
+from typing import Iterator, Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from .aio import fetch_async, run_in_parse_executor, run_sync
+from .cache import normalize_url
+from .charset import SNIFF_BYTES, SOURCE_BOM, detect_encoding
+from .compression import ACCEPT_ENCODING, LIMIT_RATIO, BodyDecoder
+from .checks import BODY, HEAD, HEAD_STAGES, JSON_LD, URL, Check, required_stages, select_checks
+from .net import FetchResult, decode_body, get_session
+from .resolver import RESOLVER, is_ip_address, is_safe_ip
+from .page_index import PageIndex, StreamingIndexer, build_index
+from .pool import ParsePool, ParseTimeoutError, ParseWorkerError
+from .reachability import ERROR_ENCODING, MAX_TARGETS, PROBE_TIMEOUT, check_urls
+from .results import UNSET, AnalysisResult, CheckResult
+from .timing import Timings, check_name, hop_name, now
 
 # 設定日誌
 logger = logging.getLogger(__name__)
@@ -25,69 +39,98 @@ class SEOAnalyzer:
     IMAGE_ALT_LOW_THRESHOLD = 0.5
     IMAGE_ALT_MEDIUM_THRESHOLD = 0.8
     MAX_REDIRECTS = 5
-
-    # 各項目的權重（總和 = 100）
-    WEIGHTS = {
-        "title": 8,
-        "meta_description": 8,
-        "canonical": 5,
-        "viewport": 4,
-        "lang": 3,
-        "h1": 6,
-        "https": 8,
-        "robots": 4,
-        "favicon": 2,
-        "img_alt": 5,
-        "og_title": 4,
-        "og_description": 4,
-        "og_image": 4,
-        "twitter_card": 3,
-        "json_ld": 8,
-        "json_ld_types": 4,
-        "json_ld_valid": 4,
-        "hreflang": 4,
-        "published_time": 4,
-        "snippet_control": 3,
-    }
-
-    def __init__(self, timeout: int = 10):
+    STREAM_CHUNK_SIZE = 16 * 1024
+    # 內容大小上限（超過即截斷，避免超大回應撐爆 worker 記憶體）
+    MAX_CONTENT_BYTES = 5 * 1024 * 1024
+    # 解壓後與壓縮前的比例上限（一般 HTML 約 5～20 倍，超過就當成壓縮炸彈停止解壓）
+    MAX_COMPRESSION_RATIO = 100
+
+    # 支援的解析模式：lxml / html.parser 建立 DOM 樹，stream 邊下載邊建立索引
+    PARSERS = ("lxml", "html.parser", "stream")
+
+    # 檢測項目註冊表（依序執行）：key、權重、需要的資料階段、檢測方法
+    CHECKS = (
+        Check("title", 8, HEAD, "_check_title"),
+        Check("meta_description", 8, HEAD, "_check_meta_description"),
+        Check("canonical", 5, HEAD, "_check_canonical"),
+        Check("viewport", 4, HEAD, "_check_viewport"),
+        Check("lang", 3, HEAD, "_check_lang"),
+        Check("h1", 6, BODY, "_check_h1"),
+        Check("https", 8, URL, "_check_https"),
+        Check("robots", 4, HEAD, "_check_robots"),
+        Check("favicon", 2, HEAD, "_check_favicon"),
+        Check("img_alt", 5, BODY, "_check_img_alt"),
+        Check("og_title", 4, HEAD, "_check_og_tag", "og:title"),
+        Check("og_description", 4, HEAD, "_check_og_tag", "og:description"),
+        Check("og_image", 4, HEAD, "_check_og_tag", "og:image"),
+        Check("twitter_card", 3, HEAD, "_check_twitter_card"),
+        Check("json_ld", 8, JSON_LD, "_check_json_ld"),
+        Check("json_ld_types", 4, JSON_LD, "_check_json_ld_types"),
+        Check("json_ld_valid", 4, JSON_LD, "_check_json_ld_valid"),
+        Check("hreflang", 4, HEAD, "_check_hreflang"),
+        Check("published_time", 4, JSON_LD, "_check_published_time"),
+        Check("snippet_control", 3, HEAD, "_check_snippet_control"),
+    )
+
+    # 各項目的權重
+    WEIGHTS = {check.key: check.weight for check in CHECKS}
+
+    # favicon 接受的 link rel（依序採用第一個有 href 的）
+    FAVICON_RELS = ("icon", "shortcut icon", "apple-touch-icon")
+    # 深度模式會確認指向的網址可以存取的檢測
+    REACHABILITY_CHECKS = ("canonical", "og_image", "favicon", "hreflang")
+
+    def __init__(
+        self,
+        timeout: int = 10,
+        parser: str = "lxml",
+        max_bytes: Optional[int] = None,
+        total_timeout: Optional[float] = None,
+        timings: Optional[Timings] = None,
+        pool: Optional[ParsePool] = None,
+        deep: bool = False,
+    ):
+        """
+        Args:
+            timeout: 單次連線／讀取逾時（秒）
+            parser: 解析模式，見 PARSERS
+            max_bytes: 內容大小上限，預設 MAX_CONTENT_BYTES
+            total_timeout: 含所有重定向與讀取內容的總時限（秒），預設為 timeout 的兩倍
+            timings: 記錄各階段耗時（None 表示不計時）；計時中的 analyzer 不可同時分析多個網址
+            pool: 解析行程池；設定時解碼、解析與檢測在子 process 執行
+                （stream 模式的同步分析邊下載邊解析，不使用行程池）
+            deep: 深度模式，另外同時探測 REACHABILITY_CHECKS 指向的網址，
+                無法存取時該項改為未通過（見 reachability）
+        """
+        if parser not in self.PARSERS:
+            raise ValueError(f"不支援的解析模式：{parser}")
         self.timeout = timeout
+        self.parser = parser
+        self.max_bytes = max_bytes or self.MAX_CONTENT_BYTES
+        self.total_timeout = total_timeout or timeout * 2
+        self.timings = timings
+        self.pool = pool
+        self.deep = deep
         self.headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; SEORoaster/1.0; +https://github.com/tznthou/seo-roaster)"
+            "User-Agent": "Mozilla/5.0 (compatible; SEORoaster/1.0; +https://github.com/tznthou/seo-roaster)",
+            # 只宣告 compression 模組實際能解的格式
+            "Accept-Encoding": ACCEPT_ENCODING,
         }
 
     def _is_safe_ip(self, ip_str: str) -> bool:
-        """
-        檢查 IP 是否安全（非內部網路）
-
-        Args:
-            ip_str: IP 位址字串
+        """檢查 IP 是否安全（非內部網路）"""
+        return is_safe_ip(ip_str)
 
-        Returns:
-            bool: True 表示安全，False 表示危險
+    def _check_url(self, url: str, redirect_count: int = 0) -> str:
         """
-        try:
-            ip = ipaddress.ip_address(ip_str)
-            # 阻擋私有網路、本地迴環、保留 IP、連結本地
-            if ip.is_private or ip.is_loopback or ip.is_reserved or ip.is_link_local:
-                return False
-            # 阻擋 AWS/GCP metadata endpoint
-            if ip_str.startswith("169.254."):
-                return False
-            return True
-        except ValueError:
-            return False
-
-    def _validate_url(self, url: str, redirect_count: int = 0) -> str:
-        """
-        驗證 URL 安全性（SSRF 防護）
+        URL 靜態檢查（協定、主機名稱、IP 位址），不做 DNS 解析
 
         Args:
-            url: 要驗證的 URL
+            url: 要檢查的 URL
             redirect_count: 重定向計數（防止無限迴圈）
 
         Returns:
-            str: 驗證後的 URL
+            str: 補上 scheme 後的 URL
 
         Raises:
             ValueError: URL 不安全或無效
@@ -114,27 +157,83 @@ class SEOAnalyzer:
             raise ValueError("不支援本地檔案存取")
 
         # 檢查是否為 IP 位址
-        try:
-            ip = ipaddress.ip_address(hostname)
-            if not self._is_safe_ip(str(ip)):
-                raise ValueError("不允許存取內部網路位址")
-        except ValueError:
-            # 不是 IP，是域名，進行 DNS 解析檢查
-            try:
-                resolved_ip = socket.gethostbyname(hostname)
-                if not self._is_safe_ip(resolved_ip):
-                    raise ValueError("域名解析到內部網路位址，已阻擋")
-            except socket.gaierror:
-                raise ValueError("無法解析域名")
+        if is_ip_address(hostname) and not self._is_safe_ip(hostname):
+            raise ValueError("不允許存取內部網路位址")
 
         return url
 
-    def fetch_html(self, url: str) -> tuple[str, str, int]:
+    def _validate_url(self, url: str, redirect_count: int = 0) -> str:
         """
-        抓取網頁 HTML（含 SSRF 防護）
+        驗證 URL 安全性（SSRF 防護）
+
+        Args:
+            url: 要驗證的 URL
+            redirect_count: 重定向計數（防止無限迴圈）
 
         Returns:
-            tuple: (html, final_url, status_code)
+            str: 驗證後的 URL
+
+        Raises:
+            ValueError: URL 不安全或無效
+        """
+        url = self._check_url(url, redirect_count)
+
+        # DNS 解析檢查（所有 A / AAAA 位址都必須安全，結果會快取給連線使用）
+        started = now()
+        RESOLVER.resolve_safe(urlparse(url).hostname)
+        if self.timings is not None:
+            self.timings.add("dns", started)
+
+        return url
+
+    def _request_headers(self, url: str, previous: Optional[AnalysisResult] = None) -> dict:
+        """
+        組出請求標頭；previous 為同一網址的舊結果時加上條件式請求標頭
+
+        Args:
+            url: 本次請求的網址
+            previous: 先前的分析結果（含 url 與 validators）
+        """
+        if not previous or not previous.url or normalize_url(previous.url) != normalize_url(url):
+            return self.headers
+
+        validators = previous.validators or {}
+        headers = dict(self.headers)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def _get(self, url: str, deadline: float, previous: Optional[AnalysisResult] = None) -> requests.Response:
+        """
+        發出單次 GET（不自動重定向、不預先讀取內容）
+
+        使用共用連線池；連線建立時會再檢查一次實際連上的 IP。
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout("超過總時限")
+
+        return get_session().get(
+            url,
+            headers=self._request_headers(url, previous),
+            timeout=min(self.timeout, remaining),
+            allow_redirects=False,
+            stream=True,
+        )
+
+    def _open(self, url: str, deadline: float, previous: Optional[AnalysisResult] = None) -> requests.Response:
+        """
+        發出請求並手動處理重定向（含 SSRF 防護）
+
+        Args:
+            url: 要抓取的網址
+            deadline: 總時限（time.monotonic() 時間點），涵蓋所有重定向
+            previous: 先前的分析結果，用於條件式請求
+
+        Returns:
+            requests.Response: 最終回應，內容尚未讀取，呼叫端負責關閉
 
         Raises:
             ValueError: URL 不安全
@@ -144,12 +243,10 @@ class SEOAnalyzer:
         url = self._validate_url(url)
 
         # 先不自動重定向，手動檢查每個重定向目標
-        response = requests.get(
-            url,
-            headers=self.headers,
-            timeout=self.timeout,
-            allow_redirects=False,
-        )
+        started = now()
+        response = self._get(url, deadline, previous)
+        if self.timings is not None:
+            self.timings.add(hop_name(0), started)
 
         # 處理重定向
         redirect_count = 0
@@ -157,6 +254,7 @@ class SEOAnalyzer:
         while response.status_code in (301, 302, 303, 307, 308):
             redirect_count += 1
             if redirect_count > self.MAX_REDIRECTS:
+                response.close()
                 raise ValueError("重定向次數過多")
 
             redirect_url = response.headers.get("Location")
@@ -165,113 +263,550 @@ class SEOAnalyzer:
 
             # 處理相對路徑重定向（如 "/path" 或 "../page"）
             redirect_url = urljoin(current_url, redirect_url)
+            response.close()
 
             # 驗證重定向目標
             redirect_url = self._validate_url(redirect_url, redirect_count)
             current_url = redirect_url
 
-            response = requests.get(
-                redirect_url,
-                headers=self.headers,
-                timeout=self.timeout,
-                allow_redirects=False,
+            started = now()
+            response = self._get(redirect_url, deadline, previous)
+            if self.timings is not None:
+                self.timings.add(hop_name(redirect_count), started)
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        return response
+
+    def _iter_body(self, response: requests.Response, result: FetchResult, deadline: float) -> Iterator[bytes]:
+        """
+        逐段讀取並解壓內容，超過大小上限、壓縮比例上限或總時限時截斷
+
+        每次只讀取目前可用的資料（read1），慢速回應也能及時檢查總時限。解壓不交給
+        urllib3，由 BodyDecoder 逐段進行，解壓後的內容不會超過上限。
+        """
+        raw = response.raw
+        read = getattr(raw, "read1", raw.read)
+        decoder = self._body_decoder(response.headers)
+
+        while True:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Body read deadline exceeded, truncating: {result.url}")
+                result.truncated = True
+                return
+
+            try:
+                data = read(self.STREAM_CHUNK_SIZE, decode_content=False)
+            except ReadTimeoutError as e:
+                raise requests.exceptions.ReadTimeout(e)
+            except ProtocolError as e:
+                raise requests.exceptions.ConnectionError(e)
+
+            if not data:
+                return
+
+            chunk = decoder.decode(data)
+            result.bytes_read = decoder.decoded_bytes
+            result.wire_bytes = decoder.wire_bytes
+            if chunk:
+                yield chunk
+            if decoder.limited:
+                self._log_limited(decoder, result)
+                result.truncated = True
+                return
+
+    def _body_decoder(self, headers) -> BodyDecoder:
+        """依回應的 Content-Encoding 建立解壓器（同步與非同步抓取共用）"""
+        return BodyDecoder(headers.get("Content-Encoding"), self.max_bytes, self.MAX_COMPRESSION_RATIO)
+
+    def _log_limited(self, decoder: BodyDecoder, result: FetchResult) -> None:
+        if decoder.limited == LIMIT_RATIO:
+            logger.warning(
+                f"Compression ratio exceeds {self.MAX_COMPRESSION_RATIO}, truncating "
+                f"({decoder.wire_bytes} -> {decoder.decoded_bytes} bytes): {result.url}"
             )
+        else:
+            logger.warning(f"Body exceeds {self.max_bytes} bytes, truncating: {result.url}")
+
+    def fetch(self, url: str, previous: Optional[AnalysisResult] = None, decode: Optional[bool] = None) -> FetchResult:
+        """
+        抓取網頁 HTML（含 SSRF 防護、大小上限與總時限）
+
+        Args:
+            url: 要抓取的網址
+            previous: 先前的分析結果，有 ETag / Last-Modified 時發出條件式請求
+            decode: True 時解碼成 html；False 時不解碼，原始內容放在 body；
+                None 時只有 lxml 能直接解析的 UTF-8 內容保留在 body，其他解碼
+
+        Returns:
+            FetchResult: 抓取結果（html 或 body，以及偵測到的 encoding）；伺服器回 304 時 not_modified 為 True
+
+        Raises:
+            ValueError: URL 不安全
+            requests.exceptions.*: 網路相關錯誤
+        """
+        deadline = time.monotonic() + self.total_timeout
+        response = self._open(url, deadline, previous)
+        try:
+            result = FetchResult(response.url, response.status_code, response.headers)
+            if result.not_modified:
+                return result
+            started = now()
+            body = b"".join(self._iter_body(response, result, deadline))
+            self._store_body(result, body, decode)
+            if self.timings is not None:
+                self.timings.add("body", started)
+                self.timings.bytes_read += result.bytes_read
+                self.timings.wire_bytes += result.wire_bytes
+            return result
+        finally:
+            response.close()
+
+    def fetch_html(self, url: str) -> tuple[str, str, int]:
+        """
+        抓取網頁 HTML（含 SSRF 防護）
+
+        Returns:
+            tuple: (html, final_url, status_code)
+
+        Raises:
+            ValueError: URL 不安全
+            requests.exceptions.*: 網路相關錯誤
+        """
+        result = self.fetch(url, decode=True)
+        return result.html, result.url, result.status_code
+
+    def _store_body(self, result: FetchResult, body: bytes, decode: Optional[bool] = None) -> None:
+        """
+        偵測編碼並保存內容（decode 的意義同 fetch）
+
+        編碼只看回應標頭與內容開頭決定，不會對整份內容做統計偵測。
+        """
+        result.encoding, result.encoding_source = detect_encoding(body, result.headers.get("Content-Type"))
+        if decode is None:
+            decode = not self._parses_bytes(result.encoding)
+        if decode:
+            result.html = decode_body(body, result.encoding)
+        else:
+            result.body = body
 
-        response.raise_for_status()
-        return response.text, response.url, response.status_code
+    def _parses_bytes(self, encoding: Optional[str]) -> bool:
+        """
+        這個編碼的原始內容能否直接交給 lxml 解析（不必先解碼成 str）
 
-    def analyze(self, url: str) -> dict:
+        只限 UTF-8：其他編碼的 Python codec 名稱與 libxml2 的不一定相同。
+        """
+        return self.parser == "lxml" and encoding == "utf-8"
+
+    def fetch_index(self, url: str, head_only: bool = False, previous: Optional[AnalysisResult] = None) -> FetchResult:
+        """
+        串流抓取網頁並直接建立索引（不保留完整 HTML、不建立 DOM 樹）
+
+        Args:
+            url: 要抓取的網址
+            head_only: 看到 </head> 或 <body> 後就停止讀取 body（<head> 沒有明確結束時
+                讀完全部內容，結果與完整解析相同）
+            previous: 先前的分析結果，用於條件式請求
+
+        Returns:
+            FetchResult: 抓取結果，index 為建立好的索引
+
+        Raises:
+            ValueError: URL 不安全
+            requests.exceptions.*: 網路相關錯誤
+        """
+        deadline = time.monotonic() + self.total_timeout
+        response = self._open(url, deadline, previous)
+        try:
+            if response.status_code == 304:
+                return FetchResult(response.url, response.status_code, response.headers)
+
+            result = FetchResult(response.url, response.status_code, response.headers)
+            # 邊讀邊解析，讀取內容與建立索引合併計時
+            started = now()
+            indexer = StreamingIndexer()
+            decoder = None
+            prefix = b""
+            for chunk in self._iter_body(response, result, deadline):
+                if decoder is None:
+                    # 讀到足夠偵測 <meta charset> 的開頭才決定編碼
+                    prefix += chunk
+                    if len(prefix) < SNIFF_BYTES:
+                        continue
+                    decoder = self._stream_decoder(result, prefix)
+                    chunk, prefix = prefix, b""
+                indexer.feed(decoder.decode(chunk))
+                if head_only and indexer.head_closed:
+                    break
+            if decoder is None:
+                decoder = self._stream_decoder(result, prefix)
+                indexer.feed(decoder.decode(prefix))
+            indexer.feed(decoder.decode(b"", final=True))
+            result.index = indexer.close()
+            if self.timings is not None:
+                self.timings.add("body_parse", started)
+                self.timings.bytes_read += result.bytes_read
+                self.timings.wire_bytes += result.wire_bytes
+            return result
+        finally:
+            response.close()
+
+    @staticmethod
+    def _stream_decoder(result: FetchResult, prefix: bytes) -> codecs.IncrementalDecoder:
+        """依內容開頭偵測編碼，建立串流解碼器"""
+        result.encoding, result.encoding_source = detect_encoding(prefix, result.headers.get("Content-Type"))
+        # 去掉 UTF-8 BOM（與 decode_body 相同）
+        name = "utf-8-sig" if result.encoding == "utf-8" and result.encoding_source == SOURCE_BOM else result.encoding
+        return codecs.getincrementaldecoder(name)(errors="replace")
+
+    def _parse_fetched(self, fetched: FetchResult, collect_links: bool = False, head_only: bool = False) -> PageIndex:
+        """解析抓取結果：保留原始內容的 UTF-8 頁面直接交給 lxml，其他先解碼"""
+        if fetched.html is None and fetched.body is not None:
+            if not head_only and self._parses_bytes(fetched.encoding):
+                return self._parse(fetched.body, collect_links)
+            fetched.html = decode_body(fetched.body, fetched.encoding)
+            fetched.body = None
+        return self._parse(fetched.html or "", collect_links, head_only)
+
+    def _parse(self, html, collect_links: bool = False, head_only: bool = False) -> PageIndex:
+        """
+        解析 HTML 並建立索引（lxml 失敗時改用 html.parser）
+
+        html 為 str，或 UTF-8 的原始內容 bytes（由 lxml 直接解碼，不另外產生一份 str）。
+        head_only 時以串流索引器分段解析，<head> 結束就停止（不需要 body 的檢測用）；
+        <head> 不是以 </head> 或 <body> 結束時（由 <div> 之類的標籤推斷），後面可能還有
+        head 的標籤，改用完整解析，確保結果與完整分析相同。
+        """
+        if isinstance(html, bytes) and (head_only or self.parser != "lxml"):
+            html = decode_body(html, "utf-8")
+
+        if head_only:
+            indexer = StreamingIndexer(collect_links)
+            for start in range(0, len(html), self.STREAM_CHUNK_SIZE):
+                indexer.feed(html[start:start + self.STREAM_CHUNK_SIZE])
+                if indexer.head_complete:
+                    break
+            if indexer.head_closed or not indexer.head_complete:
+                return indexer.close()
+            # <head> 是推斷結束的：往下走完整解析
+
+        if self.parser == "stream":
+            # 已取得完整內容時仍用串流索引器，省下建立 DOM 樹的成本
+            indexer = StreamingIndexer(collect_links)
+            indexer.feed(html)
+            return indexer.close()
+
+        if self.parser == "html.parser":
+            soup = BeautifulSoup(html, "html.parser")
+        elif isinstance(html, bytes):
+            try:
+                soup = BeautifulSoup(html, "lxml", from_encoding="utf-8")
+            except Exception as e:
+                logger.warning(f"lxml parser failed, falling back to html.parser: {e}")
+                soup = BeautifulSoup(decode_body(html, "utf-8"), "html.parser")
+        else:
+            try:
+                soup = BeautifulSoup(html, "lxml")
+            except Exception as e:
+                logger.warning(f"lxml parser failed, falling back to html.parser: {e}")
+                soup = BeautifulSoup(html, "html.parser")
+
+        # 單次走訪 DOM 建立索引，所有檢測都從索引讀取
+        return build_index(soup, collect_links)
+
+    def analyze(
+        self,
+        url: str,
+        previous: Optional[AnalysisResult] = None,
+        checks: Optional[list[str]] = None,
+    ) -> AnalysisResult:
         """
         分析網站 SEO
 
+        Args:
+            url: 要分析的網址
+            previous: 同一網址先前的分析結果；伺服器回 304 時直接沿用
+            checks: 只執行這些檢測（key 見 CHECKS），None 表示全部
+
         Returns:
-            dict: 分析結果
+            AnalysisResult: 分析結果（fetch 為 "fetched" 或 "revalidated"）
+
+        Raises:
+            ValueError: checks 有未知的檢測項目
         """
+        selected = select_checks(self.CHECKS, checks)
         try:
-            html, final_url, status_code = self.fetch_html(url)
-        except ValueError as e:
-            # SSRF 防護或 URL 驗證錯誤
-            return {"error": "invalid_url", "message": str(e)}
-        except requests.exceptions.Timeout:
-            return {"error": "timeout", "message": "網站回應太慢，可能在睡覺"}
-        except requests.exceptions.SSLError:
-            return {"error": "ssl_error", "message": "SSL 憑證有問題，安全性堪憂"}
-        except requests.exceptions.ConnectionError:
-            return {"error": "connection_error", "message": "連不上網站，確定網址沒打錯？"}
-        except requests.exceptions.HTTPError as e:
-            # 不洩露完整錯誤，只回傳狀態碼
-            status_code = e.response.status_code if e.response else "未知"
-            return {"error": "http_error", "message": f"HTTP 錯誤：{status_code}"}
+            if self.parser == "stream":
+                head_only = required_stages(selected) <= HEAD_STAGES
+                fetched = self.fetch_index(url, head_only=head_only, previous=previous)
+            elif self.pool is not None:
+                # 交給行程池解碼
+                fetched = self.fetch(url, previous, decode=False)
+            else:
+                fetched = self.fetch(url, previous)
         except Exception as e:
-            # 記錄完整錯誤到日誌，但只回傳通用訊息給使用者
-            logger.error(f"Unexpected error analyzing {url}: {str(e)}", exc_info=True)
-            return {"error": "unknown", "message": "發生未知錯誤，請稍後再試"}
+            return self._error_result(e, url)
+
+        if fetched.not_modified and previous:
+            return self._revalidated(previous, fetched, selected)
+        if self.pool is not None and fetched.index is None:
+            try:
+                result = self.pool.analyze(self, fetched, selected)
+            except (ParseTimeoutError, ParseWorkerError) as e:
+                return self._error_result(e, url)
+        else:
+            result = self._analyze_fetched(fetched, selected)
+        if result.targets:
+            result = run_sync(self._verify_targets(result, selected))
+        return result
+
+    async def analyze_async(
+        self,
+        url: str,
+        previous: Optional[AnalysisResult] = None,
+        checks: Optional[list[str]] = None,
+    ) -> AnalysisResult:
+        """
+        分析網站 SEO（非同步版）
+
+        抓取走 asyncio 原生的 HTTP 流程，解析與檢測交給有上限的 executor
+        （或解析行程池），不會阻塞 event loop。
+
+        Args:
+            url: 要分析的網址
+            previous: 同一網址先前的分析結果；伺服器回 304 時直接沿用
+            checks: 只執行這些檢測（key 見 CHECKS），None 表示全部
+
+        Returns:
+            AnalysisResult: 分析結果（fetch 為 "fetched" 或 "revalidated"）
 
-        # HTML 解析（lxml 失敗時改用 html.parser）
+        Raises:
+            ValueError: checks 有未知的檢測項目
+        """
+        selected = select_checks(self.CHECKS, checks)
         try:
-            soup = BeautifulSoup(html, "lxml")
+            # 使用行程池時由子 process 解碼
+            fetched = await fetch_async(self, url, previous, decode=False if self.pool is not None else None)
         except Exception as e:
-            logger.warning(f"lxml parser failed, falling back to html.parser: {e}")
-            soup = BeautifulSoup(html, "html.parser")
+            return self._error_result(e, url)
 
-        parsed_url = urlparse(final_url)
+        if fetched.not_modified and previous:
+            return self._revalidated(previous, fetched, selected)
+        if self.pool is not None:
+            try:
+                result = await self.pool.analyze_async(self, fetched, selected)
+            except (ParseTimeoutError, ParseWorkerError) as e:
+                return self._error_result(e, url)
+        else:
+            result = await run_in_parse_executor(self._analyze_fetched, fetched, selected)
+        if result.targets:
+            result = await self._verify_targets(result, selected)
+        return result
+
+    def _revalidated(
+        self,
+        previous: AnalysisResult,
+        fetched: FetchResult,
+        selected: Optional[tuple] = None,
+    ) -> AnalysisResult:
+        """伺服器回 304：沿用先前的檢測結果，更新 validators"""
+        validators = dict(previous.validators or {})
+        validators.update({k: v for k, v in fetched.validators().items() if v})
+        result = previous.replace(fetch="revalidated", validators=validators)
+        if selected is not None and selected is not self.CHECKS:
+            result = self._select(result, selected)
+        return result
+
+    def select_results(self, result: AnalysisResult, checks: list[str]) -> AnalysisResult:
+        """
+        從完整的分析結果取出部分檢測，分數依選取的權重重新換算
 
-        # 執行所有檢測
-        results = {
-            "url": final_url,
-            "status_code": status_code,
-            "is_https": parsed_url.scheme == "https",
-            "checks": {},
-            "score": 0,
-            "grade": "F",
-            "issues": [],
-            "passed": [],
-        }
+        Raises:
+            ValueError: checks 有未知的檢測項目
+        """
+        if result.error is not None:
+            return result
+        return self._select(result, select_checks(self.CHECKS, checks))
+
+    def _select(self, result: AnalysisResult, selected: tuple) -> AnalysisResult:
+        check_results = [(check, result.checks[check.key]) for check in selected if check.key in result.checks]
+        checks, score, grade = self._score(check_results, rescale=self._partial(selected))
+        return result.replace(checks=checks, score=score, grade=grade)
+
+    def _error_result(self, error: Exception, url: str) -> AnalysisResult:
+        """將抓取錯誤轉成分析結果"""
+        if isinstance(error, ParseTimeoutError):
+            return AnalysisResult.from_error("timeout", "網頁太複雜，解析到超時")
+        if isinstance(error, ParseWorkerError):
+            logger.error(f"Parse worker failed for {url}: {error}")
+            return AnalysisResult.from_error("unknown", "發生未知錯誤，請稍後再試")
+        if isinstance(error, ValueError):
+            # SSRF 防護或 URL 驗證錯誤
+            return AnalysisResult.from_error("invalid_url", str(error))
+        if isinstance(error, requests.exceptions.Timeout):
+            return AnalysisResult.from_error("timeout", "網站回應太慢，可能在睡覺")
+        if isinstance(error, requests.exceptions.SSLError):
+            return AnalysisResult.from_error("ssl_error", "SSL 憑證有問題，安全性堪憂")
+        if isinstance(error, requests.exceptions.ContentDecodingError):
+            return AnalysisResult.from_error("connection_error", "網站回應的壓縮內容無法解開")
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return AnalysisResult.from_error("connection_error", "連不上網站，確定網址沒打錯？")
+        if isinstance(error, requests.exceptions.HTTPError):
+            # 不洩露完整錯誤，只回傳狀態碼
+            status_code = error.response.status_code if error.response is not None else "未知"
+            return AnalysisResult.from_error("http_error", f"HTTP 錯誤：{status_code}")
+
+        # 記錄完整錯誤到日誌，但只回傳通用訊息給使用者
+        logger.error(f"Unexpected error analyzing {url}: {str(error)}", exc_info=error)
+        return AnalysisResult.from_error("unknown", "發生未知錯誤，請稍後再試")
+
+    def _analyze_fetched(self, fetched: FetchResult, selected: Optional[tuple] = None) -> AnalysisResult:
+        """解析抓取結果並執行檢測（只計算選取的檢測需要的階段）"""
+        selected = self.CHECKS if selected is None else selected
+        stages = required_stages(selected)
+        if fetched.index is not None:
+            index = fetched.index
+        elif stages <= {URL}:
+            # 只需要網址，不必解析
+            index = PageIndex()
+        else:
+            started = now()
+            index = self._parse_fetched(fetched, head_only=stages <= HEAD_STAGES)
+            if self.timings is not None:
+                self.timings.add("parse", started)
+
+        result = self._build_results(index, fetched.url, fetched.status_code, selected)
+        result.truncated = fetched.truncated
+        result.fetch = "fetched"
+        result.validators = fetched.validators()
+        charset = fetched.charset()
+        if charset is not None:
+            result.encoding = charset
+        if self.deep:
+            result.targets = self._reachability_targets(index, fetched.url, result.checks) or UNSET
+        return result
+
+    def _reachability_targets(self, index: PageIndex, final_url: str, checks: dict) -> dict[str, list[str]]:
+        """
+        深度模式要探測的網址（只看已通過的檢測；相對網址以最終網址解析，只保留 http / https，
+        無法解析的 href 略過）
 
-        # 執行各項檢測
-        checks = [
-            ("title", self._check_title(soup)),
-            ("meta_description", self._check_meta_description(soup)),
-            ("canonical", self._check_canonical(soup)),
-            ("viewport", self._check_viewport(soup)),
-            ("lang", self._check_lang(soup)),
-            ("h1", self._check_h1(soup)),
-            ("https", self._check_https(parsed_url)),
-            ("robots", self._check_robots(soup)),
-            ("favicon", self._check_favicon(soup)),
-            ("img_alt", self._check_img_alt(soup)),
-            ("og_title", self._check_og_tag(soup, "og:title")),
-            ("og_description", self._check_og_tag(soup, "og:description")),
-            ("og_image", self._check_og_tag(soup, "og:image")),
-            ("twitter_card", self._check_twitter_card(soup)),
-            ("json_ld", self._check_json_ld(soup)),
-            ("json_ld_types", self._check_json_ld_types(soup)),
-            ("json_ld_valid", self._check_json_ld_valid(soup)),
-            ("hreflang", self._check_hreflang(soup)),
-            ("published_time", self._check_published_time(soup)),
-            ("snippet_control", self._check_snippet_control(soup)),
-        ]
-
-        total_score = 0
-        for check_name, check_result in checks:
-            results["checks"][check_name] = check_result
-            weight = self.WEIGHTS.get(check_name, 5)
-
-            if check_result["passed"]:
-                total_score += weight
-                results["passed"].append(check_name)
+        Returns:
+            dict: 檢測 key → 網址清單
+        """
+        targets = {}
+        for key in self.REACHABILITY_CHECKS:
+            check = checks.get(key)
+            if check is None or not check.passed:
+                continue
+            if key == "canonical":
+                hrefs = [index.link_href("canonical")]
+            elif key == "og_image":
+                hrefs = [index.meta_property("og:image")]
+            elif key == "favicon":
+                hrefs = [next(filter(None, map(index.link_href, self.FAVICON_RELS)), None)]
             else:
-                results["issues"].append({
-                    "key": check_name,
-                    "message": check_result.get("message", ""),
-                    "value": check_result.get("value"),
-                    "weight": weight,
-                })
+                hrefs = index.hreflang_hrefs
+            urls = []
+            for href in hrefs:
+                if not href or not href.strip():
+                    continue
+                try:
+                    url = urljoin(final_url, href.strip())
+                    parts = urlparse(url)
+                    # 不是數字的 port 在存取 .port 時才會拋出
+                    parts.port
+                except ValueError:
+                    # href 來自頁面內容，可能是 "https://[bad" 之類無法解析的網址
+                    continue
+                if parts.scheme in ("http", "https") and url not in urls:
+                    urls.append(url)
+            if urls:
+                targets[key] = urls[:MAX_TARGETS]
+        return targets
+
+    async def _verify_targets(self, result: AnalysisResult, selected: tuple) -> AnalysisResult:
+        """
+        同時探測 result.targets，無法存取的檢測改為未通過（message 為 unreachable）並重新計分
 
-        results["score"] = total_score
-        results["grade"] = self._calculate_grade(total_score)
+        未通過的檢測保留原本的 value，errors 列出每個失敗的網址與狀態碼或失敗原因。
+        失敗的網址全部是無法編碼（主機名稱不是合法的域名）時 message 為 invalid_url，
+        問題出在 href 本身而不是目標無法存取。
+        """
+        started = now()
+        # 探測用自己的 analyzer：單次操作以探測時限為準，也不計入頁面的抓取階段
+        prober = type(self)(timeout=PROBE_TIMEOUT)
+        probes = await check_urls(prober, [url for urls in result.targets.values() for url in urls])
+        if self.timings is not None:
+            self.timings.add("reachability", started)
+
+        checks = dict(result.checks)
+        for key, urls in result.targets.items():
+            broken = [{"url": url, **probes[url].to_dict()} for url in urls if not probes[url].ok]
+            if broken:
+                invalid = all(item.get("error") == ERROR_ENCODING for item in broken)
+                message = "invalid_url" if invalid else "unreachable"
+                checks[key] = CheckResult(False, message, checks[key].value, errors=broken)
+        check_results = [(check, checks[check.key]) for check in selected if check.key in checks]
+        checks, score, grade = self._score(check_results, rescale=self._partial(selected))
+        return result.replace(checks=checks, score=score, grade=grade, targets=UNSET)
+
+    def _build_results(
+        self,
+        index: PageIndex,
+        final_url: str,
+        status_code: int,
+        selected: Optional[tuple] = None,
+    ) -> AnalysisResult:
+        """執行檢測並計算分數"""
+        parsed_url = urlparse(final_url)
+        selected = self.CHECKS if selected is None else selected
+        timings = self.timings
+        if timings is None:
+            checks = [(check, check.run(self, index, parsed_url)) for check in selected]
+        else:
+            checks = []
+            for check in selected:
+                started = now()
+                checks.append((check, check.run(self, index, parsed_url)))
+                timings.add(check_name(check.key), started)
+
+        checks, score, grade = self._score(checks, rescale=self._partial(selected))
+        return AnalysisResult(final_url, status_code, parsed_url.scheme == "https", checks, score, grade, self.WEIGHTS)
+
+    def _partial(self, selected: tuple) -> bool:
+        """是否只選了部分檢測（以 key 比較：select_checks 選全部時會回傳新的 tuple）"""
+        return {check.key for check in selected} != set(self.WEIGHTS)
+
+    def _score(
+        self,
+        checks: list[tuple[Check, CheckResult]],
+        rescale: bool = False,
+    ) -> tuple[dict[str, CheckResult], int, str]:
+        """
+        彙整檢測結果並計算分數
+
+        分數為通過項目的權重總和；rescale 時（只執行部分檢測）換算成
+        通過權重 / 選取項目的權重總和 × 100。
 
-        return results
+        Returns:
+            tuple: (依執行順序的檢測結果, 分數, 等級)
+        """
+        results = {}
+        passed_weight = 0
+        total_weight = 0
+        for check, check_result in checks:
+            results[check.key] = check_result
+            total_weight += check.weight
+            if check_result.passed:
+                passed_weight += check.weight
+
+        if rescale:
+            passed_weight = round(passed_weight * 100 / total_weight) if total_weight else 0
+        return results, passed_weight, self._calculate_grade(passed_weight)
 
     def _calculate_grade(self, score: int) -> str:
         """計算等級"""
@@ -286,496 +821,255 @@ class SEOAnalyzer:
         else:
             return "F"
 
-    def _check_title(self, soup: BeautifulSoup) -> dict:
+    def _check_title(self, index: PageIndex) -> CheckResult:
         """檢查 title 標籤"""
-        title = soup.find("title")
-        if not title:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        # 使用 get_text() 而非 .string，避免 title 有子元素時回傳 None
-        title_text = title.get_text(strip=True)
+        title_text = index.title
+        if title_text is None:
+            return CheckResult(False, "missing", None)
+
         length = len(title_text)
 
         if length == 0:
-            return {
-                "passed": False,
-                "message": "empty",
-                "value": "",
-            }
+            return CheckResult(False, "empty", "")
         elif length < self.TITLE_MIN_LENGTH:
-            return {
-                "passed": False,
-                "message": "too_short",
-                "value": title_text,
-                "length": length,
-            }
+            return CheckResult(False, "too_short", title_text, length=length)
         elif length > self.TITLE_MAX_LENGTH:
-            return {
-                "passed": False,
-                "message": "too_long",
-                "value": title_text,
-                "length": length,
-            }
-
-        return {
-            "passed": True,
-            "value": title_text,
-            "length": length,
-        }
+            return CheckResult(False, "too_long", title_text, length=length)
+
+        return CheckResult(True, value=title_text, length=length)
 
-    def _check_meta_description(self, soup: BeautifulSoup) -> dict:
+    def _check_meta_description(self, index: PageIndex) -> CheckResult:
         """檢查 meta description"""
-        meta = soup.find("meta", attrs={"name": "description"})
-        if not meta:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        content = meta.get("content", "").strip()
+        content = index.meta_name("description")
+        if content is None:
+            return CheckResult(False, "missing", None)
+
+        content = content.strip()
         length = len(content)
 
         if length == 0:
-            return {
-                "passed": False,
-                "message": "empty",
-                "value": "",
-            }
+            return CheckResult(False, "empty", "")
         elif length < self.META_DESC_MIN_LENGTH:
-            return {
-                "passed": False,
-                "message": "too_short",
-                "value": content,
-                "length": length,
-            }
+            return CheckResult(False, "too_short", content, length=length)
         elif length > self.META_DESC_MAX_LENGTH:
-            return {
-                "passed": False,
-                "message": "too_long",
-                "value": content,
-                "length": length,
-            }
-
-        return {
-            "passed": True,
-            "value": content,
-            "length": length,
-        }
+            return CheckResult(False, "too_long", content, length=length)
 
-    def _check_canonical(self, soup: BeautifulSoup) -> dict:
+        return CheckResult(True, value=content, length=length)
+
+    def _check_canonical(self, index: PageIndex) -> CheckResult:
         """檢查 canonical 標籤"""
-        canonical = soup.find("link", attrs={"rel": "canonical"})
-        if not canonical:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        href = canonical.get("href", "").strip()
+        href = index.link_href("canonical")
+        if href is None:
+            return CheckResult(False, "missing", None)
+
+        href = href.strip()
         if not href:
-            return {
-                "passed": False,
-                "message": "empty",
-                "value": "",
-            }
-
-        return {
-            "passed": True,
-            "value": href,
-        }
+            return CheckResult(False, "empty", "")
 
-    def _check_viewport(self, soup: BeautifulSoup) -> dict:
+        return CheckResult(True, value=href)
+
+    def _check_viewport(self, index: PageIndex) -> CheckResult:
         """檢查 viewport 設定"""
-        viewport = soup.find("meta", attrs={"name": "viewport"})
-        if not viewport:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        content = viewport.get("content", "").strip()
+        content = index.meta_name("viewport")
+        if content is None:
+            return CheckResult(False, "missing", None)
+
+        content = content.strip()
         if not content:
-            return {
-                "passed": False,
-                "message": "empty",
-                "value": "",
-            }
-
-        return {
-            "passed": True,
-            "value": content,
-        }
+            return CheckResult(False, "empty", "")
 
-    def _check_lang(self, soup: BeautifulSoup) -> dict:
+        return CheckResult(True, value=content)
+
+    def _check_lang(self, index: PageIndex) -> CheckResult:
         """檢查 html lang 屬性"""
-        html = soup.find("html")
-        if not html:
-            return {
-                "passed": False,
-                "message": "no_html_tag",
-                "value": None,
-            }
-
-        lang = html.get("lang", "").strip()
+        lang = index.html_lang
+        if lang is None:
+            return CheckResult(False, "no_html_tag", None)
+
         if not lang:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        return {
-            "passed": True,
-            "value": lang,
-        }
+            return CheckResult(False, "missing", None)
 
-    def _check_h1(self, soup: BeautifulSoup) -> dict:
+        return CheckResult(True, value=lang)
+
+    def _check_h1(self, index: PageIndex) -> CheckResult:
         """檢查 H1 標籤"""
-        h1_tags = soup.find_all("h1")
-        count = len(h1_tags)
+        h1_texts = index.h1_texts
+        count = len(h1_texts)
 
         if count == 0:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-                "count": 0,
-            }
+            return CheckResult(False, "missing", None, count=0)
         elif count > 1:
-            return {
-                "passed": False,
-                "message": "multiple",
-                "value": [h1.get_text(strip=True)[:50] for h1 in h1_tags],
-                "count": count,
-            }
-
-        h1_text = h1_tags[0].get_text(strip=True)
+            return CheckResult(False, "multiple", [text[:50] for text in h1_texts], count=count)
+
+        h1_text = h1_texts[0]
         if not h1_text:
-            return {
-                "passed": False,
-                "message": "empty",
-                "value": "",
-                "count": 1,
-            }
-
-        return {
-            "passed": True,
-            "value": h1_text,
-            "count": 1,
-        }
+            return CheckResult(False, "empty", "", count=1)
+
+        return CheckResult(True, value=h1_text, count=1)
 
-    def _check_https(self, parsed_url) -> dict:
+    def _check_https(self, parsed_url) -> CheckResult:
         """檢查 HTTPS"""
         is_https = parsed_url.scheme == "https"
-        return {
-            "passed": is_https,
-            "message": "http_only" if not is_https else None,
-            "value": parsed_url.scheme,
-        }
+        return CheckResult(is_https, "http_only" if not is_https else None, parsed_url.scheme)
 
-    def _check_robots(self, soup: BeautifulSoup) -> dict:
+    def _check_robots(self, index: PageIndex) -> CheckResult:
         """檢查 robots meta"""
-        robots = soup.find("meta", attrs={"name": "robots"})
-        if not robots:
+        content = index.meta_name("robots")
+        if content is None:
             # 沒有 robots meta 標籤是正常的（預設可索引）
-            return {
-                "passed": True,
-                "value": "default (index, follow)",
-            }
+            return CheckResult(True, value="default (index, follow)")
 
-        content = robots.get("content", "").lower()
+        content = content.lower()
         if "noindex" in content:
-            return {
-                "passed": False,
-                "message": "noindex",
-                "value": content,
-            }
-
-        return {
-            "passed": True,
-            "value": content,
-        }
+            return CheckResult(False, "noindex", content)
+
+        return CheckResult(True, value=content)
 
-    def _check_favicon(self, soup: BeautifulSoup) -> dict:
+    def _check_favicon(self, index: PageIndex) -> CheckResult:
         """檢查 favicon"""
         # 檢查多種 favicon 格式
-        favicon_selectors = [
-            {"rel": "icon"},
-            {"rel": "shortcut icon"},
-            {"rel": "apple-touch-icon"},
-        ]
-
-        for selector in favicon_selectors:
-            favicon = soup.find("link", attrs=selector)
-            if favicon and favicon.get("href"):
-                return {
-                    "passed": True,
-                    "value": favicon.get("href"),
-                }
-
-        return {
-            "passed": False,
-            "message": "missing",
-            "value": None,
-        }
+        for rel in self.FAVICON_RELS:
+            href = index.link_href(rel)
+            if href:
+                return CheckResult(True, value=href)
+
+        return CheckResult(False, "missing", None)
 
-    def _check_img_alt(self, soup: BeautifulSoup) -> dict:
+    def _check_img_alt(self, index: PageIndex) -> CheckResult:
         """檢查圖片 alt 屬性"""
-        images = soup.find_all("img")
-        if not images:
+        total = index.img_total
+        if total == 0:
             # 沒有圖片，跳過此檢測
-            return {
-                "passed": True,
-                "value": "no_images",
-                "total": 0,
-                "with_alt": 0,
-            }
-
-        total = len(images)
-        with_alt = sum(1 for img in images if img.get("alt", "").strip())
+            return CheckResult(True, value="no_images", total=0, with_alt=0)
+
+        with_alt = index.img_with_alt
         ratio = with_alt / total if total > 0 else 0
 
         if ratio < self.IMAGE_ALT_LOW_THRESHOLD:
-            return {
-                "passed": False,
-                "message": "low_ratio",
-                "value": f"{with_alt}/{total}",
-                "total": total,
-                "with_alt": with_alt,
-                "ratio": ratio,
-            }
+            return CheckResult(
+                False,
+                "low_ratio",
+                f"{with_alt}/{total}",
+                total=total,
+                with_alt=with_alt,
+                ratio=ratio,
+            )
         elif ratio < self.IMAGE_ALT_MEDIUM_THRESHOLD:
-            return {
-                "passed": False,
-                "message": "medium_ratio",
-                "value": f"{with_alt}/{total}",
-                "total": total,
-                "with_alt": with_alt,
-                "ratio": ratio,
-            }
-
-        return {
-            "passed": True,
-            "value": f"{with_alt}/{total}",
-            "total": total,
-            "with_alt": with_alt,
-            "ratio": ratio,
-        }
+            return CheckResult(
+                False,
+                "medium_ratio",
+                f"{with_alt}/{total}",
+                total=total,
+                with_alt=with_alt,
+                ratio=ratio,
+            )
 
-    def _check_og_tag(self, soup: BeautifulSoup, property_name: str) -> dict:
+        return CheckResult(True, value=f"{with_alt}/{total}", total=total, with_alt=with_alt, ratio=ratio)
+
+    def _check_og_tag(self, index: PageIndex, property_name: str) -> CheckResult:
         """檢查 Open Graph 標籤"""
-        og = soup.find("meta", attrs={"property": property_name})
-        if not og:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        content = og.get("content", "").strip()
+        content = index.meta_property(property_name)
+        if content is None:
+            return CheckResult(False, "missing", None)
+
+        content = content.strip()
         if not content:
-            return {
-                "passed": False,
-                "message": "empty",
-                "value": "",
-            }
-
-        return {
-            "passed": True,
-            "value": content[:100] + "..." if len(content) > 100 else content,
-        }
+            return CheckResult(False, "empty", "")
+
+        return CheckResult(True, value=content[:100] + "..." if len(content) > 100 else content)
 
-    def _check_twitter_card(self, soup: BeautifulSoup) -> dict:
+    def _check_twitter_card(self, index: PageIndex) -> CheckResult:
         """檢查 Twitter Card"""
-        twitter = soup.find("meta", attrs={"name": "twitter:card"})
-        if not twitter:
+        content = index.meta_name("twitter:card")
+        if content is None:
             # 也接受 property 形式
-            twitter = soup.find("meta", attrs={"property": "twitter:card"})
-
-        if not twitter:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-            }
-
-        content = twitter.get("content", "").strip()
-        return {
-            "passed": True,
-            "value": content,
-        }
+            content = index.meta_property("twitter:card")
+
+        if content is None:
+            return CheckResult(False, "missing", None)
+
+        content = content.strip()
+        return CheckResult(True, value=content)
 
-    def _check_json_ld(self, soup: BeautifulSoup) -> dict:
+    def _check_json_ld(self, index: PageIndex) -> CheckResult:
         """檢查 JSON-LD 存在"""
-        scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
+        scripts = index.json_ld
         if not scripts:
-            return {
-                "passed": False,
-                "message": "missing",
-                "value": None,
-                "count": 0,
-            }
-
-        return {
-            "passed": True,
-            "value": f"{len(scripts)} schema(s) found",
-            "count": len(scripts),
-        }
+            return CheckResult(False, "missing", None, count=0)
+
+        return CheckResult(True, value=f"{len(scripts)} schema(s) found", count=len(scripts))
 
-    def _check_json_ld_types(self, soup: BeautifulSoup) -> dict:
+    def _check_json_ld_types(self, index: PageIndex) -> CheckResult:
         """檢查 JSON-LD 類型"""
-        scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
+        scripts = index.json_ld
         if not scripts:
-            return {
-                "passed": False,
-                "message": "no_schema",
-                "value": None,
-            }
-
-        types = []
-        for script in scripts:
-            try:
-                data = json.loads(script.string or "{}")
-                if isinstance(data, list):
-                    for item in data:
-                        if "@type" in item:
-                            types.append(item["@type"])
-                elif "@type" in data:
-                    types.append(data["@type"])
-                elif "@graph" in data:
-                    for item in data["@graph"]:
-                        if "@type" in item:
-                            types.append(item["@type"])
-            except json.JSONDecodeError:
-                continue
+            return CheckResult(False, "no_schema", None)
+
+        types = index.json_ld_graph.types
 
         if not types:
-            return {
-                "passed": False,
-                "message": "no_types",
-                "value": None,
-            }
-
-        return {
-            "passed": True,
-            "value": types,
-        }
+            return CheckResult(False, "no_types", None)
 
-    def _check_json_ld_valid(self, soup: BeautifulSoup) -> dict:
+        return CheckResult(True, value=types)
+
+    def _check_json_ld_valid(self, index: PageIndex) -> CheckResult:
         """檢查 JSON-LD 格式是否有效"""
-        scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
+        scripts = index.json_ld
         if not scripts:
-            return {
-                "passed": False,
-                "message": "no_schema",
-                "value": None,
-            }
-
-        valid_count = 0
-        invalid_count = 0
+            return CheckResult(False, "no_schema", None)
 
-        for script in scripts:
-            try:
-                json.loads(script.string or "{}")
-                valid_count += 1
-            except json.JSONDecodeError:
-                invalid_count += 1
+        graph = index.json_ld_graph
+        valid_count = graph.valid_count
+        invalid_count = len(graph.blocks) - valid_count
 
         if invalid_count > 0:
-            return {
-                "passed": False,
-                "message": "invalid_json",
-                "value": f"{invalid_count} invalid schema(s)",
-                "valid": valid_count,
-                "invalid": invalid_count,
-            }
-
-        return {
-            "passed": True,
-            "value": f"All {valid_count} schema(s) valid",
-            "valid": valid_count,
-            "invalid": 0,
-        }
+            return CheckResult(
+                False,
+                "invalid_json",
+                f"{invalid_count} invalid schema(s)",
+                valid=valid_count,
+                invalid=invalid_count,
+                errors=graph.errors,
+            )
+
+        return CheckResult(True, value=f"All {valid_count} schema(s) valid", valid=valid_count, invalid=0)
 
-    def _check_hreflang(self, soup: BeautifulSoup) -> dict:
+    def _check_hreflang(self, index: PageIndex) -> CheckResult:
         """檢查 hreflang 標籤"""
-        hreflangs = soup.find_all("link", attrs={"rel": "alternate", "hreflang": True})
-        if not hreflangs:
+        langs = index.hreflangs
+        if not langs:
             # hreflang 不是必須的，只是加分項
-            return {
-                "passed": True,
-                "message": "not_applicable",
-                "value": "No hreflang (single language site)",
-            }
-
-        langs = [link.get("hreflang") for link in hreflangs]
-        return {
-            "passed": True,
-            "value": langs,
-        }
+            return CheckResult(True, "not_applicable", "No hreflang (single language site)")
 
-    def _check_published_time(self, soup: BeautifulSoup) -> dict:
+        return CheckResult(True, value=langs)
+
+    def _check_published_time(self, index: PageIndex) -> CheckResult:
         """檢查發布時間標記"""
         # 檢查 article:published_time
-        published = soup.find("meta", attrs={"property": "article:published_time"})
-        if published and published.get("content"):
-            return {
-                "passed": True,
-                "value": published.get("content"),
-            }
+        published = index.meta_property("article:published_time")
+        if published:
+            return CheckResult(True, value=published)
 
         # 檢查 article:modified_time
-        modified = soup.find("meta", attrs={"property": "article:modified_time"})
-        if modified and modified.get("content"):
-            return {
-                "passed": True,
-                "value": modified.get("content"),
-            }
+        modified = index.meta_property("article:modified_time")
+        if modified:
+            return CheckResult(True, value=modified)
 
         # 檢查 datePublished in JSON-LD
-        scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
-        for script in scripts:
-            try:
-                data = json.loads(script.string or "{}")
-                if "datePublished" in data:
-                    return {
-                        "passed": True,
-                        "value": data["datePublished"],
-                    }
-                if "@graph" in data:
-                    for item in data["@graph"]:
-                        if "datePublished" in item:
-                            return {
-                                "passed": True,
-                                "value": item["datePublished"],
-                            }
-            except json.JSONDecodeError:
-                continue
+        dates = index.json_ld_graph.dates
+        if "datePublished" in dates:
+            return CheckResult(True, value=dates["datePublished"])
 
-        return {
-            "passed": False,
-            "message": "missing",
-            "value": None,
-        }
+        return CheckResult(False, "missing", None)
 
-    def _check_snippet_control(self, soup: BeautifulSoup) -> dict:
+    def _check_snippet_control(self, index: PageIndex) -> CheckResult:
         """檢查 AI 摘要控制"""
-        robots = soup.find("meta", attrs={"name": "robots"})
-        if not robots:
+        content = index.meta_name("robots")
+        if content is None:
             # 沒有特別設定，表示允許所有摘要
-            return {
-                "passed": True,
-                "value": "default (allow all)",
-            }
+            return CheckResult(True, value="default (allow all)")
 
-        content = robots.get("content", "").lower()
+        content = content.lower()
 
         # 檢查各種 snippet 控制
         controls = []
@@ -787,12 +1081,6 @@ class SEOAnalyzer:
                 controls.append(f"max-snippet:{match.group(1)}")
 
         if controls:
-            return {
-                "passed": True,
-                "value": ", ".join(controls),
-            }
-
-        return {
-            "passed": True,
-            "value": "default (allow all)",
-        }
+            return CheckResult(True, value=", ".join(controls))
+
+        return CheckResult(True, value="default (allow all)")
@@ -1,22 +1,42 @@
 """SEO Roaster - Flask 應用程式"""
 
+import json
 import logging
 import os
-import threading
-from collections import defaultdict
+import random
 from functools import wraps
-from time import time
+from typing import Optional
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 
+from .aio import iter_sync, run_sync
 from .analyzer import SEOAnalyzer
+from .batch import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PER_HOST,
+    MAX_BATCH_URLS,
+    MAX_CONCURRENCY,
+    MAX_PER_HOST,
+    MAX_URL_LENGTH,
+    analyze_batch,
+    parse_url_list,
+)
+from .cache import ResultCache, create_store
+from .checks import select_checks
+from .metrics import IN_FLIGHT, RATE_LIMITED, cache_observer, observe_analysis, render_metrics
+from .pool import create_pool
+from .ratelimit import create_backend
+from .reachability import STATUS_CACHE
+from .resolver import RESOLVER
+from .results import AnalysisResult
 from .roasts import (
     get_check_name,
     get_error_roast,
     get_grade_roast,
-    get_roast,
     get_suggestion,
+    render_roast,
 )
+from .timing import Timings, now
 
 # 設定日誌
 logging.basicConfig(
@@ -25,9 +45,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 簡易速率限制器（記憶體版，執行緒安全）
-RATE_LIMIT_STORE: dict[str, list[float]] = defaultdict(list)
-RATE_LIMIT_LOCK = threading.Lock()
+# 速率限制（設定 SEO_RATE_LIMIT_DB 時以 SQLite 讓所有 worker 共用）
+RATE_LIMITER = create_backend()
+
+# 分析結果快取（只快取結構化結果，吐槽文案每次回應重新產生；
+# 設定 SEO_CACHE_DB 時以 SQLite 讓所有 worker 共用）
+RESULT_CACHE = ResultCache(ttl=300, store=create_store(max_entries=1024))
+RESULT_CACHE.on_lookup = cache_observer("result")
+RESOLVER.on_lookup = cache_observer("dns")
+STATUS_CACHE.on_lookup = cache_observer("reachability")
+
+# 解析行程池（設定 SEO_PARSE_PROCESSES 時啟用，解析與檢測在子 process 執行）
+PARSE_POOL = create_pool()
+
+# 每次分析都會計時（監控指標需要）；SEO_TIMINGS=1 時每次都輸出 Server-Timing 標頭與日誌，
+# 否則只有請求帶 "timings": true 時才輸出，並在回應中加上 timings
+TIMINGS_ENABLED = os.environ.get("SEO_TIMINGS") == "1"
 
 
 def rate_limit(max_requests: int = 10, window: int = 60):
@@ -45,26 +78,17 @@ def rate_limit(max_requests: int = 10, window: int = 60):
             ip = request.headers.get('X-Forwarded-For', request.remote_addr)
             if ip:
                 ip = ip.split(',')[0].strip()  # 取第一個 IP
-
-            now = time()
-
-            # 使用鎖確保執行緒安全
-            with RATE_LIMIT_LOCK:
-                # 過濾掉過期的時間戳（defaultdict 自動初始化空列表）
-                RATE_LIMIT_STORE[ip] = [
-                    t for t in RATE_LIMIT_STORE[ip] if now - t < window
-                ]
-
-                # 檢查是否超過限制
-                if len(RATE_LIMIT_STORE[ip]) >= max_requests:
-                    logger.warning(f"Rate limit exceeded for IP: {ip}")
-                    return jsonify({
-                        "error": True,
-                        "message": "請求太頻繁了，休息一下吧！",
-                        "roast": "你是機器人嗎？連喘口氣都不會？",
-                    }), 429
-
-                RATE_LIMIT_STORE[ip].append(now)
+            # 各端點分開計算
+            ip = f"{f.__name__}:{ip}"
+
+            if not RATE_LIMITER.hit(ip, max_requests, window):
+                logger.warning(f"Rate limit exceeded for IP: {ip}")
+                RATE_LIMITED.inc(f.__name__)
+                return jsonify({
+                    "error": True,
+                    "message": "請求太頻繁了，休息一下吧！",
+                    "roast": "你是機器人嗎？連喘口氣都不會？",
+                }), 429
 
             return f(*args, **kwargs)
         return wrapped
@@ -104,67 +128,238 @@ def analyze():
             "message": "請輸入網址，不要讓我猜。",
         }), 400
 
-    # 執行分析（timeout 8 秒較合理）
-    analyzer = SEOAnalyzer(timeout=8)
-    result = analyzer.analyze(url)
+    try:
+        checks = _parse_checks(data.get("checks"))
+    except ValueError as e:
+        return jsonify({"error": True, "message": str(e)}), 400
+
+    include_timings = data.get("timings") is True
+    deep = _parse_bool(data.get("deep"))
+    timings = Timings()
+
+    # 抓取在共用的背景 event loop 上進行，等待網路時不佔用 CPU
+    result = run_sync(_analyze_observed(url, checks, timings, deep))
+    if not (include_timings or TIMINGS_ENABLED):
+        return jsonify(build_report(result))
+
+    started = now()
+    report = build_report(result)
+    timings.add("report", started)
+
+    spans = timings.as_dict()
+    if include_timings:
+        report["timings"] = spans
+    # 各階段直接寫在訊息裡（basicConfig 的格式不會輸出 extra 欄位）
+    server_timing = timings.server_timing(spans)
+    outcome = result.error or "ok"
+    logger.info(f"Analyzed {url} in {spans['total']}ms ({outcome}): {server_timing}")
+    response = jsonify(report)
+    response.headers["Server-Timing"] = server_timing
+    return response
+
+
+@app.route("/analyze/batch", methods=["POST"])
+@rate_limit(max_requests=2, window=60)  # 每分鐘最多 2 次批次
+def analyze_batch_route():
+    """
+    批次分析 SEO
 
-    # 處理錯誤
-    if "error" in result:
+    接受 JSON {"urls": [...], "concurrency": 8, "per_host": 2, "checks": [...], "deep": false}，或 multipart
+    上傳的網址清單檔（欄位 file，一行一個網址；checks 以逗號分隔）。結果以 NDJSON 串流回傳，每完成一筆就送出一行，
+    最後一行為彙總 {"summary": {...}}。
+    """
+    if "file" in request.files:
+        urls = parse_url_list(request.files["file"].read().decode("utf-8", errors="replace"))
+        options = request.form
+    else:
+        data = request.get_json(silent=True) or {}
+        raw_urls = data.get("urls") or []
+        if not isinstance(raw_urls, list):
+            raw_urls = []
+        urls = parse_url_list("\n".join(str(u) for u in raw_urls))
+        options = data
+
+    if not urls:
         return jsonify({
             "error": True,
-            "type": result["error"],
-            "message": result["message"],
-            "roast": get_error_roast(result["error"]),
-        })
+            "message": "請提供網址清單，不要讓我猜。",
+        }), 400
 
-    # 生成吐槽報告
-    roast_report = {
-        "url": result["url"],
-        "score": result["score"],
-        "grade": result["grade"],
-        "grade_roast": get_grade_roast(result["grade"]),
-        "issues": [],
-        "passed": [],
-        "total_checks": len(result["checks"]),
-        "passed_count": len(result["passed"]),
-        "issue_count": len(result["issues"]),
-    }
+    if len(urls) > MAX_BATCH_URLS or any(len(u) > MAX_URL_LENGTH for u in urls):
+        return jsonify({
+            "error": True,
+            "message": f"一次最多 {MAX_BATCH_URLS} 個網址，每個網址最長 {MAX_URL_LENGTH} 字元。",
+        }), 400
 
-    # 處理問題項目
-    for issue in result["issues"]:
-        check_key = issue["key"]
-        check_data = result["checks"][check_key]
-        message = check_data.get("message")
+    try:
+        checks = _parse_checks(options.get("checks"))
+    except ValueError as e:
+        return jsonify({"error": True, "message": str(e)}), 400
+
+    concurrency = _bounded_int(options.get("concurrency"), DEFAULT_CONCURRENCY, MAX_CONCURRENCY)
+    per_host = _bounded_int(options.get("per_host"), DEFAULT_PER_HOST, MAX_PER_HOST)
+    deep = _parse_bool(options.get("deep"))
+
+    def generate():
+        results = analyze_batch(
+            urls,
+            lambda url: _analyze_observed(url, checks, deep=deep),
+            concurrency=concurrency,
+            per_host=per_host,
+        )
+        for item in iter_sync(results):
+            if "result" in item:
+                item = {
+                    "index": item["index"],
+                    "url": item["url"],
+                    "elapsed_ms": item["elapsed_ms"],
+                    "report": build_report(item["result"]),
+                }
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+def _bounded_int(value, default: int, maximum: int) -> int:
+    """解析正整數參數，超出範圍時夾在 1 ~ maximum"""
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_bool(value) -> bool:
+    """解析開關參數（JSON 的 true，或表單的 "1" / "true"）"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true")
+    return value is True
+
+
+def _parse_checks(value) -> Optional[list[str]]:
+    """
+    解析要執行的檢測項目（JSON 陣列或逗號分隔字串），未指定回傳 None
 
-        # 準備吐槽參數
-        roast_params = {
-            "length": check_data.get("length"),
-            "count": check_data.get("count"),
-            "value": check_data.get("value"),
+    Raises:
+        ValueError: 格式錯誤或有未知的檢測項目
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = [key.strip() for key in value.split(",") if key.strip()]
+    if not isinstance(value, list) or not value or not all(isinstance(key, str) for key in value):
+        raise ValueError("checks 必須是檢測項目名稱的清單")
+
+    select_checks(SEOAnalyzer.CHECKS, value)
+    return value
+
+
+async def _analyze_observed(
+    url: str,
+    checks: Optional[list[str]] = None,
+    timings: Optional[Timings] = None,
+    deep: bool = False,
+) -> AnalysisResult:
+    """分析網址並記錄監控指標（結果、耗時、下載量、進行中的數量）"""
+    timings = timings or Timings()
+    IN_FLIGHT.inc()
+    try:
+        result = await _analyze_cached(url, checks, timings, deep)
+    finally:
+        IN_FLIGHT.dec()
+    observe_analysis(result, timings)
+    return result
+
+
+async def _analyze_cached(
+    url: str,
+    checks: Optional[list[str]] = None,
+    timings: Optional[Timings] = None,
+    deep: bool = False,
+) -> AnalysisResult:
+    """
+    透過結果快取分析網址（timeout 8 秒較合理，含重定向的總時限 15 秒）
+
+    只要部分檢測時：快取有完整結果就從中取出，否則只執行選取的檢測（不寫入快取）。
+    深度模式的結果含即時探測的可達性，不讀寫結果快取（探測結果另有 STATUS_CACHE）。
+    快取命中時 timings 不會有抓取與檢測的階段。
+    """
+    analyzer = SEOAnalyzer(timeout=8, total_timeout=15, timings=timings, pool=PARSE_POOL, deep=deep)
+    if deep:
+        return await analyzer.analyze_async(url, checks=checks)
+    if checks is not None:
+        cached = RESULT_CACHE.get(url)
+        if cached is not None:
+            return analyzer.select_results(cached, checks)
+        return await analyzer.analyze_async(url, checks=checks)
+
+    # 快取過期時帶上舊結果，伺服器回 304 就沿用先前的檢測
+    return await RESULT_CACHE.get_or_analyze_async(
+        url, lambda previous: analyzer.analyze_async(url, previous=previous)
+    )
+
+
+def build_report(result: AnalysisResult, rng: Optional[random.Random] = None) -> dict:
+    """
+    將分析結果轉成吐槽報告（吐槽文案每次重新產生）
+
+    Args:
+        result: SEOAnalyzer.analyze 的結果
+        rng: 挑選吐槽文案的亂數產生器（固定種子可得到相同的報告）
+    """
+    # 處理錯誤
+    if result.error is not None:
+        return {
+            "error": True,
+            "type": result.error,
+            "message": result.message,
+            "roast": get_error_roast(result.error, rng),
         }
-        # 移除 None 值
-        roast_params = {k: v for k, v in roast_params.items() if v is not None}
 
-        roast_report["issues"].append({
+    checks = result.checks
+    issues = []
+    passed = []
+
+    # 依檢測順序分成問題與通過項目；模板直接從檢測結果取 length / count / value
+    for check_key, check_data in checks.items():
+        if check_data.passed:
+            passed.append({
+                "key": check_key,
+                "name": get_check_name(check_key),
+                "value": check_data.get("value"),
+            })
+            continue
+
+        message = check_data.get("message")
+        issues.append({
             "key": check_key,
             "name": get_check_name(check_key),
             "message": message,
             "value": check_data.get("value"),
-            "roast": get_roast(check_key, message, **roast_params),
+            "roast": render_roast(check_key, message, check_data, rng),
             "suggestion": get_suggestion(check_key, message),
-            "weight": issue["weight"],
+            "weight": result.weights.get(check_key, 0),
         })
 
-    # 處理通過項目
-    for check_key in result["passed"]:
-        check_data = result["checks"][check_key]
-        roast_report["passed"].append({
-            "key": check_key,
-            "name": get_check_name(check_key),
-            "value": check_data.get("value"),
-        })
+    # 生成吐槽報告
+    return {
+        "url": result.url,
+        "score": result.score,
+        "grade": result.grade,
+        "grade_roast": get_grade_roast(result.grade, rng),
+        "issues": issues,
+        "passed": passed,
+        "total_checks": len(checks),
+        "passed_count": len(passed),
+        "issue_count": len(issues),
+        "truncated": result.truncated or False,
+        "encoding": result.encoding or None,
+    }
+
 
-    return jsonify(roast_report)
+@app.route("/metrics")
+def metrics():
+    """Prometheus 監控指標"""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.route("/health")
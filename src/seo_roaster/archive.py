@@ -0,0 +1,398 @@
+"""
+爬取封存檔讀取 - 以串流方式從 WARC / HAR 取出回應紀錄
+
+已經爬過的頁面不必重新抓取：WARC（可為逐筆 gzip 壓縮的 .warc.gz）與 HAR 都
+逐筆讀取，不會把整個檔案載入記憶體；非 HTML 的回應不讀取內容，HTML 內容超過
+大小上限的部分直接略過。
+"""
+
+import base64
+import gzip
+import io
+import json
+import re
+import zlib
+from typing import BinaryIO, Iterator, Optional
+
+from requests.structures import CaseInsensitiveDict
+
+WARC_EXTENSIONS = (".warc", ".warc.gz")
+HAR_EXTENSIONS = (".har", ".har.gz")
+ARCHIVE_EXTENSIONS = WARC_EXTENSIONS + HAR_EXTENSIONS
+
+READ_SIZE = 64 * 1024
+# WARC / HTTP 標頭單行的長度上限
+MAX_HEADER_LINE = 64 * 1024
+# 尋找 HAR 的 "entries": [ 時，保留上一段結尾的字元數（標記可能被切在兩次讀取之間）
+MARKER_OVERLAP = 256
+# HAR 單一元素（字元數）的上限，超過的元素不解碼、直接略過；實際上限至少為
+# 單頁上限的兩倍（base64 為原始內容的 4/3 倍，另有標頭與 JSON 跳脫）
+MAX_ENTRY_SIZE = 16 * 1024 * 1024
+
+# JSON 解碼錯誤發生在被切斷的 token 上（數字、true / false / null、\u 跳脫），
+# token 一直延伸到緩衝區結尾，表示元素還沒讀完而不是格式錯誤
+_TOKEN_TAIL = re.compile(r"[\w.+\-\\]*")
+# 略過元素時要注意的字元：字串外為引號與括號，字串內為引號與反斜線
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class ArchiveError(ValueError):
+    """封存檔格式錯誤"""
+
+
+class ArchiveRecord:
+    """
+    封存檔中的一筆 HTTP 回應
+
+    body 只有 HTML 回應才會讀取（其他回應、沒有保存內容或壓縮格式不支援時為 None），
+    已解開 chunked 與 gzip / deflate 壓縮。content_type 為回應的 Content-Type，編碼
+    由使用端偵測；encoding 只在內容已知編碼時設定（HAR 保存的是已解碼的文字，
+    讀取後以 UTF-8 重新編碼）。
+    """
+
+    __slots__ = ("url", "status_code", "content_type", "body", "encoding", "truncated")
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        content_type: str,
+        body: Optional[bytes] = None,
+        encoding: Optional[str] = None,
+        truncated: bool = False,
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.content_type = content_type
+        self.body = body
+        self.encoding = encoding
+        self.truncated = truncated
+
+    @property
+    def is_html(self) -> bool:
+        # 沒有 Content-Type 時當作 HTML（與即時抓取一樣直接分析）
+        return not self.content_type or "html" in self.content_type.lower()
+
+    def __repr__(self) -> str:
+        return f"ArchiveRecord(url={self.url!r}, status_code={self.status_code!r})"
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _open(path: str) -> BinaryIO:
+    """開啟檔案，gzip 壓縮（不論副檔名）時透明解壓"""
+    f = open(path, "rb")
+    if f.peek(2)[:2] == b"\x1f\x8b":
+        # 逐筆壓縮的 .warc.gz 是多個 gzip member 串接，GzipFile 會依序讀完
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    return f
+
+
+class _Block:
+    """只能讀取固定長度的區塊（WARC 紀錄內容），讀不完的部分由 skip() 略過"""
+
+    __slots__ = ("f", "remaining")
+
+    def __init__(self, f: BinaryIO, length: int):
+        self.f = f
+        self.remaining = length
+
+    def readline(self) -> bytes:
+        line = self.f.readline(min(self.remaining, MAX_HEADER_LINE))
+        self.remaining -= len(line)
+        return line
+
+    def read(self, size: int) -> bytes:
+        data = self.f.read(min(self.remaining, size))
+        self.remaining -= len(data)
+        return data
+
+    def skip(self) -> None:
+        while self.remaining > 0:
+            data = self.f.read(min(self.remaining, READ_SIZE))
+            if not data:
+                raise ArchiveError("WARC 紀錄內容不完整")
+            self.remaining -= len(data)
+
+
+def _read_headers(readline) -> CaseInsensitiveDict:
+    headers = CaseInsensitiveDict()
+    while True:
+        line = readline()
+        if not line.strip():
+            return headers
+        name, sep, value = line.decode("latin-1").partition(":")
+        if sep:
+            headers[name.strip()] = value.strip()
+
+
+def _dechunk(data: bytes) -> bytes:
+    """解開 chunked 傳輸編碼（容許被截斷的內容）"""
+    parts = []
+    pos = 0
+    while pos < len(data):
+        end = data.find(b"\r\n", pos)
+        if end < 0:
+            break
+        try:
+            size = int(data[pos:end].split(b";", 1)[0], 16)
+        except ValueError:
+            # 實際上沒有 chunked 編碼（有些工具存檔時已解開但保留了標頭）
+            return data if not parts else b"".join(parts)
+        if size == 0:
+            break
+        start = end + 2
+        parts.append(data[start:start + size])
+        pos = start + size + 2
+    return b"".join(parts)
+
+
+def _decompress(data: bytes, coding: str, max_bytes: int) -> Optional[tuple[bytes, bool]]:
+    """
+    解開 Content-Encoding（最多 max_bytes）
+
+    Returns:
+        tuple: (內容, 是否超過上限而截斷)；不支援的編碼回傳 None
+    """
+    coding = coding.strip().lower()
+    if coding in ("", "identity"):
+        return data[:max_bytes], len(data) > max_bytes
+    if coding in ("gzip", "x-gzip"):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif coding == "deflate":
+        # 大多數伺服器送的是 zlib 格式，少數是原始 deflate
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS if data[:1] == b"\x78" else -zlib.MAX_WBITS)
+    else:
+        return None
+    try:
+        body = decompressor.decompress(data, max_bytes)
+    except zlib.error:
+        return None
+    return body, bool(decompressor.unconsumed_tail)
+
+
+def _parse_http(block: _Block, url: str, max_bytes: int, html_only: bool) -> Optional[ArchiveRecord]:
+    """解析 WARC response 紀錄中的 HTTP 回應"""
+    status_line = block.readline().decode("latin-1").split(None, 2)
+    if len(status_line) < 2 or not status_line[0].startswith("HTTP/"):
+        return None
+    try:
+        status_code = int(status_line[1])
+    except ValueError:
+        return None
+    headers = _read_headers(block.readline)
+
+    record = ArchiveRecord(url, status_code, headers.get("Content-Type", ""))
+    if html_only and not record.is_html:
+        return record
+
+    raw = block.read(max_bytes)
+    record.truncated = block.remaining > 0
+    if "chunked" in headers.get("Transfer-Encoding", "").lower():
+        raw = _dechunk(raw)
+    decoded = _decompress(raw, headers.get("Content-Encoding", ""), max_bytes)
+    if decoded is None:
+        # 不支援或損壞的壓縮內容：body 維持 None，無法分析
+        return record
+    record.body, truncated = decoded
+    record.truncated = record.truncated or truncated
+    return record
+
+
+def iter_warc(path: str, max_bytes: int, html_only: bool = True) -> Iterator[ArchiveRecord]:
+    """
+    逐筆讀取 WARC 的 response 紀錄（request、metadata、revisit 等紀錄略過）
+
+    Args:
+        path: .warc 或 .warc.gz 檔案
+        max_bytes: HTML 內容的大小上限
+        html_only: 只讀取 HTML 回應的內容
+
+    Raises:
+        ArchiveError: 檔案不是 WARC 或紀錄不完整
+    """
+    with _open(path) as f:
+        while True:
+            line = f.readline(MAX_HEADER_LINE)
+            if not line:
+                return
+            if not line.strip():
+                # 紀錄之間的空行
+                continue
+            if not line.startswith(b"WARC/"):
+                raise ArchiveError(f"不是 WARC 紀錄：{line[:40]!r}")
+
+            headers = _read_headers(lambda: f.readline(MAX_HEADER_LINE))
+            try:
+                block = _Block(f, int(headers.get("Content-Length", "")))
+            except ValueError:
+                raise ArchiveError("WARC 紀錄缺少 Content-Length") from None
+
+            record = None
+            if (
+                headers.get("WARC-Type", "").lower() == "response"
+                and headers.get("Content-Type", "").lower().startswith("application/http")
+            ):
+                record = _parse_http(block, headers.get("WARC-Target-URI", "").strip("<>"), max_bytes, html_only)
+            block.skip()
+            if record is not None:
+                yield record
+
+
+def _incomplete(error: json.JSONDecodeError, buffer: str) -> bool:
+    """解碼錯誤是因為元素還沒讀完（而不是格式錯誤）"""
+    return error.msg.startswith("Unterminated string") or _TOKEN_TAIL.fullmatch(buffer, error.pos) is not None
+
+
+def _iter_json_array(f, key: str, max_size: int = MAX_ENTRY_SIZE) -> Iterator[dict]:
+    """
+    逐一解碼 JSON 文件中第一個 "key": [...] 陣列的元素
+
+    不載入整個文件：緩衝區只保留目前元素，元素不完整時再讀取更多內容。
+    超過 max_size 個字元的元素以掃描方式略過，記憶體只保留一段讀取的量。
+
+    Raises:
+        ArchiveError: 找不到陣列、陣列不完整，或元素格式錯誤
+    """
+    decoder = json.JSONDecoder()
+    # 只有物件的 key 後面會接冒號，字串值裡的引號則會被跳脫，不會誤判
+    marker = re.compile(rf'"{re.escape(key)}"\s*:\s*\[')
+    buffer = ""
+    match = None
+    while match is None:
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            raise ArchiveError(f"HAR 缺少 {key}")
+        # 保留可能被切斷的標記
+        buffer = buffer[-MARKER_OVERLAP:] + chunk
+        match = marker.search(buffer)
+    buffer = buffer[match.end():]
+    pos = 0
+
+    def fill(size: int = READ_SIZE) -> bool:
+        nonlocal buffer, pos
+        chunk = f.read(size)
+        if not chunk:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip() -> None:
+        """略過目前的元素（從 pos 開始），已掃描的部分隨即丟棄"""
+        nonlocal pos
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is not None and match.group() == '"':
+                    in_string = False
+                    pos = match.end()
+                    if depth == 0:
+                        return
+                    continue
+                if match is not None and match.end() < len(buffer):
+                    # 跳脫字元連同下一個字元一起略過
+                    pos = match.end() + 1
+                    continue
+                # 反斜線在緩衝區結尾時保留，讀入下一段再判斷
+                pos = len(buffer) if match is None else match.start()
+            else:
+                match = _STRUCTURAL.search(buffer, pos)
+                if match is not None:
+                    pos = match.end()
+                    if match.group() == '"':
+                        in_string = True
+                    elif match.group() in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth <= 0:
+                            return
+                    continue
+                pos = len(buffer)
+            if not fill():
+                raise ArchiveError(f"HAR 的 {key} 不完整")
+
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ","):
+            pos += 1
+        if pos == len(buffer):
+            if not fill():
+                raise ArchiveError(f"HAR 的 {key} 不完整")
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if not _incomplete(e, buffer):
+                raise ArchiveError(f"HAR 的 {key} 格式錯誤：{e.msg}") from None
+            if len(buffer) - pos > max_size:
+                skip()
+                continue
+            # 元素還沒讀完；每次至少讀入目前已緩衝的量，大元素也只需重試幾次
+            if not fill(max(READ_SIZE, len(buffer) - pos)):
+                raise ArchiveError(f"HAR 的 {key} 不完整") from None
+            continue
+        pos = end
+        yield item
+
+
+def _har_record(entry: dict, max_bytes: int, html_only: bool) -> Optional[ArchiveRecord]:
+    request = entry.get("request") or {}
+    response = entry.get("response") or {}
+    url = request.get("url")
+    status_code = response.get("status")
+    if not url or not isinstance(status_code, int) or status_code <= 0:
+        # status 0 表示請求沒有完成（例如被封鎖）
+        return None
+
+    content = response.get("content") or {}
+    record = ArchiveRecord(url, status_code, content.get("mimeType", ""))
+    if html_only and not record.is_html:
+        return record
+
+    text = content.get("text")
+    if text is None:
+        return record
+    if content.get("encoding") == "base64":
+        try:
+            body = base64.b64decode(text)
+        except ValueError:
+            return record
+        # 原始內容：編碼依回應標頭（mimeType 常省略 charset）偵測
+        headers = CaseInsensitiveDict({h.get("name", ""): h.get("value", "") for h in response.get("headers", ())})
+        record.content_type = headers.get("Content-Type") or record.content_type
+    else:
+        # HAR 的文字內容已由瀏覽器解碼
+        body = text.encode("utf-8")
+        record.encoding = "utf-8"
+    record.body = body[:max_bytes]
+    record.truncated = len(body) > max_bytes
+    return record
+
+
+def iter_har(path: str, max_bytes: int, html_only: bool = True) -> Iterator[ArchiveRecord]:
+    """
+    逐筆讀取 HAR 的 log.entries（未完成的請求略過）
+
+    Raises:
+        ArchiveError: 檔案不是 HAR
+    """
+    with io.TextIOWrapper(_open(path), encoding="utf-8-sig") as f:
+        for entry in _iter_json_array(f, "entries", max(MAX_ENTRY_SIZE, 2 * max_bytes)):
+            record = _har_record(entry, max_bytes, html_only)
+            if record is not None:
+                yield record
+
+
+def iter_records(path: str, max_bytes: int, html_only: bool = True) -> Iterator[ArchiveRecord]:
+    """依副檔名讀取 WARC 或 HAR"""
+    if path.lower().endswith(HAR_EXTENSIONS):
+        return iter_har(path, max_bytes, html_only)
+    return iter_warc(path, max_bytes, html_only)
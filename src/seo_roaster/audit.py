@@ -0,0 +1,479 @@
+"""
+離線稽核 - 直接檢測本機的 HTML 檔案（例如靜態網站的建置輸出）或爬取封存檔
+
+不經過網路：檔案以整批讀取（大檔案用 mmap）後交給多個子 process 偵測編碼、解析與檢測，
+每頁輸出一行 JSONL 或 CSV，最後彙總整站分數。檔案路徑依 --base-url 對應成
+正式網址（about/index.html → https://example.com/about/），https 等依網址判斷的
+檢測才有意義。WARC / HAR 封存檔則逐筆串流讀取，網址與狀態碼取自封存的回應。
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from urllib.parse import quote, urljoin
+
+from .analyzer import SEOAnalyzer
+from .archive import ArchiveError, is_archive, iter_records
+from .checks import select_checks
+from .charset import SOURCE_ARCHIVE
+from .net import FetchResult
+from .results import UNSET, AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+HTML_EXTENSIONS = (".html", ".htm")
+INDEX_FILES = ("index.html", "index.htm")
+# 超過這個大小的檔案用 mmap 讀取，直接從對應的記憶體解碼
+MMAP_THRESHOLD = 1024 * 1024
+# 每次交給子 process 的頁數（小檔案很多時減少行程間往返）
+CHUNK_SIZE = 64
+# 每批封存檔內容的位元組上限（封存檔的內容要經由 pipe 傳給子 process）
+CHUNK_BYTES = 4 * 1024 * 1024
+CSV_FIELDS = ("path", "url", "score", "grade", "issues", "truncated", "error")
+
+
+def _glob_root(pattern: str) -> Path:
+    """glob 樣式中不含萬用字元的開頭目錄（dist/**/*.html → dist）"""
+    parts = []
+    for part in Path(pattern).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path(".")
+
+
+def _walk(directory: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(HTML_EXTENSIONS):
+                yield Path(dirpath, name)
+
+
+def collect_files(inputs: Iterable[str], root: Optional[str] = None) -> list[tuple[Path, Path]]:
+    """
+    展開輸入的檔案、目錄（遞迴找 .html / .htm）與 glob 樣式
+
+    Args:
+        inputs: 檔案、目錄或 glob 樣式
+        root: 對應網址的根目錄；省略時目錄輸入以該目錄為根、glob 以開頭目錄為根、
+            單一檔案以所在目錄為根
+
+    Returns:
+        list: (檔案路徑, 根目錄)，同一個檔案只出現一次
+
+    Raises:
+        FileNotFoundError: 輸入不存在或 glob 沒有對應的檔案
+    """
+    fixed_root = Path(root) if root else None
+    seen = set()
+    files = []
+
+    def add(path: Path, base: Path) -> None:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            files.append((path, fixed_root or base))
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for file in _walk(path):
+                add(file, path)
+        elif path.is_file():
+            add(path, path.parent)
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                raise FileNotFoundError(f"沒有符合的檔案：{item}")
+            base = _glob_root(item)
+            for match in matches:
+                match = Path(match)
+                if match.is_dir():
+                    for file in _walk(match):
+                        add(file, base)
+                elif match.is_file():
+                    add(match, base)
+        else:
+            raise FileNotFoundError(f"找不到檔案或目錄：{item}")
+    return files
+
+
+def path_to_url(path: Path, root: Path, base_url: str) -> str:
+    """
+    檔案路徑對應成網址
+
+    Example:
+        path_to_url(Path("dist/blog/post.html"), Path("dist"), "https://example.com")
+        → "https://example.com/blog/post.html"
+    """
+    try:
+        relative = path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        # 不在根目錄底下（例如明確指定了別的 --root），只用檔名
+        relative = path.name
+    name = relative.rsplit("/", 1)[-1]
+    if name.lower() in INDEX_FILES:
+        relative = relative[:-len(name)]
+    return urljoin(base_url.rstrip("/") + "/", quote(relative))
+
+
+def read_page(path: Path, url: str, analyzer: SEOAnalyzer) -> FetchResult:
+    """
+    讀取 HTML 檔案（編碼依 BOM、<meta> 宣告或內容開頭偵測）
+
+    一次讀入整個檔案；大檔案以 mmap 對應後直接解碼，不另外複製一份 bytes。
+    超過 analyzer.max_bytes 的部分不讀取（truncated 為 True）。
+    """
+    fetched = FetchResult(url, 200, {})
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        fetched.truncated = size > analyzer.max_bytes
+        length = min(size, analyzer.max_bytes)
+        if length < MMAP_THRESHOLD:
+            analyzer._store_body(fetched, os.read(fd, length))
+        else:
+            with mmap.mmap(fd, length, access=mmap.ACCESS_READ) as data:
+                analyzer._store_body(fetched, data, decode=True)
+    finally:
+        os.close(fd)
+    return fetched
+
+
+# 子 process 內的 analyzer 與選取的檢測（由 _init_worker 建立，每個子 process 一份）
+_analyzer: Optional[SEOAnalyzer] = None
+_selected: tuple = ()
+
+
+def _init_worker(parser: str, check_keys: Optional[list[str]], max_bytes: Optional[int]) -> None:
+    global _analyzer, _selected
+    _analyzer = SEOAnalyzer(parser=parser, max_bytes=max_bytes)
+    _selected = select_checks(_analyzer.CHECKS, check_keys)
+
+
+def _analyze_page(fetched: FetchResult) -> AnalysisResult:
+    result = _analyzer._analyze_fetched(fetched, _selected)
+    # 沒有經過 HTTP，不輸出抓取方式與快取驗證資訊
+    result.fetch = UNSET
+    result.validators = UNSET
+    return result
+
+
+def _audit_task(task: tuple) -> tuple[str, str, AnalysisResult]:
+    """
+    檢測單一頁面（在子 process 執行）
+
+    task 為 ("file", 路徑, 網址)、
+    ("record", 封存檔, 網址, 狀態碼, 內容, Content-Type, 已知的編碼, 是否截斷)
+    或 ("error", 來源, 網址, 錯誤類型, 訊息)。
+    """
+    kind, source, url = task[:3]
+    if kind == "file":
+        try:
+            fetched = read_page(Path(source), url, _analyzer)
+        except OSError as e:
+            return source, url, AnalysisResult.from_error("read_error", f"無法讀取檔案：{e.strerror or e}")
+        return source, url, _analyze_page(fetched)
+    if kind == "record":
+        status_code, body, content_type, encoding, truncated = task[3:]
+        fetched = FetchResult(url, status_code, {"Content-Type": content_type})
+        fetched.truncated = truncated
+        if encoding:
+            fetched.body = body
+            fetched.encoding = encoding
+            fetched.encoding_source = SOURCE_ARCHIVE
+        else:
+            _analyzer._store_body(fetched, body)
+        return source, url, _analyze_page(fetched)
+    return source, url, AnalysisResult.from_error(*task[3:])
+
+
+def _audit_chunk(tasks: list[tuple]) -> list[tuple[str, str, AnalysisResult]]:
+    return [_audit_task(task) for task in tasks]
+
+
+class AuditSummary:
+    """
+    彙總整站結果（與爬蟲的 summary 相同：整站分數 = Σ 各項權重 × 該項通過率）
+    """
+
+    def __init__(self, checks: tuple, rescale: bool = False):
+        self.weights = {check.key: check.weight for check in checks}
+        self.rescale = rescale
+        self.pages = 0
+        self.passed_counts: dict[str, int] = defaultdict(int)
+        self.grades: Counter = Counter()
+        self.errors: Counter = Counter()
+        # 封存檔中沒有分析的回應（重定向、非 HTML、沒有內容）
+        self.skipped: Counter = Counter()
+        self.truncated = 0
+        # (分數, 網址)，只保留最差的幾頁
+        self.worst: list[tuple[int, str]] = []
+        self.started = time.perf_counter()
+
+    def add(self, result: AnalysisResult, worst_limit: int = 10) -> None:
+        if result.error is not None:
+            self.errors[result.error] += 1
+            return
+        self.pages += 1
+        self.grades[result.grade] += 1
+        if result.truncated:
+            self.truncated += 1
+        for key, check in result.checks.items():
+            if check.passed:
+                self.passed_counts[key] += 1
+        self.worst.append((result.score, result.url))
+        if len(self.worst) > worst_limit * 4:
+            self.worst = sorted(self.worst)[:worst_limit]
+
+    def as_dict(self, grade, worst_limit: int = 10) -> dict:
+        pages = self.pages
+        pass_rates = {key: (self.passed_counts[key] / pages if pages else 0.0) for key in self.weights}
+        score = sum(self.weights[key] * rate for key, rate in pass_rates.items())
+        total_weight = sum(self.weights.values())
+        if self.rescale and total_weight:
+            # 只執行部分檢測時與單頁分數一樣換算成 100 分制
+            score = score * 100 / total_weight
+        score = round(score)
+        elapsed = time.perf_counter() - self.started
+        total = pages + sum(self.errors.values())
+        return {
+            "pages": pages,
+            "score": score,
+            "grade": grade(score),
+            "grades": dict(sorted(self.grades.items())),
+            "pass_rates": {key: round(rate, 4) for key, rate in pass_rates.items()},
+            "worst_pages": [{"url": url, "score": page_score} for page_score, url in sorted(self.worst)[:worst_limit]],
+            "errors": dict(self.errors),
+            "skipped": dict(self.skipped),
+            "truncated": self.truncated,
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(total / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def _write_jsonl(output, source: str, url: str, result: AnalysisResult) -> None:
+    # 結果已是 JSON 物件，在開頭補上 path 欄位，省去再轉一次 dict
+    prefix = '{"path":' + json.dumps(source, ensure_ascii=False)
+    if result.error is not None:
+        # 錯誤結果沒有網址，另外補上
+        prefix += ',"url":' + json.dumps(url, ensure_ascii=False)
+    output.write(prefix + "," + result.to_json()[1:] + "\n")
+
+
+def _csv_row(source: str, url: str, result: AnalysisResult) -> tuple:
+    if result.error is not None:
+        return source, url, "", "", "", "", result.error
+    issues = ";".join(key for key, check in result.checks.items() if not check.passed)
+    return source, result.url, result.score, result.grade, issues, int(bool(result.truncated)), ""
+
+
+def _archive_tasks(path: str, max_bytes: int, summary: AuditSummary) -> Iterator[tuple]:
+    """封存檔中的 HTML 回應（重定向、非 HTML 與沒有內容的回應只計入 summary.skipped）"""
+    try:
+        for record in iter_records(path, max_bytes):
+            status_code = record.status_code
+            if 300 <= status_code < 400 or status_code == 304:
+                summary.skipped["redirect"] += 1
+            elif not record.is_html:
+                summary.skipped["not_html"] += 1
+            elif status_code >= 400:
+                # 與即時分析相同：錯誤狀態碼不檢測
+                yield "error", path, record.url, "http_error", f"HTTP 錯誤：{status_code}"
+            elif record.body is None:
+                summary.skipped["no_body"] += 1
+            else:
+                yield (
+                    "record",
+                    path,
+                    record.url,
+                    status_code,
+                    record.body,
+                    record.content_type,
+                    record.encoding,
+                    record.truncated,
+                )
+    except (ArchiveError, OSError, EOFError) as e:
+        # 損壞的封存檔只略過剩下的部分，其他輸入照常檢測
+        logger.warning(f"Failed to read archive {path}: {e}")
+        summary.errors["archive_error"] += 1
+
+
+def _tasks(
+    files: list[tuple[Path, Path]],
+    base_url: Optional[str],
+    max_bytes: int,
+    summary: AuditSummary,
+) -> Iterator[tuple]:
+    for path, root in files:
+        if is_archive(str(path)):
+            yield from _archive_tasks(str(path), max_bytes, summary)
+        else:
+            yield "file", str(path), path_to_url(path, root, base_url)
+
+
+def _chunks(tasks: Iterator[tuple]) -> Iterator[list[tuple]]:
+    """把任務分批：每批最多 CHUNK_SIZE 個，封存檔內容合計最多 CHUNK_BYTES"""
+    chunk = []
+    size = 0
+    for task in tasks:
+        chunk.append(task)
+        if task[0] == "record":
+            size += len(task[4])
+        if len(chunk) >= CHUNK_SIZE or size >= CHUNK_BYTES:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+def _dispatch(pool, chunks: Iterator[list[tuple]], window: int) -> Iterator[tuple[str, str, AnalysisResult]]:
+    """
+    依序交給子 process 並依輸入順序產出結果
+
+    最多 window 批同時在途，讀取封存檔的速度超過檢測速度時會在這裡等待，
+    記憶體用量不隨封存檔大小成長（Pool.imap 會先把輸入全部讀完）。
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(_audit_chunk, (chunk,)))
+        if len(pending) >= window:
+            yield from pending.popleft().get()
+    while pending:
+        yield from pending.popleft().get()
+
+
+def audit(
+    files: list[tuple[Path, Path]],
+    base_url: Optional[str],
+    output,
+    fmt: str = "jsonl",
+    processes: Optional[int] = None,
+    parser: str = "lxml",
+    checks: Optional[list[str]] = None,
+    max_bytes: Optional[int] = None,
+) -> dict:
+    """
+    檢測檔案並逐頁寫出結果
+
+    Args:
+        files: collect_files() 的結果（HTML 檔案或 WARC / HAR 封存檔）
+        base_url: 網站的正式網址（根目錄對應的網址）；只有封存檔時可省略
+        output: 文字輸出（逐頁一行 JSONL，或 CSV）
+        fmt: "jsonl" 或 "csv"
+        processes: 子 process 數量，預設為 CPU 核心數；1 表示在目前的 process 執行
+        parser: 解析模式，見 SEOAnalyzer.PARSERS
+        checks: 只執行的檢測 key（None 表示全部）
+        max_bytes: 單頁內容的大小上限（超過的部分不分析）
+
+    Returns:
+        dict: 整站彙總
+    """
+    # 先在目前的 process 驗證參數（不認得的解析模式或檢測 key 直接報錯）
+    analyzer = SEOAnalyzer(parser=parser, max_bytes=max_bytes)
+    selected = select_checks(analyzer.CHECKS, checks)
+    if base_url is None and not all(is_archive(str(path)) for path, _ in files):
+        raise ValueError("檢測 HTML 檔案需要指定 base_url")
+    summary = AuditSummary(selected, rescale=analyzer._partial(selected))
+    writer = csv.writer(output) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(CSV_FIELDS)
+
+    processes = max(1, processes or os.cpu_count() or 1)
+    if not any(is_archive(str(path)) for path, _ in files):
+        processes = min(processes, len(files) // CHUNK_SIZE + 1)
+    chunks = _chunks(_tasks(files, base_url, analyzer.max_bytes, summary))
+    initargs = (parser, checks, max_bytes)
+    if processes == 1:
+        _init_worker(*initargs)
+        pool = None
+        results = (item for chunk in chunks for item in _audit_chunk(chunk))
+    else:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=initargs)
+        # 依輸入順序輸出，方便比較兩次稽核的結果
+        results = _dispatch(pool, chunks, window=processes * 2)
+
+    try:
+        for source, url, result in results:
+            summary.add(result)
+            if writer is not None:
+                writer.writerow(_csv_row(source, url, result))
+            else:
+                _write_jsonl(output, source, url, result)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return summary.as_dict(analyzer._calculate_grade)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """命令列入口：python -m src.seo_roaster.audit dist --base-url https://example.com"""
+    parser = argparse.ArgumentParser(description="離線檢測本機 HTML 檔案（靜態網站建置輸出）或 WARC / HAR 封存檔")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="HTML 檔案、目錄（遞迴）、glob 樣式（例如 'dist/**/*.html'）或 .warc / .warc.gz / .har 封存檔",
+    )
+    parser.add_argument("--base-url", help="網站正式網址，檔案路徑依此對應成網址（只有封存檔時可省略）")
+    parser.add_argument("--root", help="對應網址的根目錄（預設為輸入的目錄）")
+    parser.add_argument("-o", "--output", help="輸出檔案（預設為標準輸出）")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="輸出格式（預設依副檔名，否則為 jsonl）")
+    parser.add_argument("-j", "--processes", type=int, help="子 process 數量（預設為 CPU 核心數）")
+    parser.add_argument("--parser", default="lxml", choices=SEOAnalyzer.PARSERS, help="解析模式")
+    parser.add_argument("--checks", help="只執行的檢測，以逗號分隔（例如 title,meta_description）")
+    parser.add_argument("--max-bytes", type=int, help="單頁內容的大小上限（位元組）")
+    parser.add_argument("--fail-under", type=int, help="整站分數低於此值時結束代碼為 1（CI 用）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s: %(message)s")
+    try:
+        files = collect_files(args.inputs, args.root)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if not files:
+        parser.error("沒有找到任何 HTML 檔案")
+    if not args.base_url and not all(is_archive(str(path)) for path, _ in files):
+        parser.error("檢測 HTML 檔案需要 --base-url")
+
+    fmt = args.format or ("csv" if args.output and args.output.lower().endswith(".csv") else "jsonl")
+    checks = [key.strip() for key in args.checks.split(",") if key.strip()] if args.checks else None
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        summary = audit(
+            files,
+            args.base_url,
+            output,
+            fmt=fmt,
+            processes=args.processes,
+            parser=args.parser,
+            checks=checks,
+            max_bytes=args.max_bytes,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+    if args.fail_under is not None and summary["score"] < args.fail_under:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""批次分析 - 有上限的並行分析，每完成一筆就回傳"""
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import urlsplit
+
+from .cache import normalize_url
+from .results import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_URLS = 500
+MAX_URL_LENGTH = 2048
+DEFAULT_CONCURRENCY = 8
+MAX_CONCURRENCY = 16
+# 同一主機同時最多幾個請求（避免對單一網站造成負擔）
+DEFAULT_PER_HOST = 2
+MAX_PER_HOST = 4
+
+
+def parse_url_list(text: str) -> list[str]:
+    """
+    解析網址清單檔（一行一個網址，忽略空行與 # 開頭的註解）
+
+    Returns:
+        list: 去除重複後的網址（保留原本順序）
+    """
+    urls = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return list(dict.fromkeys(urls))
+
+
+def _host_of(url: str) -> str:
+    try:
+        return urlsplit(normalize_url(url)).hostname or ""
+    except ValueError:
+        # 無法解析的網址共用一個主機名額，仍交給分析器回報 invalid_url
+        return ""
+
+
+async def analyze_batch(
+    urls: list[str],
+    analyze: Callable[[str], Awaitable[AnalysisResult]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    per_host: int = DEFAULT_PER_HOST,
+) -> AsyncIterator[dict]:
+    """
+    並行分析多個網址，依完成順序逐筆產生結果，最後產生彙總
+
+    Args:
+        urls: 要分析的網址
+        analyze: 分析單一網址的 coroutine function（回傳 SEOAnalyzer.analyze 的結果）
+        concurrency: 全體同時進行的分析數
+        per_host: 同一主機同時進行的分析數
+
+    Yields:
+        dict: {"index", "url", "elapsed_ms", "result"}；analyze 拋出例外時為
+            {"index", "url", "elapsed_ms", "error"}（仍計入彙總）。最後一筆為 {"summary": {...}}
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    host_slots: dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(max(1, per_host)))
+
+    async def run(index: int, url: str):
+        t0 = loop.time()
+        try:
+            # 先排主機的隊，再佔全體名額，避免同一主機的請求卡住其他主機
+            async with host_slots[_host_of(url)]:
+                async with slots:
+                    t0 = loop.time()
+                    result = await analyze(url)
+        except Exception as e:
+            # 單筆失敗不能中斷整個串流
+            logger.error(f"Batch item failed for {url}: {e}", exc_info=e)
+            result = e
+        return index, url, result, loop.time() - t0
+
+    tasks = [asyncio.ensure_future(run(i, url)) for i, url in enumerate(urls)]
+    durations = []
+    errors: Counter = Counter()
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, url, result, elapsed = await next_done
+            durations.append(elapsed)
+            if isinstance(result, Exception):
+                error = "invalid_url" if isinstance(result, ValueError) else "unknown"
+                errors[error] += 1
+                yield {
+                    "index": index,
+                    "url": url,
+                    "elapsed_ms": round(elapsed * 1000, 1),
+                    "error": error,
+                }
+                continue
+            if result.error is not None:
+                errors[result.error] += 1
+            yield {
+                "index": index,
+                "url": url,
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "result": result,
+            }
+
+        total = len(durations)
+        yield {
+            "summary": {
+                "total": total,
+                "succeeded": total - sum(errors.values()),
+                "failed": sum(errors.values()),
+                "errors": dict(errors),
+                "elapsed_ms": round((loop.time() - started) * 1000, 1),
+                "avg_ms": round(sum(durations) / total * 1000, 1) if total else 0,
+                "max_ms": round(max(durations) * 1000, 1) if total else 0,
+                "concurrency": concurrency,
+                "per_host": per_host,
+            }
+        }
+    finally:
+        # 用戶端中斷時取消尚未完成的分析
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,480 @@
+"""
+分析結果快取 - 以正規化後的最終網址為 key，TTL 過期
+
+內容存放在可替換的 store：MemoryStore 為單一 process 用（LRU 淘汰），
+SQLiteStore 讓同一台機器上的所有 gunicorn worker 共用同一份快取。
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .results import AnalysisResult
+
+try:
+    # 有安裝 orjson 時用它解碼 SQLite 中的結果
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+CACHE_DB_ENV = "SEO_CACHE_DB"
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    正規化網址作為快取 key
+
+    scheme 與主機名稱轉小寫、移除預設 port 與 fragment，空路徑補成 "/"。
+    沒有 scheme 時比照 SEOAnalyzer 補上 https://。無法解析的網址不會拋出例外，
+    原樣回傳（補上 scheme 後）。
+    """
+    url = url.strip()
+    if not url.lower().startswith(("http://", "https://")):
+        url = "https://" + url
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        # 無法解析的網址（例如 "https://[bad" 或不是數字的 port）：原樣當作 key，
+        # 不與其他網址共用項目，由分析器回報 invalid_url
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        # IPv6 位址
+        host = f"[{host}]"
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # 等待者都已取消時，避免出現 "Task exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class _Entry:
+    __slots__ = ("result", "expires_at", "stale_until", "size")
+
+    def __init__(self, result: AnalysisResult, expires_at: float, stale_until: float, size: int):
+        self.result = result
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+
+
+def _dumps(result: AnalysisResult) -> bytes:
+    return zlib.compress(result.to_json().encode(), 1)
+
+
+def _loads(payload: bytes) -> AnalysisResult:
+    return AnalysisResult.from_dict(_json_loads(zlib.decompress(payload)))
+
+
+class CacheStore:
+    """
+    快取內容的儲存介面（時間一律為 time.time()，跨 process 共用時才有意義）
+
+    key 都是 normalize_url 後的網址；別名（請求網址 → 最終網址）也由 store 保存。
+    """
+
+    def lookup(self, key: str, now: float) -> Optional[_Entry]:
+        """依 key（或其別名）取得項目，超過 stale_until 的視為不存在"""
+        raise NotImplementedError
+
+    def save(self, requested_key: str, final_key: str, result: AnalysisResult, expires_at: float, stale_until: float) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """{"entries", "aliases", "bytes"}"""
+        raise NotImplementedError
+
+
+class MemoryStore(CacheStore):
+    """單一 process 的記憶體 store：超過筆數或記憶體上限時依 LRU 淘汰"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._aliases: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key: str, now: float) -> Optional[_Entry]:
+        with self._lock:
+            key = self._aliases.get(key, key)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.stale_until <= now:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def save(self, requested_key: str, final_key: str, result: AnalysisResult, expires_at: float, stale_until: float) -> None:
+        size = len(result.to_json())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if final_key in self._entries:
+                self._remove(final_key)
+            self._entries[final_key] = _Entry(result, expires_at, stale_until, size)
+            self._bytes += size
+
+            if requested_key != final_key:
+                self._aliases[requested_key] = final_key
+                self._aliases.move_to_end(requested_key)
+                while len(self._aliases) > self.max_entries * 4:
+                    self._aliases.popitem(last=False)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "aliases": len(self._aliases), "bytes": self._bytes}
+
+
+class SQLiteStore(CacheStore):
+    """
+    SQLite store（WAL 模式），同一台機器上的所有 worker 共用快取
+
+    結果以 zlib 壓縮的 JSON（AnalysisResult.to_json）存放。每隔 sweep_every 次寫入清除過期項目，
+    再依到期時間淘汰最舊的項目直到筆數與大小都低於上限（兩次清除之間可能短暫超過）。
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        stale_until REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at);
+    CREATE TABLE IF NOT EXISTS aliases (
+        key TEXT PRIMARY KEY,
+        target TEXT NOT NULL,
+        stale_until REAL NOT NULL
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        sweep_every: int = 64,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_every = sweep_every
+        self._local = threading.local()
+        self._saves = 0
+        conn = self._connect()
+        self._sweep(conn, time.time())
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        # 每個執行緒各自一條連線，fork 後重建
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, "pid", None) != pid:
+            local.conn = self._connect()
+            local.pid = pid
+        return local.conn
+
+    def lookup(self, key: str, now: float) -> Optional[_Entry]:
+        row = self._conn().execute(
+            "SELECT payload, size, expires_at, stale_until FROM results "
+            "WHERE key = COALESCE((SELECT target FROM aliases WHERE key = ?), ?) AND stale_until > ?",
+            (key, key, now),
+        ).fetchone()
+        if row is None:
+            return None
+        payload, size, expires_at, stale_until = row
+        try:
+            result = _loads(payload)
+        except (zlib.error, ValueError):
+            return None
+        return _Entry(result, expires_at, stale_until, size)
+
+    def save(self, requested_key: str, final_key: str, result: AnalysisResult, expires_at: float, stale_until: float) -> None:
+        payload = _dumps(result)
+        if len(payload) > self.max_bytes:
+            return
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, payload, size, expires_at, stale_until) VALUES (?, ?, ?, ?, ?)",
+                (final_key, payload, len(payload), expires_at, stale_until),
+            )
+            if requested_key != final_key:
+                conn.execute(
+                    "INSERT OR REPLACE INTO aliases (key, target, stale_until) VALUES (?, ?, ?)",
+                    (requested_key, final_key, stale_until),
+                )
+            self._saves += 1
+            if self._saves % self.sweep_every == 0:
+                self._sweep(conn, time.time())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _sweep(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM results WHERE stale_until <= ?", (now,))
+        conn.execute("DELETE FROM aliases WHERE stale_until <= ?", (now,))
+        # 由新到舊累計筆數與大小，超過上限的（較舊的）刪除
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, COUNT(*) OVER w AS n, SUM(size) OVER w AS total FROM results"
+            "  WINDOW w AS (ORDER BY expires_at DESC ROWS UNBOUNDED PRECEDING)"
+            " ) WHERE n > ? OR total > ?"
+            ")",
+            (self.max_entries, self.max_bytes),
+        )
+        conn.execute(
+            "DELETE FROM aliases WHERE key IN (SELECT key FROM aliases ORDER BY stale_until DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries * 4,),
+        )
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM results")
+        conn.execute("DELETE FROM aliases")
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        (aliases,) = conn.execute("SELECT COUNT(*) FROM aliases").fetchone()
+        return {"entries": entries, "aliases": aliases, "bytes": size}
+
+
+def create_store(
+    path: Optional[str] = None,
+    max_entries: int = 1024,
+    max_bytes: int = 32 * 1024 * 1024,
+) -> CacheStore:
+    """依設定建立 store：有指定 SQLite 路徑（或 SEO_CACHE_DB）時跨 worker 共用"""
+    path = path or os.environ.get(CACHE_DB_ENV)
+    if path:
+        return SQLiteStore(path, max_entries, max_bytes)
+    return MemoryStore(max_entries, max_bytes)
+
+
+class ResultCache:
+    """
+    分析結果快取（執行緒安全）
+
+    - 以最終網址為 key，並記錄「請求網址 → 最終網址」的別名
+    - TTL 過期後由 store 淘汰（MemoryStore 依 LRU，SQLiteStore 讓所有 worker 共用）
+    - 同一網址同時有多個請求未命中時，只抓取一次（同一 process 內）
+    - 錯誤結果不快取
+    - 過期後仍保留 revalidate_window 秒，供帶 ETag / Last-Modified 的條件式請求使用
+
+    快取中的結果會被多個請求共用，呼叫端不可修改。
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        revalidate_window: float = 3600,
+        store: Optional[CacheStore] = None,
+    ):
+        self.ttl = ttl
+        self.revalidate_window = revalidate_window
+        # 沒有指定 store 時使用記憶體 store（max_entries / max_bytes 為其上限）
+        self.store = store if store is not None else MemoryStore(max_entries, max_bytes)
+        self._lock = threading.Lock()
+        self._inflight_async: dict[str, asyncio.Task] = {}
+        self._inflight_sync: dict[str, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        # 每次 get 後以 on_lookup(命中與否) 通知（例如匯出監控指標）
+        self.on_lookup: Optional[Callable[[bool], None]] = None
+
+    def get(self, url: str) -> Optional[AnalysisResult]:
+        """取得快取結果，不存在或已過期回傳 None"""
+        result = self._get(url)
+        if self.on_lookup is not None:
+            self.on_lookup(result is not None)
+        return result
+
+    def _get(self, url: str) -> Optional[AnalysisResult]:
+        now = time.time()
+        entry = self.store.lookup(normalize_url(url), now)
+        with self._lock:
+            if entry is None or entry.expires_at <= now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.result
+
+    def get_stale(self, url: str) -> Optional[AnalysisResult]:
+        """取得已過期但仍可重新驗證的結果（需有 ETag 或 Last-Modified）"""
+        entry = self.store.lookup(normalize_url(url), time.time())
+        if entry is None:
+            return None
+        validators = entry.result.validators or {}
+        if not any(validators.values()):
+            return None
+        return entry.result
+
+    def put(self, url: str, result: AnalysisResult) -> None:
+        """
+        存入分析結果
+
+        Args:
+            url: 使用者請求的網址
+            result: SEOAnalyzer.analyze 的結果（含最終網址 url）
+        """
+        if result.error is not None:
+            return
+
+        if result.fetch == "revalidated":
+            with self._lock:
+                self.revalidated += 1
+        expires_at = time.time() + self.ttl
+        self.store.save(
+            normalize_url(url),
+            normalize_url(result.url or url),
+            result,
+            expires_at,
+            expires_at + self.revalidate_window,
+        )
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    async def get_or_analyze_async(
+        self,
+        url: str,
+        analyze: Callable[[Optional[AnalysisResult]], Awaitable[AnalysisResult]],
+    ) -> AnalysisResult:
+        """
+        取得快取結果，未命中時執行分析（同一網址的並行請求共用同一次分析）
+
+        分析在獨立的 task 中執行，所有請求都以 shield 等待：任何一個請求被取消
+        （例如批次串流的用戶端斷線）只會取消它自己的等待，其他請求照樣拿到結果。
+
+        Args:
+            url: 使用者請求的網址
+            analyze: 回傳分析結果的 coroutine function，參數為可重新驗證的舊結果（或 None）
+        """
+        result = self.get(url)
+        if result is not None:
+            return result
+
+        key = normalize_url(url)
+        task = self._inflight_async.get(key)
+        if task is None:
+            task = asyncio.create_task(self._analyze_and_put(url, key, analyze))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight_async[key] = task
+        return await asyncio.shield(task)
+
+    async def _analyze_and_put(
+        self,
+        url: str,
+        key: str,
+        analyze: Callable[[Optional[AnalysisResult]], Awaitable[AnalysisResult]],
+    ) -> AnalysisResult:
+        try:
+            result = await analyze(self.get_stale(url))
+            self.put(url, result)
+            return result
+        finally:
+            del self._inflight_async[key]
+
+    def get_or_analyze(
+        self,
+        url: str,
+        analyze: Callable[[Optional[AnalysisResult]], AnalysisResult],
+    ) -> AnalysisResult:
+        """同步版 get_or_analyze_async（以執行緒同步）"""
+        result = self.get(url)
+        if result is not None:
+            return result
+
+        key = normalize_url(url)
+        with self._lock:
+            event = self._inflight_sync.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight_sync[key] = threading.Event()
+
+        if not leader:
+            event.wait()
+            result = self.get(url)
+            if result is not None:
+                return result
+            # 領頭的請求失敗或結果不可快取，自行分析
+            return analyze(None)
+
+        try:
+            result = analyze(self.get_stale(url))
+            self.put(url, result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight_sync[key]
+            event.set()
+
+    def stats(self) -> dict:
+        """快取統計（命中次數只計算本 process）"""
+        with self._lock:
+            total = self.hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+        return {**self.store.stats(), **counters}
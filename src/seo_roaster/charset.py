@@ -0,0 +1,140 @@
+"""
+字元編碼偵測 - 決定 HTML 原始內容的編碼，只看開頭有限的位元組
+
+依序採用：BOM、HTTP 標頭的 charset、開頭 SNIFF_BYTES 內的 <meta charset> /
+http-equiv 宣告；都沒有時先試 UTF-8，再以統計偵測（只看開頭 DETECT_BYTES）。
+requests 在沒有 charset 時會對整份內容做統計偵測（或直接當成 ISO-8859-1），
+數 MB 的 Big5 / GBK / Shift_JIS 頁面會花掉大量 CPU 或解成亂碼。
+"""
+
+import codecs
+import re
+from typing import Optional
+
+try:
+    # requests 的相依套件，通常都有安裝
+    from charset_normalizer import from_bytes as _detect
+except ImportError:
+    _detect = None
+
+# <meta> 宣告只在開頭這麼多位元組內尋找（HTML 規範為 1024，放寬給前面有大量註解的頁面）
+SNIFF_BYTES = 4096
+# 統計偵測只看開頭這麼多位元組
+DETECT_BYTES = 64 * 1024
+# 沒有任何線索、也不是 UTF-8 時使用（與瀏覽器的預設相同）
+DEFAULT_ENCODING = "cp1252"
+
+# 偵測方式
+SOURCE_BOM = "bom"
+SOURCE_HEADER = "header"
+SOURCE_META = "meta"
+SOURCE_DETECTED = "detected"
+SOURCE_DEFAULT = "default"
+# 封存檔保存的是已解碼的文字（HAR），不需要偵測
+SOURCE_ARCHIVE = "archive"
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# 網頁宣告的編碼實際上指的是較大的超集（WHATWG Encoding 標準，瀏覽器也這樣解碼）
+_SUPERSETS = {
+    "ascii": "cp1252",
+    "iso8859-1": "cp1252",
+    "iso8859-9": "cp1254",
+    "iso8859-11": "cp874",
+    "tis-620": "cp874",
+    "gb2312": "gb18030",
+    "gbk": "gb18030",
+    "big5": "big5hkscs",
+    "shift_jis": "cp932",
+    "euc_kr": "cp949",
+}
+
+_HEADER_CHARSET = re.compile(r"""charset\s*=\s*["']?\s*([\w.:+-]+)""", re.IGNORECASE)
+# 同時涵蓋 <meta charset="..."> 與 <meta http-equiv="Content-Type" content="...; charset=...">
+_META_CHARSET = re.compile(rb"""<meta[^>]*?charset\s*=\s*["']?\s*([\w.:+-]+)""", re.IGNORECASE)
+
+
+def normalize(label: Optional[str]) -> Optional[str]:
+    """
+    編碼名稱轉成 Python codec 名稱（含 WHATWG 的超集對應），不認得時回傳 None
+
+    Example:
+        normalize("Big5") → "big5hkscs"
+        normalize("ISO-8859-1") → "cp1252"
+    """
+    if not label:
+        return None
+    try:
+        name = codecs.lookup(label.strip().strip("\"'")).name
+    except LookupError:
+        return None
+    return _SUPERSETS.get(name, name)
+
+
+def _from_bom(body: bytes) -> Optional[str]:
+    # 用切片比較，body 也可以是 mmap 等不支援 startswith 的緩衝區
+    for bom, encoding in _BOMS:
+        if body[:len(bom)] == bom:
+            return encoding
+    return None
+
+
+def _from_meta(body: bytes) -> Optional[str]:
+    for match in _META_CHARSET.finditer(body, 0, SNIFF_BYTES):
+        encoding = normalize(match.group(1).decode("ascii", "ignore"))
+        if encoding:
+            # 內容既然能用 ASCII 讀到 <meta>，宣告的 UTF-16 實際上是 UTF-8（HTML 規範）
+            return "utf-8" if encoding.startswith("utf-16") else encoding
+    return None
+
+
+def _detect_prefix(body: bytes) -> tuple[str, str]:
+    prefix = body[:DETECT_BYTES]
+    try:
+        # final=False：開頭被切在多位元組字元中間也算 UTF-8
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=len(prefix) == len(body))
+        return "utf-8", SOURCE_DETECTED
+    except UnicodeDecodeError:
+        pass
+
+    if _detect is not None:
+        best = _detect(prefix).best()
+        encoding = normalize(best.encoding) if best is not None else None
+        if encoding:
+            return encoding, SOURCE_DETECTED
+    return DEFAULT_ENCODING, SOURCE_DEFAULT
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    """Content-Type 標頭宣告的編碼（沒有或不認得時回傳 None）"""
+    if not content_type:
+        return None
+    match = _HEADER_CHARSET.search(content_type)
+    return normalize(match.group(1)) if match else None
+
+
+def detect_encoding(body: bytes, content_type: Optional[str] = None) -> tuple[str, str]:
+    """
+    決定 HTML 原始內容的編碼
+
+    Args:
+        body: 原始內容（只會讀取開頭的部分）
+        content_type: HTTP Content-Type 標頭
+
+    Returns:
+        tuple: (Python codec 名稱, 偵測方式：bom / header / meta / detected / default)
+    """
+    encoding = _from_bom(body)
+    if encoding:
+        return encoding, SOURCE_BOM
+    encoding = header_charset(content_type)
+    if encoding:
+        return encoding, SOURCE_HEADER
+    encoding = _from_meta(body)
+    if encoding:
+        return encoding, SOURCE_META
+    return _detect_prefix(body)
@@ -0,0 +1,64 @@
+"""檢測項目註冊表 - 每個檢測宣告 key、權重與需要的資料階段"""
+
+from typing import Iterable, Optional
+
+from .results import CheckResult
+
+# 資料階段：只計算選取的檢測需要的部分
+URL = "url"            # 只需要最終網址
+HEAD = "head"          # <head> 內的 title / meta / link / html lang
+BODY = "body"          # body 內的 H1、圖片
+JSON_LD = "json_ld"    # JSON-LD（可能放在 body，需要完整文件）
+
+# 只需要這些階段時，<head> 結束後就可以停止解析
+HEAD_STAGES = frozenset({URL, HEAD})
+
+
+class Check:
+    """
+    單一檢測項目
+
+    method 為 SEOAnalyzer 上的檢測方法名稱；URL 階段的檢測收到解析後的網址，
+    其餘收到 PageIndex。args 會接在後面傳入（例如 og 標籤名稱）。
+    """
+
+    __slots__ = ("key", "weight", "stage", "method", "args")
+
+    def __init__(self, key: str, weight: int, stage: str, method: str, *args):
+        self.key = key
+        self.weight = weight
+        self.stage = stage
+        self.method = method
+        self.args = args
+
+    def run(self, analyzer, index, parsed_url) -> CheckResult:
+        func = getattr(analyzer, self.method)
+        if self.stage == URL:
+            return func(parsed_url, *self.args)
+        return func(index, *self.args)
+
+
+def select_checks(checks: tuple, keys: Optional[Iterable[str]] = None) -> tuple:
+    """
+    從註冊表選出要執行的檢測（保留註冊順序）
+
+    Args:
+        checks: 所有檢測（SEOAnalyzer.CHECKS）
+        keys: 要執行的檢測 key，None 表示全部
+
+    Raises:
+        ValueError: 有未知的檢測 key
+    """
+    if keys is None:
+        return checks
+
+    wanted = set(keys)
+    unknown = wanted - {check.key for check in checks}
+    if unknown:
+        raise ValueError(f"未知的檢測項目：{', '.join(sorted(unknown))}")
+    return tuple(check for check in checks if check.key in wanted)
+
+
+def required_stages(checks: Iterable[Check]) -> frozenset:
+    """選取的檢測需要的資料階段"""
+    return frozenset(check.stage for check in checks)
@@ -0,0 +1,224 @@
+"""
+內容解壓 - 協商壓縮格式並以有上限的方式逐段解壓
+
+只宣告實際能解、而且能限制單次輸出長度的格式（gzip / deflate 一定有；br 需要
+支援 output_buffer_limit 的 brotli 套件，zstd 需要 Python 3.14 內建的
+compression.zstd）。解壓由這裡逐段進行而不交給 urllib3：每段輸出都有長度上限，
+解壓後的總量超過 max_bytes，或解壓後與壓縮前的比例超過 max_ratio 時就停止，
+1 MB 的壓縮炸彈不會先在記憶體中展開成數 GB 才被截斷。
+"""
+
+import zlib
+from typing import Iterator, Optional
+
+import requests
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    # Python 3.14 起內建，可限制單次輸出長度（zstandard 套件不行，不使用）
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+# 每次解壓輸出的長度上限
+OUTPUT_CHUNK = 64 * 1024
+# 解壓後未超過這個大小時不檢查比例（很小的頁面或開頭大量重複的內容比例本來就高）
+RATIO_GRACE_BYTES = 1024 * 1024
+
+# 停止解壓的原因
+LIMIT_SIZE = "size"
+LIMIT_RATIO = "ratio"
+
+
+def _brotli_bounded() -> bool:
+    """brotli 1.2 起 process 才能限制輸出長度；較舊的版本與 brotlicffi 不宣告 br"""
+    if brotli is None or not hasattr(brotli.Decompressor, "can_accept_more_data"):
+        return False
+    try:
+        brotli.Decompressor().process(b"", output_buffer_limit=OUTPUT_CHUNK)
+    except (TypeError, brotli.error):
+        return False
+    return True
+
+
+BROTLI_BOUNDED = _brotli_bounded()
+
+
+def _available() -> tuple[str, ...]:
+    codings = ["gzip", "deflate"]
+    if BROTLI_BOUNDED:
+        codings.append("br")
+    if zstd is not None:
+        codings.append("zstd")
+    return tuple(codings)
+
+
+def _errors() -> tuple:
+    errors = [zlib.error]
+    if BROTLI_BOUNDED:
+        errors.append(brotli.error)
+    if zstd is not None:
+        errors.append(zstd.ZstdError)
+    return tuple(errors)
+
+
+SUPPORTED_ENCODINGS = _available()
+ACCEPT_ENCODING = ", ".join(SUPPORTED_ENCODINGS)
+# 壓縮內容損壞時各解壓器拋出的例外
+DECODE_ERRORS = _errors()
+
+
+class _ZlibDecoder:
+    """gzip / deflate（zlib 可限制單次輸出長度，沒用完的輸入留在 unconsumed_tail）"""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, wbits: Optional[int]):
+        # wbits 為 None 表示 deflate：看到第一個位元組才知道是 zlib 格式還是原始 deflate
+        self.obj = None if wbits is None else zlib.decompressobj(wbits)
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        if self.obj is None and data:
+            # 大多數伺服器送的是 zlib 格式，少數是原始 deflate
+            self.obj = zlib.decompressobj(zlib.MAX_WBITS if data[:1] == b"\x78" else -zlib.MAX_WBITS)
+        while data and not self.obj.eof:
+            out = self.obj.decompress(data, OUTPUT_CHUNK)
+            data = self.obj.unconsumed_tail
+            if out:
+                yield out
+
+
+class _ZstdDecoder:
+    """zstd（內建模組可限制單次輸出長度，沒用完的輸入留在解壓器內部）"""
+
+    __slots__ = ("obj",)
+
+    def __init__(self):
+        self.obj = zstd.ZstdDecompressor()
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        while not self.obj.eof:
+            out = self.obj.decompress(data, OUTPUT_CHUNK)
+            data = b""
+            if out:
+                yield out
+            if self.obj.needs_input:
+                return
+
+
+class _BrotliDecoder:
+    """
+    br（output_buffer_limit 限制單次輸出，沒用完的輸入留在解壓器內部）
+
+    輸出緩衝區以區塊成長，達到上限後才停止，單次回傳可能略超過 OUTPUT_CHUNK，
+    再切成不超過 OUTPUT_CHUNK 的段落交出去。
+    """
+
+    __slots__ = ("obj",)
+
+    def __init__(self):
+        self.obj = brotli.Decompressor()
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        out = self.obj.process(data, output_buffer_limit=OUTPUT_CHUNK)
+        # 還有輸出沒交出來時只能餵空的輸入，直到沒有新的輸出為止
+        while out or not self.obj.can_accept_more_data():
+            for start in range(0, len(out), OUTPUT_CHUNK):
+                yield out[start:start + OUTPUT_CHUNK]
+            if self.obj.is_finished():
+                return
+            out = self.obj.process(b"", output_buffer_limit=OUTPUT_CHUNK)
+
+
+def _create(coding: str):
+    if coding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if coding == "deflate":
+        return _ZlibDecoder(None)
+    if coding == "br" and BROTLI_BOUNDED:
+        return _BrotliDecoder()
+    if coding == "zstd" and zstd is not None:
+        return _ZstdDecoder()
+    return None
+
+
+def _feed_chain(decoders: list, data: bytes) -> Iterator[bytes]:
+    if not decoders:
+        yield data
+        return
+    for out in decoders[0].feed(data):
+        yield from _feed_chain(decoders[1:], out)
+
+
+class BodyDecoder:
+    """
+    逐段解開 Content-Encoding 並限制解壓後的大小與比例
+
+    wire_bytes 為收到的原始（壓縮）位元組數，decoded_bytes 為解壓後交給呼叫端的
+    位元組數；超過上限時 limited 設為 LIMIT_SIZE 或 LIMIT_RATIO，之後不再輸出。
+    沒有壓縮時原樣輸出，只套用大小上限。
+    """
+
+    __slots__ = ("decoders", "max_bytes", "max_ratio", "wire_bytes", "decoded_bytes", "limited")
+
+    def __init__(self, content_encoding: Optional[str], max_bytes: int, max_ratio: float):
+        """
+        Args:
+            content_encoding: 回應的 Content-Encoding 標頭（可為多層，例如 "gzip, br"）
+            max_bytes: 解壓後的大小上限
+            max_ratio: 解壓後與壓縮前的比例上限
+
+        Raises:
+            requests.exceptions.ContentDecodingError: 不支援的壓縮格式
+        """
+        self.decoders = []
+        for coding in (content_encoding or "").lower().split(","):
+            coding = coding.strip()
+            if coding in ("", "identity"):
+                continue
+            decoder = _create(coding)
+            if decoder is None:
+                raise requests.exceptions.ContentDecodingError(f"不支援的壓縮格式：{coding}")
+            self.decoders.append(decoder)
+        # 標頭列出的順序就是壓縮的順序，解壓時反過來
+        self.decoders.reverse()
+        self.max_bytes = max_bytes
+        self.max_ratio = max_ratio
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.limited: Optional[str] = None
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        解壓一段收到的內容，超過上限時只回傳上限內的部分並設定 limited
+
+        Raises:
+            requests.exceptions.ContentDecodingError: 壓縮內容損壞
+        """
+        if self.limited:
+            return b""
+        self.wire_bytes += len(data)
+        parts = []
+        try:
+            for out in _feed_chain(self.decoders, data):
+                remaining = self.max_bytes - self.decoded_bytes
+                if len(out) > remaining:
+                    out = out[:remaining]
+                    self.limited = LIMIT_SIZE
+                self.decoded_bytes += len(out)
+                parts.append(out)
+                if self.limited:
+                    break
+                if self.decoded_bytes > RATIO_GRACE_BYTES and self.decoded_bytes > self.wire_bytes * self.max_ratio:
+                    self.limited = LIMIT_RATIO
+                    break
+        except DECODE_ERRORS as e:
+            raise requests.exceptions.ContentDecodingError(f"無法解壓內容：{e}") from e
+        return b"".join(parts)
@@ -0,0 +1,452 @@
+"""整站爬蟲 - 由 sitemap.xml 與站內連結找出頁面，逐頁執行 SEO 檢測"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import zlib
+from collections import defaultdict
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from lxml import etree
+
+from .aio import fetch_async, run_in_parse_executor
+from .analyzer import SEOAnalyzer
+from .cache import normalize_url
+from .results import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 500
+DEFAULT_MAX_DEPTH = 5
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PER_HOST = 2
+DEFAULT_DELAY = 0.5           # 同一主機兩次請求之間至少間隔幾秒
+MAX_SITEMAPS = 50             # 最多讀取幾個 sitemap（含 sitemap index 展開）
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+ROBOTS_AGENT = "SEORoaster"
+
+# 明顯不是 HTML 的連結直接略過
+SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".pdf", ".zip", ".gz",
+    ".mp3", ".mp4", ".webm", ".css", ".js", ".json", ".xml", ".txt", ".woff", ".woff2",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    score INTEGER,
+    grade TEXT,
+    passed TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_frontier ON pages (status, depth);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class CrawlState:
+    """
+    爬蟲狀態（SQLite 檔案，中斷後可接續）
+
+    pages.status：queued（待爬）、active（進行中）、done、failed、skipped、
+    alias（重定向到已知頁面，不列入統計）。
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # 上次中斷時進行中的頁面重新排入佇列
+        self.conn.execute("UPDATE pages SET status = 'queued' WHERE status = 'active'")
+        self.conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+    def enqueue(self, urls: list[str], depth: int) -> int:
+        """加入待爬佇列（已存在的網址忽略），回傳新增數量"""
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO pages (url, depth) VALUES (?, ?)",
+            [(url, depth) for url in urls],
+        )
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def take(self) -> Optional[tuple[str, int]]:
+        """取出下一個待爬頁面（淺層優先）"""
+        row = self.conn.execute(
+            "SELECT url, depth FROM pages WHERE status = 'queued' ORDER BY depth, rowid LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE pages SET status = 'active' WHERE url = ?", (row[0],))
+        self.conn.commit()
+        return row[0], row[1]
+
+    def finish(self, url: str, result: AnalysisResult) -> None:
+        self.conn.execute(
+            "UPDATE pages SET status = 'done', score = ?, grade = ?, passed = ? WHERE url = ?",
+            (result.score, result.grade, json.dumps(result.passed), url),
+        )
+        self.conn.commit()
+
+    def fail(self, url: str, error: str, status: str = "failed") -> None:
+        self.conn.execute("UPDATE pages SET status = ?, error = ? WHERE url = ?", (status, error, url))
+        self.conn.commit()
+
+    def mark_alias(self, url: str) -> None:
+        """重定向的最終網址標記為已處理，避免重複分析"""
+        self.conn.execute(
+            "INSERT INTO pages (url, depth, status) VALUES (?, 0, 'alias') "
+            "ON CONFLICT (url) DO UPDATE SET status = 'alias' WHERE status = 'queued'",
+            (url,),
+        )
+        self.conn.commit()
+
+    def processed(self) -> int:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM pages WHERE status IN ('done', 'failed', 'skipped')"
+        ).fetchone()
+        return row[0]
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM pages GROUP BY status"))
+
+    def summary(self, weights: dict, grade) -> dict:
+        """
+        彙總整站分數
+
+        整站分數 = Σ 各項權重 × 該項通過率，等同各頁分數的平均。
+        """
+        done = 0
+        passed_counts: dict[str, int] = defaultdict(int)
+        for (passed,) in self.conn.execute("SELECT passed FROM pages WHERE status = 'done'"):
+            done += 1
+            for key in json.loads(passed):
+                passed_counts[key] += 1
+
+        pass_rates = {key: (passed_counts[key] / done if done else 0.0) for key in weights}
+        score = round(sum(weights[key] * rate for key, rate in pass_rates.items()))
+        worst = [
+            {"url": url, "score": page_score, "grade": page_grade}
+            for url, page_score, page_grade in self.conn.execute(
+                "SELECT url, score, grade FROM pages WHERE status = 'done' ORDER BY score, url LIMIT 10"
+            )
+        ]
+        errors = dict(self.conn.execute(
+            "SELECT error, COUNT(*) FROM pages WHERE status = 'failed' GROUP BY error"
+        ))
+
+        return {
+            "pages": done,
+            "score": score,
+            "grade": grade(score),
+            "pass_rates": {key: round(rate, 4) for key, rate in pass_rates.items()},
+            "worst_pages": worst,
+            "errors": errors,
+            "counts": self.counts(),
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def parse_sitemap(data: bytes) -> tuple[list[str], list[str]]:
+    """
+    解析 sitemap（支援 gzip 與 sitemap index）
+
+    Returns:
+        tuple: (子 sitemap 網址, 頁面網址)
+    """
+    if data[:2] == b"\x1f\x8b":
+        # 限制解壓縮後大小，避免壓縮炸彈
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = decompressor.decompress(data, SITEMAP_MAX_BYTES)
+
+    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+    try:
+        root = etree.fromstring(data, parser)
+    except etree.XMLSyntaxError:
+        return [], []
+    if root is None:
+        return [], []
+
+    locs = [
+        el.text.strip()
+        for el in root.iter()
+        if isinstance(el.tag, str) and etree.QName(el).localname == "loc" and el.text
+    ]
+    if etree.QName(root).localname == "sitemapindex":
+        return locs, []
+    return [], locs
+
+
+class SiteCrawler:
+    """
+    整站爬蟲
+
+    從起始網址出發，透過 sitemap.xml（含 sitemap index、gzip）與同源的
+    <a href> 找出頁面，逐頁執行 SEOAnalyzer 的檢測。狀態存在 SQLite 檔案，
+    以相同的 state_path 重新執行即可接續。
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        state_path: str,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        delay: float = DEFAULT_DELAY,
+        use_sitemaps: bool = True,
+        analyzer: Optional[SEOAnalyzer] = None,
+    ):
+        self.start_url = start_url
+        self.state = CrawlState(state_path)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.use_sitemaps = use_sitemaps
+        self.analyzer = analyzer or SEOAnalyzer(timeout=8, total_timeout=15)
+        self.hosts: set[str] = set()
+        self.robots: Optional[RobotFileParser] = None
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._host_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._host_last: dict[str, float] = {}
+        self._active = 0
+
+    # ----- 網址處理 -----
+
+    def _in_scope(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.hostname not in self.hosts:
+            return False
+        if parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return False
+        if self.robots is not None and not self.robots.can_fetch(ROBOTS_AGENT, url):
+            return False
+        return True
+
+    def _scoped(self, base_url: str, hrefs: list[str]) -> list[str]:
+        """將連結轉為絕對網址，只保留同源且 robots.txt 允許的頁面（無法解析的連結略過）"""
+        urls = []
+        for href in hrefs:
+            href = href.strip()
+            if not href or href.startswith(("#", "mailto:", "tel:", "javascript:")):
+                continue
+            try:
+                url = urljoin(base_url, href)
+                # 不是數字的 port 在存取 .port 時才會拋出
+                urlsplit(url).port
+            except ValueError:
+                # 頁面或 sitemap 裡的 "https://[bad" 之類的連結不能讓整頁或整個爬取失敗
+                continue
+            url = normalize_url(url)
+            if self._in_scope(url):
+                urls.append(url)
+        return list(dict.fromkeys(urls))
+
+    # ----- 抓取 -----
+
+    async def _throttled_fetch(self, url: str, analyzer: SEOAnalyzer, decode: Optional[bool] = None):
+        """依主機限制並行數與請求間隔後抓取"""
+        loop = asyncio.get_running_loop()
+        host = urlsplit(url).hostname or ""
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+
+        async with slots:
+            async with self._host_locks[host]:
+                wait = self._host_last.get(host, 0) + self.delay - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._host_last[host] = loop.time()
+            return await fetch_async(analyzer, url, decode=decode)
+
+    async def _fetch_text(self, url: str) -> Optional[str]:
+        try:
+            fetched = await self._throttled_fetch(url, self.analyzer, decode=True)
+        except Exception as e:
+            logger.info(f"Fetch failed for {url}: {e}")
+            return None
+        return fetched.html
+
+    async def _setup(self) -> None:
+        """初始化（或從狀態檔還原）爬取範圍、robots.txt 與 sitemap"""
+        start = normalize_url(self.analyzer._check_url(self.start_url))
+        hosts = self.state.get_meta("hosts")
+        self.hosts = set(json.loads(hosts)) if hosts else {urlsplit(start).hostname}
+
+        origin = f"{urlsplit(start).scheme}://{urlsplit(start).netloc}"
+        robots_txt = self.state.get_meta("robots")
+        if robots_txt is None:
+            robots_txt = await self._fetch_text(origin + "/robots.txt") or ""
+            self.state.set_meta("robots", robots_txt)
+        self.robots = RobotFileParser()
+        self.robots.parse(robots_txt.splitlines())
+
+        self.state.enqueue([start], 0)
+
+        if self.use_sitemaps and self.state.get_meta("sitemaps_done") is None:
+            sitemaps = [
+                line.split(":", 1)[1].strip()
+                for line in robots_txt.splitlines()
+                if line.lower().startswith("sitemap:")
+            ]
+            await self._read_sitemaps(sitemaps or [origin + "/sitemap.xml"])
+            self.state.set_meta("sitemaps_done", "1")
+
+        self.state.set_meta("hosts", json.dumps(sorted(self.hosts)))
+
+    async def _read_sitemaps(self, sitemaps: list[str]) -> None:
+        sitemap_analyzer = SEOAnalyzer(
+            timeout=self.analyzer.timeout,
+            max_bytes=SITEMAP_MAX_BYTES,
+            total_timeout=self.analyzer.total_timeout * 2,
+        )
+        queue = list(dict.fromkeys(sitemaps))
+        seen = set()
+        total = 0
+
+        while queue and len(seen) < MAX_SITEMAPS:
+            sitemap_url = queue.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            try:
+                fetched = await self._throttled_fetch(sitemap_url, sitemap_analyzer, decode=False)
+            except Exception as e:
+                logger.info(f"Sitemap fetch failed for {sitemap_url}: {e}")
+                continue
+
+            children, pages = await run_in_parse_executor(parse_sitemap, fetched.body)
+            queue.extend(children)
+            added = self.state.enqueue(self._scoped(fetched.url, pages), 1)
+            total += added
+
+        logger.info(f"Sitemaps read: {len(seen)}, pages queued: {total}")
+
+    # ----- 爬取 -----
+
+    def _analyze_page(self, fetched) -> tuple[AnalysisResult, list[str]]:
+        """解析並檢測單頁（在解析 executor 中執行）"""
+        index = self.analyzer._parse_fetched(fetched, collect_links=True)
+        result = self.analyzer._build_results(index, fetched.url, fetched.status_code)
+        return result, index.links
+
+    async def _crawl_page(self, url: str, depth: int) -> None:
+        try:
+            fetched = await self._throttled_fetch(url, self.analyzer)
+        except Exception as e:
+            self.state.fail(url, self.analyzer._error_result(e, url).error)
+            return
+
+        content_type = fetched.headers.get("Content-Type", "")
+        if content_type and "html" not in content_type.lower():
+            self.state.fail(url, "not_html", status="skipped")
+            return
+
+        final_url = normalize_url(fetched.url)
+        if depth == 0 and urlsplit(final_url).hostname not in self.hosts:
+            # 起始網址重定向到其他主機（如加上 www），納入爬取範圍
+            self.hosts.add(urlsplit(final_url).hostname)
+            self.state.set_meta("hosts", json.dumps(sorted(self.hosts)))
+
+        result, links = await run_in_parse_executor(self._analyze_page, fetched)
+        self.state.finish(url, result)
+        if final_url != url:
+            self.state.mark_alias(final_url)
+
+        if depth < self.max_depth:
+            self.state.enqueue(self._scoped(fetched.url, links), depth + 1)
+
+    async def _worker(self) -> None:
+        while self.state.processed() + self._active < self.max_pages:
+            item = self.state.take()
+            if item is None:
+                if self._active == 0:
+                    return
+                # 其他頁面還在進行中，可能會加入新連結
+                await asyncio.sleep(0.1)
+                continue
+
+            self._active += 1
+            try:
+                await self._crawl_page(*item)
+            except Exception as e:
+                logger.error(f"Crawl failed for {item[0]}: {e}", exc_info=True)
+                self.state.fail(item[0], "unknown")
+            finally:
+                self._active -= 1
+
+            processed = self.state.processed()
+            if processed % 50 == 0:
+                logger.info(f"Crawled {processed} pages")
+
+    async def run(self) -> dict:
+        """
+        執行爬取（可重複呼叫以接續中斷的爬取）
+
+        Returns:
+            dict: 整站彙總（分數、等級、各項通過率、最差頁面）
+        """
+        try:
+            await self._setup()
+            await asyncio.gather(*[self._worker() for _ in range(self.concurrency)])
+            summary = self.state.summary(self.analyzer.WEIGHTS, self.analyzer._calculate_grade)
+            summary["start_url"] = self.start_url
+            return summary
+        finally:
+            self.state.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """命令列入口：python -m src.seo_roaster.crawler https://example.com"""
+    parser = argparse.ArgumentParser(description="整站 SEO 爬取與彙總評分")
+    parser.add_argument("url", help="起始網址")
+    parser.add_argument("--state", help="狀態檔路徑（相同路徑可接續中斷的爬取）")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES)
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY, help="同一主機請求間隔（秒）")
+    parser.add_argument("--no-sitemap", action="store_true", help="不讀取 sitemap.xml")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    state_path = args.state or f"crawl-{urlsplit(normalize_url(args.url)).hostname}.db"
+
+    crawler = SiteCrawler(
+        args.url,
+        state_path,
+        max_pages=args.max_pages,
+        max_depth=args.max_depth,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        delay=args.delay,
+        use_sitemaps=not args.no_sitemap,
+    )
+    summary = asyncio.run(crawler.run())
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
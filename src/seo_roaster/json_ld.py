@@ -0,0 +1,123 @@
+"""JSON-LD 解析 - 每個區塊只解碼一次，整理成依 @type 分類的節點索引"""
+
+import json
+from typing import Any, Optional
+
+try:
+    # 有安裝 orjson 時使用較快的解碼器（大型商品目錄、麵包屑圖可達數百 KB）
+    import orjson
+
+    _loads = orjson.loads
+    _DecodeError: tuple = (orjson.JSONDecodeError, RecursionError)
+except ImportError:
+    _loads = json.loads
+    _DecodeError = (json.JSONDecodeError, RecursionError)
+
+# 會被提出來的日期欄位
+DATE_FIELDS = ("datePublished", "dateModified", "dateCreated", "uploadDate")
+
+
+class JsonLdBlock:
+    """單一 <script type="application/ld+json"> 區塊的解碼結果"""
+
+    __slots__ = ("data", "error")
+
+    def __init__(self, data: Any = None, error: Optional[dict] = None):
+        self.data = data
+        # 語法錯誤：{"message", "line", "column"}
+        self.error = error
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+
+class JsonLdGraph:
+    """
+    頁面上所有 JSON-LD 的節點索引
+
+    nodes 是頂層節點：陣列（含巢狀陣列）會攤平，@graph 的項目也視為頂層節點。
+    """
+
+    def __init__(self):
+        self.blocks: list[JsonLdBlock] = []
+        self.nodes: list[dict] = []
+        # @type → 節點（@type 為陣列時每個類型都會建索引）
+        self.by_type: dict[str, list[dict]] = {}
+        # 每個節點的 @type 原始值（依出現順序）
+        self.types: list = []
+        # 日期欄位 → 第一個出現的值
+        self.dates: dict[str, Any] = {}
+
+    @property
+    def valid_count(self) -> int:
+        return sum(1 for block in self.blocks if block.valid)
+
+    @property
+    def errors(self) -> list[dict]:
+        return [block.error for block in self.blocks if not block.valid]
+
+    def of_type(self, type_name: str) -> list[dict]:
+        """取得指定 @type 的節點"""
+        return self.by_type.get(type_name, [])
+
+    def _add_node(self, node: dict) -> None:
+        self.nodes.append(node)
+
+        node_type = node.get("@type")
+        if node_type is not None:
+            self.types.append(node_type)
+            for name in node_type if isinstance(node_type, list) else [node_type]:
+                if isinstance(name, str):
+                    self.by_type.setdefault(name, []).append(node)
+
+        for field in DATE_FIELDS:
+            if field in node:
+                self.dates.setdefault(field, node[field])
+
+    def _collect(self, data: Any) -> None:
+        """攤平陣列與 @graph，登記頂層節點"""
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(reversed(item))
+            elif isinstance(item, dict):
+                self._add_node(item)
+                graph = item.get("@graph")
+                if isinstance(graph, list):
+                    stack.extend(reversed(graph))
+                elif isinstance(graph, dict):
+                    stack.append(graph)
+
+
+def _error_position(error: Exception) -> dict:
+    if isinstance(error, RecursionError):
+        return {"message": "nesting too deep", "line": None, "column": None}
+    return {
+        "message": getattr(error, "msg", str(error)),
+        "line": getattr(error, "lineno", None),
+        "column": getattr(error, "colno", None),
+    }
+
+
+def parse_json_ld(scripts: list[str]) -> JsonLdGraph:
+    """
+    解碼所有 JSON-LD 區塊並建立節點索引
+
+    Args:
+        scripts: JSON-LD 原始文字（PageIndex.json_ld）
+
+    Returns:
+        JsonLdGraph: 各區塊的解碼結果、有效性與節點索引
+    """
+    graph = JsonLdGraph()
+    for script in scripts:
+        try:
+            data = _loads(script)
+        except _DecodeError as e:
+            graph.blocks.append(JsonLdBlock(error=_error_position(e)))
+            continue
+        graph.blocks.append(JsonLdBlock(data))
+        graph._collect(data)
+    return graph
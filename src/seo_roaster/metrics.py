@@ -0,0 +1,303 @@
+"""
+監控指標 - 以 Prometheus 文字格式輸出 /metrics
+
+每個 process 的數值放在固定位置的 float64 陣列。設定 SEO_METRICS_DIR 時陣列是
+該目錄下以 pid 命名的 mmap 檔，/metrics 讀取目錄內所有檔案加總，多個 gunicorn
+worker 的數值才會合併（目錄需在啟動前清空）。沒有設定時只統計目前的 process。
+"""
+
+import bisect
+import itertools
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+
+METRICS_DIR_ENV = "SEO_METRICS_DIR"
+
+OUTCOMES = ("ok", "timeout", "ssl_error", "connection_error", "http_error", "invalid_url", "unknown")
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+CACHES = ("result", "dns", "reachability")
+RATE_LIMITED_ENDPOINTS = ("analyze", "analyze_batch_route")
+
+_MAGIC = b"SEOM"
+_HEADER = struct.Struct("<4sxxxxQ")
+_DOUBLE = struct.Struct("<d")
+_init_lock = threading.Lock()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Values:
+    """
+    本 process 的數值陣列
+
+    只有自己的 process 會寫入自己的檔案；fork 後（pid 改變）自動改用新檔案。
+    """
+
+    def __init__(self, size: int, layout_id: int, directory: Optional[str]):
+        self.size = size
+        self.layout_id = layout_id
+        self.directory = directory
+        self._pid: Optional[int] = None
+        self._buf = None
+        self._lock = threading.Lock()
+
+    def _path(self, pid: int) -> Path:
+        return Path(self.directory) / f"{pid}.metrics"
+
+    def _buffer(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._buf
+
+        with _init_lock:
+            if self._pid != pid:
+                self._open(pid)
+        return self._buf
+
+    def _open(self, pid: int) -> None:
+        # fork 後父 process 的鎖可能正被持有，一併重建
+        self._lock = threading.Lock()
+        length = _HEADER.size + _DOUBLE.size * self.size
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            # 每個 pid 只會開啟一次：同名檔案是已結束、pid 被重複使用的舊 process 留下的，
+            # 清空後再用，不能接著舊數值累加（ftruncate 補回的長度全部為 0）
+            fd = os.open(self._path(pid), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(fd, length)
+                buf = mmap.mmap(fd, length)
+            finally:
+                os.close(fd)
+        else:
+            buf = bytearray(length)
+        _HEADER.pack_into(buf, 0, _MAGIC, self.layout_id)
+        self._buf = buf
+        self._pid = pid
+
+    def add(self, offset: int, amount: float) -> None:
+        buf = self._buffer()
+        pos = _HEADER.size + offset * _DOUBLE.size
+        with self._lock:
+            (current,) = _DOUBLE.unpack_from(buf, pos)
+            _DOUBLE.pack_into(buf, pos, current + amount)
+
+    def _read(self, data) -> Optional[list[float]]:
+        if len(data) < _HEADER.size + _DOUBLE.size * self.size:
+            return None
+        magic, layout_id = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or layout_id != self.layout_id:
+            return None
+        return [_DOUBLE.unpack_from(data, _HEADER.size + i * _DOUBLE.size)[0] for i in range(self.size)]
+
+    def collect(self) -> tuple[list[float], list[float]]:
+        """
+        Returns:
+            tuple: (所有 process 的加總, 仍在執行的 process 的加總)，後者用於 gauge
+        """
+        totals = [0.0] * self.size
+        live = [0.0] * self.size
+        own = self._buffer()
+
+        if not self.directory:
+            sources = [(os.getpid(), bytes(own))]
+        else:
+            sources = []
+            for path in Path(self.directory).glob("*.metrics"):
+                try:
+                    sources.append((int(path.stem), path.read_bytes()))
+                except (ValueError, OSError):
+                    continue
+
+        for pid, data in sources:
+            values = self._read(data)
+            if values is None:
+                continue
+            alive = pid == os.getpid() or _pid_alive(pid)
+            for i, value in enumerate(values):
+                totals[i] += value
+                if alive:
+                    live[i] += value
+        return totals, live
+
+
+class _Metric:
+    def __init__(self, registry: "Registry", name: str, kind: str, help_text: str, labels: Optional[dict]):
+        self.registry = registry
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.label_names = tuple(labels or ())
+        # 所有標籤值的組合（事先固定，數值才能放在固定位置）
+        self.label_values = list(itertools.product(*labels.values())) if labels else [()]
+
+
+class Counter(_Metric):
+    def __init__(self, registry, name, help_text, labels=None):
+        super().__init__(registry, name, "counter", help_text, labels)
+        self.offsets = {values: registry._allocate(1) for values in self.label_values}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        offset = self.offsets.get(label_values)
+        if offset is not None:
+            self.registry.values.add(offset, amount)
+
+
+class Gauge(Counter):
+    def __init__(self, registry, name, help_text, labels=None):
+        super().__init__(registry, name, help_text, labels)
+        self.kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    def __init__(self, registry, name, help_text, buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, "histogram", help_text, None)
+        self.buckets = tuple(buckets)
+        # 各區間（非累積）、+Inf、sum、count
+        self.offset = registry._allocate(len(self.buckets) + 3)
+
+    def observe(self, value: float) -> None:
+        values = self.registry.values
+        values.add(self.offset + bisect.bisect_left(self.buckets, value), 1)
+        values.add(self.offset + len(self.buckets) + 1, value)
+        values.add(self.offset + len(self.buckets) + 2, 1)
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Registry:
+    """指標註冊表（所有指標須在第一次記錄前註冊）"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.metrics: list[_Metric] = []
+        self._size = 0
+        self._values: Optional[_Values] = None
+
+    def _allocate(self, count: int) -> int:
+        if self._values is not None:
+            raise RuntimeError("指標已開始記錄，不能再註冊")
+        offset = self._size
+        self._size += count
+        return offset
+
+    @property
+    def values(self) -> _Values:
+        if self._values is None:
+            layout = "\n".join(f"{m.kind}:{m.name}:{m.label_names}:{m.label_values}" for m in self.metrics)
+            self._values = _Values(self._size, zlib.crc32(layout.encode()), self.directory)
+        return self._values
+
+    def counter(self, name: str, help_text: str, labels: Optional[dict] = None) -> Counter:
+        metric = Counter(self, name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, labels: Optional[dict] = None) -> Gauge:
+        metric = Gauge(self, name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, help_text, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> tuple[str, list[float]]:
+        """
+        Returns:
+            tuple: (Prometheus 文字格式, 加總後的數值陣列)
+        """
+        totals, live = self.values.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                cumulative = 0.0
+                bounds = [*map(_format_value, metric.buckets), "+Inf"]
+                for i, bound in enumerate(bounds):
+                    cumulative += totals[metric.offset + i]
+                    lines.append(f'{metric.name}_bucket{{le="{bound}"}} {_format_value(cumulative)}')
+                lines.append(f"{metric.name}_sum {_format_value(totals[metric.offset + len(bounds)])}")
+                lines.append(f"{metric.name}_count {_format_value(totals[metric.offset + len(bounds) + 1])}")
+                continue
+            # gauge 只計算仍在執行的 process，counter 保留已結束 worker 的累計
+            source = live if metric.kind == "gauge" else totals
+            for label_values, offset in metric.offsets.items():
+                labels = _format_labels(metric.label_names, label_values)
+                lines.append(f"{metric.name}{labels} {_format_value(source[offset])}")
+        return "\n".join(lines) + "\n", totals
+
+
+REGISTRY = Registry(os.environ.get(METRICS_DIR_ENV) or None)
+
+ANALYSES = REGISTRY.counter("seo_analyses_total", "完成的分析數（依結果）", {"outcome": OUTCOMES})
+ANALYSIS_SECONDS = REGISTRY.histogram("seo_analysis_duration_seconds", "單次分析耗時（含快取命中）")
+FETCH_SECONDS = REGISTRY.histogram("seo_fetch_duration_seconds", "抓取耗時（DNS、各次請求與讀取內容）")
+DOWNLOADED_BYTES = REGISTRY.counter("seo_downloaded_bytes_total", "下載的內容位元組數（解壓後）")
+WIRE_BYTES = REGISTRY.counter("seo_downloaded_wire_bytes_total", "實際傳輸的內容位元組數（壓縮後）")
+CACHE_LOOKUPS = REGISTRY.counter(
+    "seo_cache_lookups_total", "快取查詢次數", {"cache": CACHES, "result": ("hit", "miss")}
+)
+RATE_LIMITED = REGISTRY.counter(
+    "seo_rate_limited_total", "被速率限制拒絕的請求數", {"endpoint": RATE_LIMITED_ENDPOINTS}
+)
+IN_FLIGHT = REGISTRY.gauge("seo_analyses_in_flight", "進行中的分析數")
+
+
+def cache_observer(cache: str):
+    """產生給 ResultCache / Resolver 的 on_lookup 回呼"""
+    def on_lookup(hit: bool) -> None:
+        CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+    return on_lookup
+
+
+def observe_analysis(result, timings) -> None:
+    """記錄一次分析的結果、耗時與下載量（result 為 AnalysisResult，timings 為該次分析的 Timings）"""
+    ANALYSES.inc(result.error or "ok")
+    ANALYSIS_SECONDS.observe(timings.elapsed())
+    fetch_seconds = timings.fetch_seconds()
+    if fetch_seconds is not None:
+        FETCH_SECONDS.observe(fetch_seconds)
+    if timings.bytes_read:
+        DOWNLOADED_BYTES.inc(amount=timings.bytes_read)
+    if timings.wire_bytes:
+        WIRE_BYTES.inc(amount=timings.wire_bytes)
+
+
+def render_metrics() -> str:
+    """輸出所有指標（另外附上由查詢次數換算的快取命中率）"""
+    text, totals = REGISTRY.render()
+    lines = [
+        "# HELP seo_cache_hit_ratio 快取命中率",
+        "# TYPE seo_cache_hit_ratio gauge",
+    ]
+    for cache in CACHES:
+        hits = totals[CACHE_LOOKUPS.offsets[(cache, "hit")]]
+        misses = totals[CACHE_LOOKUPS.offsets[(cache, "miss")]]
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        lines.append(f'seo_cache_hit_ratio{{cache="{cache}"}} {_format_value(ratio)}')
+    return text + "\n".join(lines) + "\n"
@@ -0,0 +1,198 @@
+"""網路層 - 共用連線池與連線層級的 SSRF 防護"""
+
+import http.cookiejar
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from .page_index import PageIndex
+from .resolver import RESOLVER, is_safe_ip
+
+logger = logging.getLogger(__name__)
+
+# 連線池設定
+POOL_HOSTS = 32          # 最多保留幾個主機的連線池
+POOL_MAXSIZE = 8         # 每個主機最多保留幾條閒置連線
+POOL_IDLE_TIMEOUT = 30   # 閒置超過幾秒的連線不再重用
+
+
+class UnsafeAddressError(ValueError):
+    """連線目標為內部網路位址"""
+
+
+def _check_peer(sock) -> None:
+    """檢查實際連上的對端位址，擋下 DNS rebinding 等繞過 URL 驗證的情況"""
+    peer_ip = sock.getpeername()[0]
+    if not is_safe_ip(peer_ip):
+        sock.close()
+        logger.warning(f"Blocked connection to internal address: {peer_ip}")
+        raise UnsafeAddressError("不允許存取內部網路位址")
+
+
+class _PinnedAddressMixin:
+    """
+    直接連線到解析器驗證過的位址
+
+    主機名稱只解析一次（通常 _validate_url 已放入快取），連線時不再交給
+    系統重新解析，驗證的位址就是實際連線的位址。Host 標頭與 TLS SNI
+    仍使用原本的主機名稱。
+    """
+
+    def _new_conn(self):
+        hostname = self._dns_host
+        last_error = None
+
+        for ip in RESOLVER.resolve_safe(hostname):
+            self._dns_host = ip
+            try:
+                sock = super()._new_conn()
+            except NewConnectionError as e:
+                # 連線被拒或無法連線時嘗試下一個位址（逾時直接往上拋）
+                last_error = e
+                continue
+            finally:
+                self._dns_host = hostname
+
+            _check_peer(sock)
+            return sock
+
+        raise last_error
+
+
+class SafeHTTPConnection(_PinnedAddressMixin, HTTPConnection):
+    """連線到已驗證位址的 HTTP 連線"""
+
+
+class SafeHTTPSConnection(_PinnedAddressMixin, HTTPSConnection):
+    """連線到已驗證位址的 HTTPS 連線（驗證在 TLS 交握前完成）"""
+
+
+class _IdleExpiryMixin:
+    """取用連線時丟棄閒置過久的連線"""
+
+    idle_timeout = POOL_IDLE_TIMEOUT
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        last_used = getattr(conn, "_last_used", None)
+        if last_used is not None and time.monotonic() - last_used > self.idle_timeout:
+            conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._last_used = time.monotonic()
+        super()._put_conn(conn)
+
+
+class SafeHTTPConnectionPool(_IdleExpiryMixin, HTTPConnectionPool):
+    ConnectionCls = SafeHTTPConnection
+
+
+class SafeHTTPSConnectionPool(_IdleExpiryMixin, HTTPSConnectionPool):
+    ConnectionCls = SafeHTTPSConnection
+
+
+class SafeAdapter(HTTPAdapter):
+    """使用安全連線池的 HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": SafeHTTPConnectionPool,
+            "https": SafeHTTPSConnectionPool,
+        }
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> str:
+    """以偵測到的編碼解碼內容（未指定或不認得的編碼改用 UTF-8，開頭的 BOM 去掉）"""
+    try:
+        text = str(body, encoding or "utf-8", "replace")
+    except LookupError:
+        text = str(body, "utf-8", "replace")
+    return text.removeprefix("\ufeff")
+
+
+class FetchResult:
+    """抓取結果（內容與抓取過程的資訊）"""
+
+    def __init__(self, url: str, status_code: int, headers):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        # 一般模式為 html，串流模式為 index，不解碼時為 body
+        self.html: Optional[str] = None
+        self.body: Optional[bytes] = None
+        self.index: Optional[PageIndex] = None
+        # 偵測到的編碼與偵測方式（見 charset.detect_encoding），不解碼時交給之後解碼的地方
+        self.encoding: Optional[str] = None
+        self.encoding_source: Optional[str] = None
+        # 解壓後的內容位元組數與實際收到的（壓縮）位元組數
+        self.bytes_read = 0
+        self.wire_bytes = 0
+        # 超過大小上限或總時限時只分析已讀取的部分
+        self.truncated = False
+
+    @property
+    def not_modified(self) -> bool:
+        """條件式請求命中（304 Not Modified）"""
+        return self.status_code == 304
+
+    def charset(self) -> Optional[dict]:
+        """採用的編碼與偵測方式（沒有偵測過時為 None）"""
+        if self.encoding_source is None:
+            return None
+        return {"name": self.encoding, "source": self.encoding_source}
+
+    def validators(self) -> dict:
+        """快取驗證用的 ETag / Last-Modified"""
+        return {
+            "etag": self.headers.get("ETag"),
+            "last_modified": self.headers.get("Last-Modified"),
+        }
+
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # 不使用環境變數的 proxy：連線層的 IP 檢查必須對應實際的目標主機
+    session.trust_env = False
+    # 不保存 cookie，避免不同使用者的分析互相影響
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+
+    adapter = SafeAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    取得整個 process 共用的 Session（執行緒安全，fork 後自動重建）
+
+    Returns:
+        requests.Session: 掛載安全連線池的 Session
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _create_session()
+            _session_pid = pid
+        return _session
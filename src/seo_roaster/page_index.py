@@ -0,0 +1,255 @@
+"""頁面索引 - 單次走訪 DOM，收集各項檢測需要的元素"""
+
+from html.parser import HTMLParser
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+from .json_ld import JsonLdGraph, parse_json_ld
+
+# 檢測會用到的標籤（只走訪一次 DOM）
+INDEXED_TAGS = ["html", "title", "meta", "link", "h1", "img", "script"]
+JSON_LD_TYPE = "application/ld+json"
+
+# 出現這些標籤代表 <head> 已結束（容忍省略 </head> 的寫法）
+BODY_START_TAGS = frozenset({
+    "body", "h1", "h2", "h3", "p", "div", "img", "main", "header", "nav",
+    "section", "article", "footer", "ul", "ol", "table", "form",
+})
+# <head> 內的這些標籤常包著 <img>（例如 <noscript> 裡的追蹤像素），
+# 其中的 BODY_START_TAGS 不代表 <head> 結束
+HEAD_CONTAINER_TAGS = frozenset({"noscript", "template"})
+
+
+class PageIndex:
+    """
+    檢測所需元素的精簡索引
+
+    同名的 meta / link 只保留第一個，與 soup.find 的行為一致。
+    """
+
+    def __init__(self):
+        # None 表示沒有該標籤
+        self.title: Optional[str] = None
+        self.html_lang: Optional[str] = None
+        # meta name / property → content（原始值，未 strip）
+        self.meta_names: dict[str, str] = {}
+        self.meta_properties: dict[str, str] = {}
+        # link rel → href（rel 的每個 token 與完整字串都會建索引）
+        self.link_hrefs: dict[str, str] = {}
+        self.hreflangs: list[str] = []
+        # 與 hreflangs 對應的 href
+        self.hreflang_hrefs: list[str] = []
+        self.h1_texts: list[str] = []
+        self.img_total = 0
+        self.img_with_alt = 0
+        # JSON-LD 原始文字
+        self.json_ld: list[str] = []
+        self._json_ld_graph: Optional[JsonLdGraph] = None
+        # <a href>（僅在 collect_links 時收集，供爬蟲使用）
+        self.links: list[str] = []
+
+    def meta_name(self, name: str) -> Optional[str]:
+        """取得 meta name 的 content，沒有該標籤回傳 None"""
+        return self.meta_names.get(name)
+
+    def meta_property(self, prop: str) -> Optional[str]:
+        """取得 meta property 的 content，沒有該標籤回傳 None"""
+        return self.meta_properties.get(prop)
+
+    def link_href(self, rel: str) -> Optional[str]:
+        """取得 link rel 的 href，沒有該標籤回傳 None"""
+        return self.link_hrefs.get(rel)
+
+    @property
+    def json_ld_graph(self) -> JsonLdGraph:
+        """解碼後的 JSON-LD（第一次存取時解碼，之後各檢測共用）"""
+        if self._json_ld_graph is None:
+            self._json_ld_graph = parse_json_ld(self.json_ld)
+        return self._json_ld_graph
+
+    def add_link(self, rel, href: str, hreflang: Optional[str]) -> None:
+        """登記一個 link 標籤"""
+        tokens = rel.split() if isinstance(rel, str) else list(rel)
+        if not tokens:
+            return
+        for key in {*tokens, " ".join(tokens)}:
+            self.link_hrefs.setdefault(key, href)
+        if "alternate" in tokens and hreflang is not None:
+            self.hreflangs.append(hreflang)
+            self.hreflang_hrefs.append(href)
+
+
+def build_index(soup: BeautifulSoup, collect_links: bool = False) -> PageIndex:
+    """
+    單次走訪 DOM 建立索引
+
+    Args:
+        soup: 已解析的 BeautifulSoup 物件
+        collect_links: 是否一併收集 <a href>
+
+    Returns:
+        PageIndex: 檢測所需的元素索引
+    """
+    index = PageIndex()
+    tags = INDEXED_TAGS + ["a"] if collect_links else INDEXED_TAGS
+
+    for tag in soup.find_all(tags):
+        name = tag.name
+        if name == "a":
+            href = tag.get("href")
+            if href:
+                index.links.append(href)
+        elif name == "meta":
+            content = tag.get("content", "")
+            meta_name = tag.get("name")
+            if meta_name is not None:
+                index.meta_names.setdefault(meta_name, content)
+            meta_prop = tag.get("property")
+            if meta_prop is not None:
+                index.meta_properties.setdefault(meta_prop, content)
+        elif name == "link":
+            rel = tag.get("rel")
+            if rel:
+                index.add_link(rel, tag.get("href", ""), tag.get("hreflang"))
+        elif name == "img":
+            index.img_total += 1
+            if tag.get("alt", "").strip():
+                index.img_with_alt += 1
+        elif name == "h1":
+            index.h1_texts.append(tag.get_text(strip=True))
+        elif name == "script":
+            if tag.get("type") == JSON_LD_TYPE:
+                index.json_ld.append(tag.string or "{}")
+        elif name == "title":
+            if index.title is None:
+                # 使用 get_text() 而非 .string，避免 title 有子元素時回傳 None
+                index.title = tag.get_text(strip=True)
+        elif name == "html":
+            if index.html_lang is None:
+                index.html_lang = tag.get("lang", "").strip()
+
+    return index
+
+
+class StreamingIndexer(HTMLParser):
+    """
+    串流索引器 - 邊下載邊解析，不建立 DOM 樹
+
+    <head> 結束後 head_complete 會變成 True，此時 head 相關的資料已確定；
+    之後只彙整 body 中 H1、圖片與 JSON-LD 需要的資料。head_closed 只在看到
+    </head> 或 <body> 時為 True（head_complete 也可能由 <div> 之類的標籤推斷）。
+    """
+
+    def __init__(self, collect_links: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.index = PageIndex()
+        self.collect_links = collect_links
+        self.head_complete = False
+        self.head_closed = False
+        self._seen_tag = False
+        # 目前在幾層 HEAD_CONTAINER_TAGS 內
+        self._container_depth = 0
+        # 目前正在收集文字的對象："title" / "h1" / "json_ld" / None
+        self._capture: Optional[str] = None
+        self._pieces: list[str] = []
+        self._raw: list[str] = []
+
+    def _flush_text(self) -> None:
+        """將目前的文字節點併入收集結果（比照 get_text(strip=True)）"""
+        if self._raw:
+            text = "".join(self._raw)
+            self._raw = []
+            if self._capture == "json_ld":
+                self._pieces.append(text)
+            else:
+                text = text.strip()
+                if text:
+                    self._pieces.append(text)
+
+    def _start_capture(self, target: str) -> None:
+        self._finish_capture()
+        self._capture = target
+        self._pieces = []
+
+    def _finish_capture(self) -> None:
+        """結束收集並寫入索引"""
+        if self._capture is None:
+            return
+        self._flush_text()
+        text = "".join(self._pieces)
+        if self._capture == "title":
+            if self.index.title is None:
+                self.index.title = text
+        elif self._capture == "h1":
+            self.index.h1_texts.append(text)
+        elif self._capture == "json_ld":
+            self.index.json_ld.append(text or "{}")
+        self._capture = None
+        self._pieces = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        attr_map = {k: (v if v is not None else "") for k, v in attrs}
+        self._seen_tag = True
+
+        if tag in HEAD_CONTAINER_TAGS:
+            self._container_depth += 1
+        elif tag == "body" or (tag in BODY_START_TAGS and not self._container_depth):
+            self.head_complete = True
+            self.head_closed = self.head_closed or tag == "body"
+
+        if tag == "a":
+            if self.collect_links and attr_map.get("href"):
+                self.index.links.append(attr_map["href"])
+        elif tag == "meta":
+            content = attr_map.get("content", "")
+            if "name" in attr_map:
+                self.index.meta_names.setdefault(attr_map["name"], content)
+            if "property" in attr_map:
+                self.index.meta_properties.setdefault(attr_map["property"], content)
+        elif tag == "link":
+            rel = attr_map.get("rel")
+            if rel:
+                self.index.add_link(rel, attr_map.get("href", ""), attr_map.get("hreflang"))
+        elif tag == "img":
+            self.index.img_total += 1
+            if attr_map.get("alt", "").strip():
+                self.index.img_with_alt += 1
+        elif tag == "h1":
+            self._start_capture("h1")
+        elif tag == "title":
+            if self.index.title is None and self._capture is None:
+                self._start_capture("title")
+        elif tag == "script":
+            if attr_map.get("type") == JSON_LD_TYPE:
+                self._start_capture("json_ld")
+        elif tag == "html":
+            if self.index.html_lang is None:
+                self.index.html_lang = attr_map.get("lang", "").strip()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == "head":
+            self.head_complete = True
+            self.head_closed = True
+        elif tag in HEAD_CONTAINER_TAGS and self._container_depth:
+            self._container_depth -= 1
+        if tag == self._capture or (tag == "script" and self._capture == "json_ld"):
+            self._finish_capture()
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._raw.append(data)
+
+    def close(self) -> PageIndex:
+        """結束解析並回傳索引"""
+        super().close()
+        self._finish_capture()
+        if self.index.html_lang is None and self._seen_tag:
+            # lxml 會自動補上 <html>，維持相同的判定
+            self.index.html_lang = ""
+        return self.index
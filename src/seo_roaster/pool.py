@@ -0,0 +1,286 @@
+"""
+解析行程池 - 把解析與檢測交給常駐的子 process
+
+BeautifulSoup / lxml 的解析與各項檢測是受 GIL 限制的 CPU 工作，在執行緒中跑會
+互相排隊。啟用行程池時，抓取仍在 I/O 層（event loop 或請求執行緒）完成，原始內容
+交給子 process 解碼、解析並執行檢測，再以精簡的 pickle 傳回 AnalysisResult。
+
+- 子 process 常駐並預先載入分析模組，不必每次重新 import
+- 單次任務超過 task_timeout 時直接結束該子 process 並補上新的
+- 每個子 process 處理 max_tasks 次後自行結束並補上新的，避免記憶體持續成長
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROCESSES_ENV = "SEO_PARSE_PROCESSES"
+TIMEOUT_ENV = "SEO_PARSE_TIMEOUT"
+MAX_TASKS_ENV = "SEO_PARSE_MAX_TASKS"
+
+DEFAULT_TASK_TIMEOUT = 10.0
+DEFAULT_MAX_TASKS = 200
+
+
+class ParseTimeoutError(TimeoutError):
+    """解析與檢測超過時限（子 process 已被結束）"""
+
+
+class ParseWorkerError(RuntimeError):
+    """子 process 意外結束（例如被系統 OOM killer 結束）"""
+
+
+def _run_task(task: tuple):
+    """在子 process 中解碼、解析並執行檢測"""
+    from .analyzer import SEOAnalyzer
+    from .checks import select_checks
+    from .net import FetchResult, decode_body
+    from .timing import Timings, now
+
+    analyzer_cls, url, status_code, body, encoding, encoding_source, parser, check_keys, deep, timed = task
+    timings = Timings() if timed else None
+    analyzer: SEOAnalyzer = analyzer_cls(parser=parser, timings=timings, deep=deep)
+
+    fetched = FetchResult(url, status_code, {})
+    fetched.encoding = encoding
+    fetched.encoding_source = encoding_source
+    if analyzer._parses_bytes(encoding):
+        # lxml 直接解析原始內容
+        fetched.body = body
+    else:
+        started = now()
+        fetched.html = decode_body(body, encoding)
+        if timings is not None:
+            timings.add("decode", started)
+
+    selected = analyzer.CHECKS if check_keys is None else select_checks(analyzer.CHECKS, check_keys)
+    result = analyzer._analyze_fetched(fetched, selected)
+    return result, timings.spans if timings is not None else None
+
+
+def _worker_main(conn, max_tasks: int, preload: str) -> None:
+    # 中斷訊號由父 process 處理（例如 gunicorn 關閉時）
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    __import__(preload)
+
+    handled = 0
+    while not max_tasks or handled < max_tasks:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+
+        try:
+            reply = (True, _run_task(task))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # 例外本身無法 pickle 時只傳回說明
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+        handled += 1
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "tasks")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+
+
+class ParsePool:
+    """
+    解析行程池（執行緒安全）
+
+    子 process 在第一次使用時啟動（fork 後會在新的 process 重新啟動）。
+    每個進行中的任務佔用一條等待執行緒，analyze_async 使用行程池自己的等待執行緒。
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        task_timeout: float = DEFAULT_TASK_TIMEOUT,
+        max_tasks: int = DEFAULT_MAX_TASKS,
+    ):
+        """
+        Args:
+            size: 子 process 數量，預設為 CPU 核心數
+            task_timeout: 單次解析與檢測的時限（秒），超過就結束該子 process
+            max_tasks: 每個子 process 處理幾次後換新（0 表示不換）
+        """
+        self.size = max(1, size or os.cpu_count() or 1)
+        self.task_timeout = task_timeout
+        self.max_tasks = max_tasks
+        # forkserver 不會複製父 process 的執行緒（背景 event loop、連線池），比直接 fork 安全
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(method)
+        self._preload = f"{__package__}.analyzer"
+        if method == "forkserver":
+            self._ctx.set_forkserver_preload([self._preload])
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._waiters: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.recycled = 0
+        self.killed = 0
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_tasks, self._preload),
+            name="seo-parse",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            # fork 後繼承來的子 process 屬於父 process，不能使用
+            self._idle = queue.Queue()
+            self._waiters = None
+            for _ in range(self.size):
+                self._idle.put(self._spawn())
+            self._pid = pid
+
+    def _retire(self, worker: _Worker, kill: bool) -> None:
+        """結束子 process（kill 時強制結束）並補上新的"""
+        if kill:
+            worker.process.kill()
+        worker.process.join(1)
+        worker.conn.close()
+        self._idle.put(self._spawn())
+
+    def run(self, task: tuple):
+        """
+        執行任務並等待結果（阻塞）
+
+        Raises:
+            ParseTimeoutError: 超過 task_timeout
+            ParseWorkerError: 子 process 意外結束
+        """
+        self._ensure_started()
+        worker = self._idle.get()
+        try:
+            worker.conn.send(task)
+            ready = worker.conn.poll(self.task_timeout)
+            if ready:
+                ok, payload = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._retire(worker, kill=True)
+            raise ParseWorkerError(f"解析子 process 意外結束：{e}") from e
+
+        if not ready:
+            self.killed += 1
+            logger.warning(f"Parse task exceeded {self.task_timeout}s, killing worker {worker.process.pid}")
+            self._retire(worker, kill=True)
+            raise ParseTimeoutError(f"解析超過 {self.task_timeout} 秒")
+
+        worker.tasks += 1
+        if self.max_tasks and worker.tasks >= self.max_tasks:
+            # 子 process 已自行結束
+            self.recycled += 1
+            self._retire(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+        if not ok:
+            raise payload
+        return payload
+
+    def analyze(self, analyzer, fetched, selected: tuple):
+        """
+        在子 process 解析 fetched.body 並執行選取的檢測
+
+        子 process 以 analyzer 的類別與解析模式建立新的 analyzer；子 process 的
+        各階段耗時會併入 analyzer.timings。
+
+        Returns:
+            AnalysisResult: 與 analyzer._analyze_fetched 相同的結果（深度模式的 targets
+                也由子 process 找出，探測在呼叫端進行）
+        """
+        check_keys = None if selected is analyzer.CHECKS else [check.key for check in selected]
+        task = (
+            type(analyzer),
+            fetched.url,
+            fetched.status_code,
+            fetched.body or b"",
+            fetched.encoding,
+            fetched.encoding_source,
+            analyzer.parser,
+            check_keys,
+            analyzer.deep,
+            analyzer.timings is not None,
+        )
+        result, spans = self.run(task)
+        if spans:
+            analyzer.timings.merge(spans)
+        # 子 process 沒有回應標頭，由這裡補上
+        result.truncated = fetched.truncated
+        result.validators = fetched.validators()
+        result.weights = analyzer.WEIGHTS
+        return result
+
+    async def analyze_async(self, analyzer, fetched, selected: tuple):
+        """analyze 的非同步版（在行程池的等待執行緒上等待結果）"""
+        self._ensure_started()
+        if self._waiters is None:
+            with self._lock:
+                if self._waiters is None:
+                    self._waiters = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.size,
+                        thread_name_prefix="seo-parse-wait",
+                    )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._waiters, self.analyze, analyzer, fetched, selected)
+
+    def close(self) -> None:
+        """結束所有閒置的子 process"""
+        if self._pid != os.getpid():
+            return
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.conn.close()
+        self._pid = None
+
+
+def create_pool() -> Optional[ParsePool]:
+    """依環境變數建立行程池：SEO_PARSE_PROCESSES 未設定或為 0 時不使用"""
+    size = int(os.environ.get(PROCESSES_ENV) or 0)
+    if size <= 0:
+        return None
+    return ParsePool(
+        size=size,
+        task_timeout=float(os.environ.get(TIMEOUT_ENV) or DEFAULT_TASK_TIMEOUT),
+        max_tasks=int(os.environ.get(MAX_TASKS_ENV) or DEFAULT_MAX_TASKS),
+    )
@@ -0,0 +1,210 @@
+"""
+速率限制 - 滑動視窗計數器，每個用戶端只佔固定大小的狀態
+
+估計值 = 上一個視窗的次數 × 上一個視窗仍落在滑動範圍內的比例 + 目前視窗的次數，
+估計值未達上限才放行。狀態由可替換的 backend 保存：MemoryBackend 為單一 process
+用（分片鎖、自動淘汰閒置的 key），SQLiteBackend 讓同一台機器上的多個 worker 共用。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+RATE_LIMIT_DB_ENV = "SEO_RATE_LIMIT_DB"
+
+DEFAULT_SHARDS = 16
+# 每個分片最多保留幾個 key（超過時淘汰最久沒出現的）
+DEFAULT_MAX_KEYS_PER_SHARD = 4096
+# 每隔幾次請求順便清除閒置的 key
+SWEEP_EVERY = 256
+
+
+def _estimate(window_start: float, current: int, previous: int, window: float, now: float) -> tuple[float, int, int]:
+    """
+    推進視窗並計算估計值
+
+    Returns:
+        tuple: (目前視窗起點, 目前視窗次數, 上一個視窗次數)
+    """
+    start = now - now % window
+    if start != window_start:
+        # 剛好是下一個視窗時，目前的次數變成上一個視窗；更久以前的歸零
+        previous = current if start - window_start == window else 0
+        current = 0
+        window_start = start
+    return window_start, current, previous
+
+
+def _allowed(window_start: float, current: int, previous: int, limit: int, window: float, now: float) -> bool:
+    weight = 1 - (now - window_start) / window
+    return previous * weight + current < limit
+
+
+class RateLimitBackend:
+    """速率限制狀態的儲存介面"""
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        """
+        記錄一次請求
+
+        Args:
+            key: 用戶端識別（例如 "端點:IP"）
+            limit: 視窗內最多幾次
+            window: 視窗長度（秒）
+
+        Returns:
+            bool: True 表示放行，False 表示超過限制（被拒絕的請求不計入）
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class _Shard:
+    __slots__ = ("lock", "entries", "hits")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key → [視窗起點, 目前次數, 上一個視窗次數, 視窗長度]
+        self.entries: "OrderedDict[str, list]" = OrderedDict()
+        self.hits = 0
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    單一 process 的記憶體 backend（執行緒安全）
+
+    key 依雜湊分到不同分片，各分片有自己的鎖；每個分片有 key 數上限，
+    並每隔 SWEEP_EVERY 次請求清掉超過兩個視窗沒出現的 key。
+    """
+
+    def __init__(self, shards: int = DEFAULT_SHARDS, max_keys_per_shard: int = DEFAULT_MAX_KEYS_PER_SHARD):
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        now = time.monotonic()
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                entry = shard.entries[key] = [now - now % window, 0, 0, window]
+            else:
+                shard.entries.move_to_end(key)
+
+            entry[0], entry[1], entry[2] = _estimate(entry[0], entry[1], entry[2], window, now)
+            allowed = _allowed(entry[0], entry[1], entry[2], limit, window, now)
+            if allowed:
+                entry[1] += 1
+
+            shard.hits += 1
+            if shard.hits % SWEEP_EVERY == 0:
+                self._sweep(shard, now)
+            while len(shard.entries) > self.max_keys_per_shard:
+                shard.entries.popitem(last=False)
+        return allowed
+
+    @staticmethod
+    def _sweep(shard: _Shard, now: float) -> None:
+        """清除閒置的 key（依最近出現順序排列，遇到仍在使用的就停止）"""
+        while shard.entries:
+            key, entry = next(iter(shard.entries.items()))
+            if now - entry[0] < 2 * entry[3]:
+                break
+            del shard.entries[key]
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    SQLite backend（WAL 模式），同一台機器上的多個 worker 共用限制
+
+    每個執行緒各自一條連線，fork 後自動重建；每次請求一個 IMMEDIATE 交易，
+    並每隔 SWEEP_EVERY 次請求刪除閒置的 key。
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT PRIMARY KEY,
+        window_start REAL NOT NULL,
+        current INTEGER NOT NULL,
+        previous INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+        self._connect().close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(self.SCHEMA)
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, "pid", None) != pid:
+            local.conn = self._connect()
+            local.pid = pid
+        return local.conn
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        # 各 process 的 monotonic 時鐘不同，共用狀態要用牆上時間
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            window_start, current, previous = row if row else (now - now % window, 0, 0)
+            window_start, current, previous = _estimate(window_start, current, previous, window, now)
+            allowed = _allowed(window_start, current, previous, limit, window, now)
+            if allowed:
+                current += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, window_start, current, previous, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, window_start, current, previous, window_start + 2 * window),
+            )
+
+            self._hits += 1
+            if self._hits % SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE expires_at < ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM rate_limits")
+
+
+def create_backend(path: Optional[str] = None) -> RateLimitBackend:
+    """依設定建立 backend：有指定 SQLite 路徑（或 SEO_RATE_LIMIT_DB）時跨 worker 共用"""
+    path = path or os.environ.get(RATE_LIMIT_DB_ENV)
+    if path:
+        return SQLiteBackend(path)
+    return MemoryBackend()
@@ -0,0 +1,187 @@
+"""
+連結可達性 - 深度模式下確認 canonical、og:image、favicon、hreflang 指向的網址存在
+
+所有目標在 event loop 上同時探測：先送 HEAD，伺服器不支援 HEAD 時改用只要第一個
+位元組的 Range GET。每個目標有自己的時限，整體另有總時限，增加的延遲接近最慢的
+一個探測，而不是全部加總。每個目標（含每次重定向）都經過與抓取頁面相同的 SSRF
+檢查。探測結果以正規化網址為 key 快取在整個 process 共用的 STATUS_CACHE，
+許多頁面引用同一批 CDN 資源時不必重複探測。
+"""
+
+import asyncio
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+import requests
+
+from .aio import open_async
+from .cache import normalize_url
+
+# 單一目標的時限與整體的總時限（秒）
+PROBE_TIMEOUT = 3.0
+TOTAL_TIMEOUT = 5.0
+# 探測結果的快取秒數：有 HTTP 狀態的結果較穩定，連線失敗或逾時較快重試
+POSITIVE_TTL = 600
+NEGATIVE_TTL = 60
+MAX_ENTRIES = 8192
+# 單一檢測最多探測幾個網址（hreflang 可能列出數十個語系）
+MAX_TARGETS = 20
+# HEAD 回這些狀態時改用 Range GET 再試一次（不支援 HEAD，或 CDN 簽章只接受 GET）
+HEAD_FALLBACK_STATUSES = (400, 403, 405, 501)
+
+# 沒有 HTTP 狀態時的失敗原因（與 AnalysisResult.error 的分類相同）
+ERROR_TIMEOUT = "timeout"
+ERROR_INVALID_URL = "invalid_url"
+ERROR_SSL = "ssl_error"
+ERROR_CONNECTION = "connection_error"
+# 網址本身無法編碼成請求（例如主機名稱不是合法的域名），與網路失敗分開
+ERROR_ENCODING = "encoding_error"
+
+
+class Probe:
+    """單一網址的探測結果：HTTP 狀態碼，或無法取得回應時的失敗原因"""
+
+    __slots__ = ("status", "error")
+
+    def __init__(self, status: Optional[int] = None, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        # 416 表示資源存在但內容是空的（只會在 Range GET 出現）
+        return self.error is None and (self.status < 400 or self.status == 416)
+
+    def to_dict(self) -> dict:
+        return {"status": self.status} if self.error is None else {"error": self.error}
+
+    def __repr__(self) -> str:
+        return f"Probe({self.to_dict()!r})"
+
+
+class _Entry:
+    __slots__ = ("probe", "expires_at")
+
+    def __init__(self, probe: Probe, expires_at: float):
+        self.probe = probe
+        self.expires_at = expires_at
+
+
+class StatusCache:
+    """
+    網址 → 探測結果的快取（執行緒安全，LRU 淘汰）
+
+    成功與失敗分別以不同 TTL 快取，整個 process 的分析共用。
+    """
+
+    def __init__(self, ttl: float = POSITIVE_TTL, negative_ttl: float = NEGATIVE_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次查詢快取後以 on_lookup(命中與否) 通知（例如匯出監控指標）
+        self.on_lookup: Optional[Callable[[bool], None]] = None
+
+    def get(self, url: str) -> Optional[Probe]:
+        # normalize_url 不會拋出例外，無法解析的網址原樣當作 key
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if self.on_lookup is not None:
+            self.on_lookup(entry is not None)
+        return entry.probe if entry is not None else None
+
+    def put(self, url: str, probe: Probe) -> None:
+        ttl = self.ttl if probe.error is None else self.negative_ttl
+        key = normalize_url(url)
+        with self._lock:
+            self._entries[key] = _Entry(probe, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# 整個 process 共用的探測結果快取
+STATUS_CACHE = StatusCache()
+
+
+async def probe(analyzer, url: str, timeout: float = PROBE_TIMEOUT) -> Probe:
+    """
+    探測單一網址（跟隨重定向，只讀取回應標頭）
+
+    Args:
+        analyzer: SEOAnalyzer，提供 URL 檢查與請求標頭（timeout 為單次操作的逾時）
+        url: 要探測的絕對網址
+        timeout: 這個網址的總時限（含 DNS、重定向與 HEAD 失敗後的 GET）
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    try:
+        conn, _ = await open_async(analyzer, url, deadline, method="HEAD")
+        conn.close()
+        if conn.status_code in HEAD_FALLBACK_STATUSES:
+            conn, _ = await open_async(analyzer, url, deadline, headers={"Range": "bytes=0-0"})
+            conn.close()
+        return Probe(conn.status_code)
+    except asyncio.TimeoutError:
+        return Probe(error=ERROR_TIMEOUT)
+    except (ssl.SSLError, ssl.CertificateError):
+        return Probe(error=ERROR_SSL)
+    except UnicodeError:
+        # UnicodeError 是 ValueError 的子類別，要先攔下
+        return Probe(error=ERROR_ENCODING)
+    except ValueError:
+        # SSRF 防護、無法解析的域名或重定向次數過多
+        return Probe(error=ERROR_INVALID_URL)
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, requests.exceptions.RequestException):
+        return Probe(error=ERROR_CONNECTION)
+
+
+async def check_urls(
+    analyzer,
+    urls: Iterable[str],
+    timeout: float = PROBE_TIMEOUT,
+    total_timeout: float = TOTAL_TIMEOUT,
+    cache: Optional[StatusCache] = STATUS_CACHE,
+) -> dict[str, Probe]:
+    """
+    同時探測多個網址（快取命中的不再探測）
+
+    超過總時限還沒完成的探測會被取消並記為 timeout（不寫入快取）。
+
+    Returns:
+        dict: 網址 → Probe
+    """
+    results: dict[str, Probe] = {}
+    pending: dict[str, asyncio.Task] = {}
+    for url in dict.fromkeys(urls):
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None:
+            results[url] = cached
+        else:
+            pending[url] = asyncio.create_task(probe(analyzer, url, timeout))
+    if not pending:
+        return results
+
+    done, _ = await asyncio.wait(pending.values(), timeout=total_timeout)
+    for url, task in pending.items():
+        if task in done:
+            results[url] = task.result()
+            if cache is not None:
+                cache.put(url, results[url])
+        else:
+            task.cancel()
+            results[url] = Probe(error=ERROR_TIMEOUT)
+    return results
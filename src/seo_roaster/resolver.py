@@ -0,0 +1,189 @@
+"""DNS 解析 - 帶 TTL 的解析快取與 IP 安全檢查（SSRF 防護）"""
+
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+# getaddrinfo 不提供 DNS 記錄的 TTL，使用固定的快取時間
+POSITIVE_TTL = 60      # 解析成功的快取秒數
+NEGATIVE_TTL = 10      # 解析失敗的快取秒數
+MAX_ENTRIES = 4096
+
+
+def is_safe_ip(ip_str: str) -> bool:
+    """
+    檢查 IP 是否安全（非內部網路）
+
+    Args:
+        ip_str: IP 位址字串
+
+    Returns:
+        bool: True 表示安全，False 表示危險
+    """
+    try:
+        ip = ipaddress.ip_address(ip_str)
+        # 阻擋私有網路、本地迴環、保留 IP、連結本地
+        if ip.is_private or ip.is_loopback or ip.is_reserved or ip.is_link_local:
+            return False
+        # 阻擋 AWS/GCP metadata endpoint
+        if ip_str.startswith("169.254."):
+            return False
+        return True
+    except ValueError:
+        return False
+
+
+def is_ip_address(hostname: str) -> bool:
+    """主機名稱是否為 IP 位址"""
+    try:
+        ipaddress.ip_address(hostname)
+        return True
+    except ValueError:
+        return False
+
+
+class _Answer:
+    __slots__ = ("addresses", "expires_at")
+
+    def __init__(self, addresses: Optional[list[str]], expires_at: float):
+        # None 表示解析失敗（negative cache）
+        self.addresses = addresses
+        self.expires_at = expires_at
+
+
+class Resolver:
+    """
+    DNS 解析快取（執行緒安全）
+
+    回傳所有 A / AAAA 位址；成功與失敗分別以不同 TTL 快取。
+    """
+
+    def __init__(self, ttl: float = POSITIVE_TTL, negative_ttl: float = NEGATIVE_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._answers: "OrderedDict[str, _Answer]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次查詢快取後以 on_lookup(命中與否) 通知（例如匯出監控指標）
+        self.on_lookup: Optional[Callable[[bool], None]] = None
+
+    def _lookup(self, key: str) -> Optional[_Answer]:
+        answer = self._find(key)
+        if self.on_lookup is not None:
+            self.on_lookup(answer is not None)
+        return answer
+
+    def _find(self, key: str) -> Optional[_Answer]:
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is None:
+                return None
+            if answer.expires_at <= time.monotonic():
+                del self._answers[key]
+                return None
+            self._answers.move_to_end(key)
+            return answer
+
+    def _store(self, key: str, addresses: Optional[list[str]]) -> None:
+        ttl = self.ttl if addresses else self.negative_ttl
+        with self._lock:
+            self._answers[key] = _Answer(addresses, time.monotonic() + ttl)
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    @staticmethod
+    def _addresses(infos) -> list[str]:
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    def resolve(self, hostname: str) -> list[str]:
+        """
+        解析主機名稱
+
+        Returns:
+            list: 所有位址（IP 位址直接回傳）
+
+        Raises:
+            socket.gaierror: 無法解析
+        """
+        if is_ip_address(hostname):
+            return [hostname]
+
+        key = hostname.lower().rstrip(".")
+        answer = self._lookup(key)
+        if answer is None:
+            try:
+                addresses = self._addresses(socket.getaddrinfo(key, None, type=socket.SOCK_STREAM))
+            except socket.gaierror:
+                addresses = None
+            self._store(key, addresses)
+            answer = _Answer(addresses, 0)
+
+        if not answer.addresses:
+            raise socket.gaierror(socket.EAI_NONAME, "無法解析域名")
+        return answer.addresses
+
+    async def resolve_async(self, hostname: str) -> list[str]:
+        """非同步版 resolve（使用 event loop 的 getaddrinfo）"""
+        if is_ip_address(hostname):
+            return [hostname]
+
+        key = hostname.lower().rstrip(".")
+        answer = self._lookup(key)
+        if answer is None:
+            loop = asyncio.get_running_loop()
+            try:
+                infos = await loop.getaddrinfo(key, None, type=socket.SOCK_STREAM)
+                addresses = self._addresses(infos)
+            except socket.gaierror:
+                addresses = None
+            self._store(key, addresses)
+            answer = _Answer(addresses, 0)
+
+        if not answer.addresses:
+            raise socket.gaierror(socket.EAI_NONAME, "無法解析域名")
+        return answer.addresses
+
+    @staticmethod
+    def _check_safe(hostname: str, addresses: list[str]) -> list[str]:
+        if not all(is_safe_ip(ip) for ip in addresses):
+            if is_ip_address(hostname):
+                raise ValueError("不允許存取內部網路位址")
+            raise ValueError("域名解析到內部網路位址，已阻擋")
+        return addresses
+
+    def resolve_safe(self, hostname: str) -> list[str]:
+        """
+        解析並確認所有位址都不是內部網路
+
+        Returns:
+            list: 已驗證的位址
+
+        Raises:
+            ValueError: 無法解析或解析到內部網路位址
+        """
+        try:
+            addresses = self.resolve(hostname)
+        except socket.gaierror:
+            raise ValueError("無法解析域名")
+        return self._check_safe(hostname, addresses)
+
+    async def resolve_safe_async(self, hostname: str) -> list[str]:
+        """非同步版 resolve_safe"""
+        try:
+            addresses = await self.resolve_async(hostname)
+        except socket.gaierror:
+            raise ValueError("無法解析域名")
+        return self._check_safe(hostname, addresses)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._answers.clear()
+
+
+# 整個 process 共用的解析器
+RESOLVER = Resolver()
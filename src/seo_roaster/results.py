@@ -0,0 +1,278 @@
+"""
+分析結果模型 - 固定欄位的檢測結果與分析結果
+
+欄位沒有設定時為 UNSET，輸出 JSON / dict 時省略，因此形狀與原本各檢測回傳的
+dict 相同。兩者都用 __slots__，可直接 pickle 或以 to_json() 序列化存進快取。
+"""
+
+import json
+from operator import attrgetter
+from typing import Any, Optional
+
+try:
+    # 有安裝 orjson 時用它輸出 JSON
+    import orjson
+
+    def _encode(data) -> str:
+        return orjson.dumps(data, default=str).decode()
+except ImportError:
+    _encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+
+
+class _Unset:
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return "UNSET"
+
+    def __reduce__(self):
+        return "UNSET"
+
+
+UNSET: Any = _Unset()
+
+
+class CheckResult:
+    """
+    單一檢測的結果
+
+    passed / message / value 之外的欄位依檢測而定（例如 title 有 length、
+    h1 有 count、img_alt 有 total / with_alt / ratio）。
+    """
+
+    __slots__ = FIELDS = (
+        "passed",
+        "message",
+        "value",
+        "length",
+        "count",
+        "total",
+        "with_alt",
+        "ratio",
+        "valid",
+        "invalid",
+        "errors",
+    )
+
+    def __init__(
+        self,
+        passed: bool,
+        message: Optional[str] = UNSET,
+        value: Any = UNSET,
+        *,
+        length: int = UNSET,
+        count: int = UNSET,
+        total: int = UNSET,
+        with_alt: int = UNSET,
+        ratio: float = UNSET,
+        valid: int = UNSET,
+        invalid: int = UNSET,
+        errors: list = UNSET,
+    ):
+        self.passed = passed
+        self.message = message
+        self.value = value
+        self.length = length
+        self.count = count
+        self.total = total
+        self.with_alt = with_alt
+        self.ratio = ratio
+        self.valid = valid
+        self.invalid = invalid
+        self.errors = errors
+
+    def get(self, name: str, default=None):
+        """取得欄位（沒有設定時回傳 default），讓吐槽模板可以直接讀取"""
+        value = getattr(self, name, UNSET)
+        return default if value is UNSET else value
+
+    def to_dict(self) -> dict:
+        return {name: value for name, value in zip(self.FIELDS, _check_fields(self)) if value is not UNSET}
+
+    def to_json(self) -> str:
+        return _encode(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CheckResult":
+        return cls(**data)
+
+    def __reduce__(self):
+        # 只序列化欄位值（不含欄位名稱），跨 process 傳遞時較精簡
+        return _restore_check, _check_fields(self)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CheckResult):
+            return NotImplemented
+        return _check_fields(self) == _check_fields(other)
+
+    def __repr__(self) -> str:
+        return f"CheckResult({self.to_dict()!r})"
+
+
+_check_fields = attrgetter(*CheckResult.FIELDS)
+
+
+def _restore_check(*values) -> CheckResult:
+    check = object.__new__(CheckResult)
+    for name, value in zip(CheckResult.FIELDS, values):
+        setattr(check, name, value)
+    return check
+
+
+class AnalysisResult:
+    """
+    單一網址的分析結果（或抓取錯誤：error / message）
+
+    checks 依執行順序保存；issues 與 passed 由 checks 推算，不另外保存。
+    weights 為各檢測的權重（通常就是 SEOAnalyzer.WEIGHTS），只用來輸出 issues。
+    encoding 為解碼採用的編碼與偵測方式：{"name", "source"}。
+    targets 只在深度模式的分析過程中使用（檢測 key → 要探測的網址），不會輸出。
+    快取中的結果會被多個請求共用，呼叫端不可修改（要改用 replace）。
+    """
+
+    __slots__ = (
+        "url",
+        "status_code",
+        "is_https",
+        "checks",
+        "score",
+        "grade",
+        "truncated",
+        "fetch",
+        "validators",
+        "encoding",
+        "targets",
+        "error",
+        "message",
+        "weights",
+    )
+
+    def __init__(
+        self,
+        url: str = UNSET,
+        status_code: int = UNSET,
+        is_https: bool = UNSET,
+        checks: Optional[dict[str, CheckResult]] = None,
+        score: int = 0,
+        grade: str = "F",
+        weights: Optional[dict[str, int]] = None,
+        *,
+        truncated: bool = UNSET,
+        fetch: str = UNSET,
+        validators: dict = UNSET,
+        encoding: dict = UNSET,
+        targets: dict = UNSET,
+        error: Optional[str] = None,
+        message: Optional[str] = None,
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.is_https = is_https
+        self.checks = checks if checks is not None else {}
+        self.score = score
+        self.grade = grade
+        self.weights = weights if weights is not None else {}
+        self.truncated = truncated
+        self.fetch = fetch
+        self.validators = validators
+        self.encoding = encoding
+        self.targets = targets
+        self.error = error
+        self.message = message
+
+    @classmethod
+    def from_error(cls, error: str, message: str) -> "AnalysisResult":
+        return cls(error=error, message=message)
+
+    def replace(self, **changes) -> "AnalysisResult":
+        """複製一份並替換部分欄位"""
+        result = object.__new__(AnalysisResult)
+        for name in self.__slots__:
+            setattr(result, name, changes.pop(name) if name in changes else getattr(self, name))
+        if changes:
+            raise TypeError(f"未知的欄位：{', '.join(changes)}")
+        return result
+
+    def __reduce__(self):
+        return _restore_analysis, _analysis_fields(self)
+
+    @property
+    def passed(self) -> list[str]:
+        """通過的檢測 key"""
+        return [key for key, check in self.checks.items() if check.passed]
+
+    @property
+    def issues(self) -> list[dict]:
+        """未通過的檢測：{"key", "message", "value", "weight"}"""
+        return [
+            {
+                "key": key,
+                "message": check.get("message", ""),
+                "value": check.get("value"),
+                "weight": self.weights.get(key, 0),
+            }
+            for key, check in self.checks.items()
+            if not check.passed
+        ]
+
+    def to_dict(self) -> dict:
+        """轉成原本的 dict 形狀"""
+        if self.error is not None:
+            return {"error": self.error, "message": self.message}
+
+        result = {}
+        for name in ("url", "status_code", "is_https"):
+            value = getattr(self, name)
+            if value is not UNSET:
+                result[name] = value
+        result["checks"] = {key: check.to_dict() for key, check in self.checks.items()}
+        result["score"] = self.score
+        result["grade"] = self.grade
+        result["issues"] = self.issues
+        result["passed"] = self.passed
+        for name in ("truncated", "fetch", "validators", "encoding"):
+            value = getattr(self, name)
+            if value is not UNSET:
+                result[name] = value
+        return result
+
+    def to_json(self) -> str:
+        """輸出 JSON（與 to_dict() 內容相同）"""
+        return _encode(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AnalysisResult":
+        """由 to_dict() / to_json() 的內容還原（權重取自 issues）"""
+        if "error" in data:
+            return cls.from_error(data["error"], data.get("message"))
+        return cls(
+            data.get("url", UNSET),
+            data.get("status_code", UNSET),
+            data.get("is_https", UNSET),
+            {key: CheckResult.from_dict(check) for key, check in data.get("checks", {}).items()},
+            data.get("score", 0),
+            data.get("grade", "F"),
+            {issue["key"]: issue["weight"] for issue in data.get("issues", ())},
+            truncated=data.get("truncated", UNSET),
+            fetch=data.get("fetch", UNSET),
+            validators=data.get("validators", UNSET),
+            encoding=data.get("encoding", UNSET),
+        )
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"AnalysisResult(error={self.error!r}, message={self.message!r})"
+        return f"AnalysisResult(url={self.url!r}, score={self.score!r}, grade={self.grade!r})"
+
+
+_analysis_fields = attrgetter(*AnalysisResult.__slots__)
+
+
+def _restore_analysis(*values) -> AnalysisResult:
+    result = object.__new__(AnalysisResult)
+    for name, value in zip(AnalysisResult.__slots__, values):
+        setattr(result, name, value)
+    return result
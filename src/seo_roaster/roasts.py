@@ -1,6 +1,7 @@
 """吐槽文案庫 - 毒舌 SEO 專家的評論"""
 
 import random
+import string
 from typing import Optional
 
 # 各項目的吐槽文案
@@ -71,6 +72,13 @@ ROASTS = {
             "canonical 寫了是空的？這比沒寫還糟糕，你在搞什麼！",
             "空的 canonical 會讓爬蟲更困惑喔...你是故意找麻煩的嗎！",
         ],
+        "unreachable": [
+            "canonical 指向一個打不開的網址？你叫搜尋引擎把權重送去哪裡！",
+            "正版網址是壞掉的...這就像名片上印了空號！笨蛋！",
+        ],
+        "invalid_url": [
+            "canonical 的網址連格式都是錯的，搜尋引擎根本看不懂！笨蛋！",
+        ],
     },
 
     # ===== Viewport =====
@@ -145,6 +153,13 @@ ROASTS = {
             "favicon 都不設...用戶開一堆分頁時，怎麼找到你的網站！笨蛋！",
             "沒有網站圖示，看起來就像是還沒做完的半成品...很廉價的感覺！",
         ],
+        "unreachable": [
+            "favicon 有寫，檔案卻抓不到...分頁上還是醜醜的預設圖示！哼！",
+            "網站圖示的連結是壞的，寫了跟沒寫一樣！才不是替你可惜！",
+        ],
+        "invalid_url": [
+            "favicon 的網址寫錯了，瀏覽器連請求都送不出去！哼！",
+        ],
     },
 
     # ===== Image Alt =====
@@ -188,6 +203,13 @@ ROASTS = {
         "empty": [
             "og:image 是空的...這比沒設還糟，會顯示錯誤圖示。",
         ],
+        "unreachable": [
+            "og:image 的圖片根本打不開。社群平台抓不到圖，分享出去一片空白。",
+            "預覽圖連結是壞的...設了等於沒設，你有點開來看過嗎？",
+        ],
+        "invalid_url": [
+            "og:image 的網址格式根本不對，社群平台抓不到任何東西。",
+        ],
     },
 
     # ===== Twitter Card =====
@@ -230,6 +252,13 @@ ROASTS = {
         "not_applicable": [
             "（單語系網站，不需要 hreflang～這項就算你過吧，哼！）",
         ],
+        "unreachable": [
+            "hreflang 指向的語言版本有打不開的！外國用戶點進去只看到錯誤頁！",
+            "多語系連結有壞掉的...搜尋引擎會直接忽略整組 hreflang 喔！笨蛋！",
+        ],
+        "invalid_url": [
+            "hreflang 的網址格式是錯的！連域名都寫不對，外國用戶要怎麼點進去！",
+        ],
     },
 
     # ===== Published Time =====
@@ -315,51 +344,6 @@ ERROR_ROASTS = {
 }
 
 
-def get_roast(check_key: str, message: Optional[str] = None, **kwargs) -> str:
-    """
-    取得吐槽文案
-
-    Args:
-        check_key: 檢測項目 key（如 'title', 'meta_description'）
-        message: 問題類型（如 'missing', 'too_short'）
-        **kwargs: 額外參數（如 length, count）
-
-    Returns:
-        str: 隨機選擇的吐槽文案
-    """
-    if check_key not in ROASTS:
-        return f"這個 {check_key} 有問題喔...才不是擔心你！"
-
-    roast_dict = ROASTS[check_key]
-
-    if message and message in roast_dict:
-        roasts = roast_dict[message]
-    elif None in roast_dict:
-        roasts = roast_dict[None]
-    else:
-        # 取得第一個可用的吐槽列表
-        roasts = list(roast_dict.values())[0] if roast_dict else [f"{check_key} 需要改進喔！"]
-
-    roast = random.choice(roasts)
-
-    # 替換變數
-    return roast.format(**kwargs)
-
-
-def get_grade_roast(grade: str) -> str:
-    """取得等級總評"""
-    if grade in GRADE_ROASTS:
-        return random.choice(GRADE_ROASTS[grade])
-    return "這個等級...讓人不知道說什麼！"
-
-
-def get_error_roast(error_type: str) -> str:
-    """取得錯誤吐槽"""
-    if error_type in ERROR_ROASTS:
-        return random.choice(ERROR_ROASTS[error_type])
-    return "出了點問題...不是我搞的喔！"
-
-
 # 檢測項目的中文名稱
 CHECK_NAMES = {
     "title": "網頁標題 (title)",
@@ -407,6 +391,8 @@ SUGGESTIONS = {
     "canonical": {
         "missing": '請新增 <link rel="canonical" href="頁面完整網址"> 標籤',
         "empty": "請填寫 canonical 標籤的 href 值",
+        "unreachable": "canonical 指向的網址無法存取，請改成可正常開啟（回應 200）的正式網址",
+        "invalid_url": "canonical 的網址格式錯誤（主機名稱無法編碼），請改成正確的完整網址",
     },
     "viewport": {
         "missing": '請新增 <meta name="viewport" content="width=device-width, initial-scale=1.0">',
@@ -429,6 +415,8 @@ SUGGESTIONS = {
     },
     "favicon": {
         "missing": '請新增 <link rel="icon" href="favicon.ico"> 或使用 SVG/PNG 格式的網站圖示',
+        "unreachable": "favicon 的檔案無法存取，請確認路徑正確且檔案已上傳",
+        "invalid_url": "favicon 的網址格式錯誤（主機名稱無法編碼），請確認 href 的寫法",
     },
     "img_alt": {
         "low_ratio": "請為所有 <img> 標籤加上 alt 屬性，描述圖片內容",
@@ -445,6 +433,8 @@ SUGGESTIONS = {
     "og_image": {
         "missing": '請新增 <meta property="og:image" content="圖片完整網址">，建議尺寸 1200x630',
         "empty": "請填寫 og:image 的圖片網址",
+        "unreachable": "og:image 的圖片無法存取，請使用可公開存取的圖片完整網址",
+        "invalid_url": "og:image 的網址格式錯誤（主機名稱無法編碼），請使用正確的圖片完整網址",
     },
     "twitter_card": {
         "missing": '請新增 <meta name="twitter:card" content="summary_large_image">',
@@ -463,6 +453,8 @@ SUGGESTIONS = {
     "hreflang": {
         "not_applicable": "（單語系網站可略過此項）",
         "missing": '如有多語言版本，請新增 <link rel="alternate" hreflang="語言代碼" href="對應網址">',
+        "unreachable": '部分 hreflang 指向的網址無法存取，請修正或移除對應的 <link rel="alternate">',
+        "invalid_url": 'hreflang 的網址格式錯誤（主機名稱無法編碼），請修正對應的 <link rel="alternate">',
     },
     "published_time": {
         "missing": '文章類型建議新增 <meta property="article:published_time" content="ISO8601日期">',
@@ -473,30 +465,190 @@ SUGGESTIONS = {
 }
 
 
-def get_suggestion(check_key: str, message: Optional[str] = None) -> str:
+# ===== 預先編譯 =====
+# 匯入時把上面的文案表編譯成以 (檢測項目, 問題類型) 為 key 的扁平查詢表，
+# 模板事先拆好並記錄需要的欄位，產生報告時只需查表與組字串。
+
+_formatter = string.Formatter()
+
+# 吐槽用的亂數產生器（可用 seed() 固定，讓輸出可重現）
+_rng = random.Random()
+
+
+def seed(value=None) -> None:
+    """設定吐槽亂數種子（None 表示重新隨機）"""
+    _rng.seed(value)
+
+
+class _Template:
+    """預先拆解的文案模板"""
+
+    __slots__ = ("text", "parts", "fields")
+
+    def __init__(self, text: str):
+        self.text = text
+        # (文字, 欄位名稱, 轉換, 格式)，欄位名稱為 None 表示只有文字
+        self.parts = tuple(
+            (literal, field, conversion, spec)
+            for literal, field, spec, conversion in _formatter.parse(text)
+        )
+        self.fields = frozenset(field for _, field, _, _ in self.parts if field is not None)
+
+    def accepts(self, params) -> bool:
+        """params 是否有所有需要的欄位（值為 None 視為沒有）"""
+        for field in self.fields:
+            if params.get(field) is None:
+                return False
+        return True
+
+    def render(self, params) -> str:
+        """
+        以 params 填入欄位
+
+        缺少的欄位以「?」代替，不會丟出 KeyError。
+        """
+        if not self.fields:
+            return self.text
+        pieces = []
+        for literal, field, conversion, spec in self.parts:
+            pieces.append(literal)
+            if field is None:
+                continue
+            value = params.get(field)
+            if value is None:
+                pieces.append("?")
+                continue
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            pieces.append(format(value, spec or ""))
+        return "".join(pieces)
+
+
+class _Choices:
+    """同一情境的候選模板（另外記錄不需要任何欄位的模板，作為欄位不足時的備案）"""
+
+    __slots__ = ("templates", "static")
+
+    def __init__(self, texts):
+        self.templates = tuple(_Template(text) for text in texts)
+        self.static = tuple(t for t in self.templates if not t.fields)
+
+    def render(self, params, rng: random.Random) -> str:
+        template = rng.choice(self.templates)
+        if template.fields and not template.accepts(params) and self.static:
+            template = rng.choice(self.static)
+        return template.render(params)
+
+
+def _compile_roasts(roasts: dict) -> tuple[dict, dict]:
     """
-    取得修改建議
+    Returns:
+        tuple: ({(檢測項目, 問題類型): _Choices}, {檢測項目: 找不到問題類型時用的 _Choices})
+    """
+    table = {}
+    fallback = {}
+    for check_key, roast_dict in roasts.items():
+        for message, texts in roast_dict.items():
+            if texts:
+                table[(check_key, message)] = _Choices(texts)
+        if None in roast_dict and roast_dict[None]:
+            fallback[check_key] = table[(check_key, None)]
+        else:
+            # 取第一個可用的吐槽列表
+            first = next((texts for texts in roast_dict.values() if texts), None)
+            fallback[check_key] = _Choices(first or [f"{check_key} 需要改進喔！"])
+    return table, fallback
+
+
+def _compile_suggestions(suggestions: dict) -> tuple[dict, dict]:
+    """
+    Returns:
+        tuple: ({(檢測項目, 問題類型): 建議}, {檢測項目: 找不到問題類型時的建議})
+    """
+    table = {}
+    fallback = {}
+    for check_key, suggestion_dict in suggestions.items():
+        for message, suggestion in suggestion_dict.items():
+            table[(check_key, message)] = suggestion
+        # 優先使用 default，否則取第一個建議
+        if "default" in suggestion_dict:
+            fallback[check_key] = suggestion_dict["default"]
+        else:
+            fallback[check_key] = next(iter(suggestion_dict.values()), "")
+    return table, fallback
+
+
+_ROAST_TABLE, _ROAST_FALLBACK = _compile_roasts(ROASTS)
+_SUGGESTION_TABLE, _SUGGESTION_FALLBACK = _compile_suggestions(SUGGESTIONS)
+_GRADE_TABLE = {grade: tuple(texts) for grade, texts in GRADE_ROASTS.items()}
+_ERROR_TABLE = {error: tuple(texts) for error, texts in ERROR_ROASTS.items()}
+
+
+def render_roast(check_key: str, message: Optional[str], params, rng: Optional[random.Random] = None) -> str:
+    """
+    取得吐槽文案（直接從檢測結果取欄位，不需另外組參數）
 
     Args:
         check_key: 檢測項目 key（如 'title', 'meta_description'）
         message: 問題類型（如 'missing', 'too_short'）
+        params: 提供模板欄位的 mapping（如檢測結果 dict，含 length、count、value）
+        rng: 亂數產生器，預設使用模組共用的（見 seed）
 
     Returns:
-        str: 對應的修改建議
+        str: 隨機選擇的吐槽文案
+    """
+    choices = _ROAST_TABLE.get((check_key, message)) if message else None
+    if choices is None:
+        choices = _ROAST_FALLBACK.get(check_key)
+        if choices is None:
+            return f"這個 {check_key} 有問題喔...才不是擔心你！"
+    return choices.render(params, rng or _rng)
+
+
+def get_roast(check_key: str, message: Optional[str] = None, **kwargs) -> str:
+    """
+    取得吐槽文案
+
+    Args:
+        check_key: 檢測項目 key（如 'title', 'meta_description'）
+        message: 問題類型（如 'missing', 'too_short'）
+        **kwargs: 額外參數（如 length, count）
+
+    Returns:
+        str: 隨機選擇的吐槽文案
     """
-    if check_key not in SUGGESTIONS:
-        return ""
+    return render_roast(check_key, message, kwargs)
+
 
-    suggestion_dict = SUGGESTIONS[check_key]
+def get_grade_roast(grade: str, rng: Optional[random.Random] = None) -> str:
+    """取得等級總評"""
+    texts = _GRADE_TABLE.get(grade)
+    if texts:
+        return (rng or _rng).choice(texts)
+    return "這個等級...讓人不知道說什麼！"
 
-    if message and message in suggestion_dict:
-        return suggestion_dict[message]
 
-    # 嘗試取得 default，否則回傳第一個建議
-    if "default" in suggestion_dict:
-        return suggestion_dict["default"]
+def get_error_roast(error_type: str, rng: Optional[random.Random] = None) -> str:
+    """取得錯誤吐槽"""
+    texts = _ERROR_TABLE.get(error_type)
+    if texts:
+        return (rng or _rng).choice(texts)
+    return "出了點問題...不是我搞的喔！"
 
-    if suggestion_dict:
-        return list(suggestion_dict.values())[0]
 
-    return ""
+def get_suggestion(check_key: str, message: Optional[str] = None) -> str:
+    """
+    取得修改建議
+
+    Args:
+        check_key: 檢測項目 key（如 'title', 'meta_description'）
+        message: 問題類型（如 'missing', 'too_short'）
+
+    Returns:
+        str: 對應的修改建議
+    """
+    if message:
+        suggestion = _SUGGESTION_TABLE.get((check_key, message))
+        if suggestion is not None:
+            return suggestion
+    return _SUGGESTION_FALLBACK.get(check_key, "")
@@ -0,0 +1,67 @@
+"""階段計時 - 記錄單次分析各階段的耗時（DNS、每次重定向、解析、各項檢測）"""
+
+import time
+from typing import Optional
+
+now = time.perf_counter
+
+# 屬於抓取的階段名稱前綴
+FETCH_PHASES = ("dns", "hop", "body")
+
+
+class Timings:
+    """
+    單次分析的計時紀錄
+
+    呼叫端以 now() 記下開始時間，結束時呼叫 add(name, started)。
+    同名的階段（例如每次重定向都做的 DNS）會累加。沒有啟用計時時，
+    SEOAnalyzer.timings 為 None，熱路徑只多一次 None 判斷。
+    """
+
+    __slots__ = ("started", "spans", "bytes_read", "wire_bytes")
+
+    def __init__(self):
+        self.started = now()
+        self.spans: dict[str, float] = {}
+        # 本次分析下載的內容位元組數（解壓後）與實際傳輸的位元組數（壓縮後）
+        self.bytes_read = 0
+        self.wire_bytes = 0
+
+    def add(self, name: str, started: float) -> None:
+        """記錄從 started 到現在的耗時"""
+        self.spans[name] = self.spans.get(name, 0.0) + (now() - started)
+
+    def merge(self, spans: dict[str, float]) -> None:
+        """併入其他地方（例如解析子 process）記錄的各階段秒數"""
+        for name, seconds in spans.items():
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        """從建立到現在的秒數"""
+        return now() - self.started
+
+    def fetch_seconds(self) -> Optional[float]:
+        """抓取耗時（DNS、各次請求與讀取內容），沒有抓取（例如快取命中）時回傳 None"""
+        spans = [seconds for name, seconds in self.spans.items() if name.startswith(FETCH_PHASES)]
+        return sum(spans) if spans else None
+
+    def as_dict(self, total: bool = True) -> dict[str, float]:
+        """各階段耗時（毫秒），total 為從建立到現在的總時間"""
+        result = {name: round(seconds * 1000, 3) for name, seconds in self.spans.items()}
+        if total:
+            result["total"] = round((now() - self.started) * 1000, 3)
+        return result
+
+    def server_timing(self, spans: Optional[dict[str, float]] = None) -> str:
+        """轉成 Server-Timing 標頭值（spans 為 as_dict() 的結果，省略時重新計算）"""
+        spans = self.as_dict() if spans is None else spans
+        return ", ".join(f"{name};dur={ms}" for name, ms in spans.items())
+
+
+def hop_name(redirect_count: int) -> str:
+    """第幾次請求（含重定向）的階段名稱：連線加上等待回應標頭"""
+    return f"hop{redirect_count}"
+
+
+def check_name(key: str) -> str:
+    return f"check.{key}"
@@ -0,0 +1,61 @@
+"""analyzer - 部分檢測與完整分析的一致性"""
+
+import pytest
+
+from src.seo_roaster.analyzer import SEOAnalyzer
+from src.seo_roaster.net import FetchResult
+
+URL = "https://example.com/"
+HEAD_CHECKS = ["og_title", "canonical", "meta_description"]
+
+# <head> 裡有 <noscript> 追蹤像素，後面接著超過一個串流分段（16 KB）的 inline script
+PIXEL_PAGE = (
+    '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Pixel page</title>'
+    '<noscript><img height="1" width="1" style="display:none" '
+    'src="https://www.facebook.com/tr?id=1&amp;ev=PageView&amp;noscript=1"></noscript>'
+    "<script>var data = '" + "x" * 20000 + "';</script>"
+    '<meta name="description" content="' + "A page with a tracking pixel in its head element. " * 3 + '">'
+    '<link rel="canonical" href="https://example.com/">'
+    '<meta property="og:title" content="Pixel page">'
+    "</head><body><h1>Hello</h1></body></html>"
+)
+
+
+def _analyzer(parser: str, html: str) -> SEOAnalyzer:
+    analyzer = SEOAnalyzer(parser=parser)
+
+    def fetch(url, previous=None, decode=None):
+        fetched = FetchResult(url, 200, {"Content-Type": "text/html; charset=utf-8"})
+        fetched.html = html
+        return fetched
+
+    analyzer.fetch = fetch
+    return analyzer
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_noscript_pixel_in_head_keeps_head_checks(parser):
+    result = _analyzer(parser, PIXEL_PAGE).analyze(URL, checks=HEAD_CHECKS)
+    assert {key: check.passed for key, check in result.checks.items()} == dict.fromkeys(HEAD_CHECKS, True)
+
+
+# 沒有 </head>：<div> 推斷 <head> 結束，但後面還有 head 的標籤
+IMPLICIT_HEAD_PAGE = (
+    '<html lang="en"><title>Implicit head</title><div id="gtm"></div>'
+    "<script>var data = '" + "y" * 20000 + "';</script>"
+    '<meta name="description" content="' + "Metadata after an injected div in the head. " * 3 + '">'
+    '<link rel="canonical" href="https://example.com/"><meta property="og:title" content="Implicit">'
+    "<h1>Hello</h1></html>"
+)
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+@pytest.mark.parametrize("html", [PIXEL_PAGE, IMPLICIT_HEAD_PAGE], ids=["pixel", "implicit"])
+def test_head_only_subset_matches_full_analysis(parser, html):
+    analyzer = _analyzer(parser, html)
+    full = analyzer.analyze(URL)
+    subset = analyzer.analyze(URL, checks=HEAD_CHECKS)
+    derived = analyzer.select_results(full, HEAD_CHECKS)
+    assert subset.checks == derived.checks
+    assert (subset.score, subset.grade) == (derived.score, derived.grade)
+    assert all(full.checks[key] == subset.checks[key] for key in HEAD_CHECKS)
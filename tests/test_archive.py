@@ -0,0 +1,71 @@
+"""archive - HAR 的 entries 逐筆解碼"""
+
+import io
+import json
+
+import pytest
+
+from src.seo_roaster.archive import READ_SIZE, ArchiveError, _iter_json_array, iter_har
+
+
+class _CountingReader(io.StringIO):
+    """記錄讀取了多少字元"""
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+def _entry(url: str, text: str = "<html></html>") -> dict:
+    return {
+        "request": {"url": url},
+        "response": {"status": 200, "headers": [], "content": {"mimeType": "text/html", "text": text}},
+    }
+
+
+def _har(*entries: str) -> str:
+    return '{"log": {"version": "1.2", "entries": [' + ", ".join(entries) + "]}}"
+
+
+def test_entries_split_across_reads():
+    entries = [_entry(f"https://example.com/{i}", "é\\\"" * 40000) for i in range(3)]
+    f = _CountingReader(_har(*(json.dumps(entry) for entry in entries)))
+    assert list(_iter_json_array(f, "entries")) == entries
+
+
+def test_corrupt_entry_fails_without_reading_tail():
+    tail = json.dumps(_entry("https://example.com/tail", "x" * (8 * 1024 * 1024)))
+    f = _CountingReader(_har(json.dumps(_entry("https://example.com/")), '{"request": {"url": 1 2}}', tail))
+    items = _iter_json_array(f, "entries")
+    assert next(items)["request"]["url"] == "https://example.com/"
+    with pytest.raises(ArchiveError, match="格式錯誤"):
+        next(items)
+    # 格式錯誤立即回報，不會一路讀到檔案結尾
+    assert f.consumed <= 2 * READ_SIZE
+
+
+def test_oversized_entry_is_skipped():
+    big = _entry("https://example.com/big", 'a"\\{[' * 100000)
+    f = _CountingReader(_har(json.dumps(big), json.dumps(_entry("https://example.com/next"))))
+    urls = [item["request"]["url"] for item in _iter_json_array(f, "entries", max_size=100000)]
+    assert urls == ["https://example.com/next"]
+
+
+@pytest.mark.parametrize("max_size", [1000, 1024 * 1024], ids=["skipping", "decoding"])
+def test_truncated_entries_raise(max_size):
+    text = _har(json.dumps(_entry("https://example.com/", "x" * 100000)))
+    for cut in (len(text) // 2, len(text) - 3):
+        with pytest.raises(ArchiveError, match="不完整"):
+            list(_iter_json_array(io.StringIO(text[:cut]), "entries", max_size=max_size))
+
+
+def test_iter_har_reads_file(tmp_path):
+    path = tmp_path / "site.har"
+    path.write_text(_har(json.dumps(_entry("https://example.com/", "<title>t</title>"))), encoding="utf-8")
+    records = list(iter_har(str(path), max_bytes=1024))
+    assert [(record.url, record.body) for record in records] == [("https://example.com/", b"<title>t</title>")]
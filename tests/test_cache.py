@@ -0,0 +1,63 @@
+"""cache - 結果快取與同一網址的單次分析"""
+
+import asyncio
+
+import pytest
+
+from src.seo_roaster.cache import ResultCache, normalize_url
+from src.seo_roaster.results import AnalysisResult
+
+
+def test_normalize_url_keeps_unparsable_urls():
+    assert normalize_url("HTTPS://Example.com:443") == "https://example.com/"
+    assert normalize_url("https://[bad") == "https://[bad"
+    assert normalize_url("example.com:abc") == "https://example.com:abc"
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    async def scenario():
+        cache = ResultCache()
+        started = asyncio.Event()
+        calls = 0
+
+        async def analyze(previous):
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.05)
+            return AnalysisResult("https://example.com/", 200, True, {}, 80, "A")
+
+        leader = asyncio.create_task(cache.get_or_analyze_async("https://example.com", analyze))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_analyze_async("https://example.com", analyze))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        result = await follower
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return cache, result, calls
+
+    cache, result, calls = asyncio.run(scenario())
+    assert result.score == 80
+    assert calls == 1
+    # 被取消的請求不影響分析完成後寫入快取
+    assert cache.get("https://example.com/").score == 80
+
+
+def test_analysis_error_reaches_every_waiter():
+    async def scenario():
+        cache = ResultCache()
+
+        async def analyze(previous):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        return await asyncio.gather(
+            cache.get_or_analyze_async("https://example.com", analyze),
+            cache.get_or_analyze_async("https://example.com", analyze),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
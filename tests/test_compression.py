@@ -0,0 +1,67 @@
+"""compression - 有上限的逐段解壓"""
+
+import gzip
+import zlib
+
+import pytest
+
+from src.seo_roaster import compression
+from src.seo_roaster.compression import LIMIT_RATIO, LIMIT_SIZE, OUTPUT_CHUNK, BodyDecoder
+
+# 很小的壓縮內容，解開後是 32 MB（壓縮炸彈）
+BOMB = b"\0" * (32 * 1024 * 1024)
+
+
+def _compress(coding: str, data: bytes) -> bytes:
+    if coding == "gzip":
+        return gzip.compress(data)
+    if coding == "deflate":
+        return zlib.compress(data)
+    if coding == "br":
+        return compression.brotli.compress(data, quality=5)
+    return compression.zstd.compress(data)
+
+
+def _feed_all(coding: str, data: bytes, size: int = 4096) -> list[bytes]:
+    decoder = compression._create(coding)
+    return [out for start in range(0, len(data), size) for out in decoder.feed(data[start:start + size])]
+
+
+@pytest.mark.parametrize("coding", compression.SUPPORTED_ENCODINGS)
+def test_output_chunks_are_bounded(coding):
+    payload = _compress(coding, BOMB)
+    assert len(payload) < 64 * 1024
+    # 一次餵入全部的壓縮內容，單段輸出仍不超過上限
+    chunks = _feed_all(coding, payload, size=len(payload))
+    assert max(map(len, chunks)) <= OUTPUT_CHUNK
+    assert sum(map(len, chunks)) == len(BOMB)
+
+
+@pytest.mark.parametrize("coding", compression.SUPPORTED_ENCODINGS)
+def test_round_trip_with_small_reads(coding):
+    data = b"<p>hello world</p>" * 20000
+    assert b"".join(_feed_all(coding, _compress(coding, data), size=7)) == data
+
+
+@pytest.mark.parametrize("coding", compression.SUPPORTED_ENCODINGS)
+def test_bomb_stops_at_ratio(coding):
+    payload = _compress(coding, BOMB)
+    decoder = BodyDecoder(coding, max_bytes=5 * 1024 * 1024, max_ratio=100)
+    decoded = decoder.decode(payload)
+    assert decoder.limited == LIMIT_RATIO
+    # 超過比例後最多再多解出一段
+    assert len(decoded) <= max(compression.RATIO_GRACE_BYTES, len(payload) * 100) + OUTPUT_CHUNK
+    assert len(decoded) < len(BOMB)
+    assert decoder.decode(payload) == b""
+
+
+def test_size_limit_truncates():
+    decoder = BodyDecoder("gzip", max_bytes=1000, max_ratio=10**9)
+    assert len(decoder.decode(gzip.compress(b"x" * 5000))) == 1000
+    assert decoder.limited == LIMIT_SIZE
+
+
+def test_only_bounded_codings_are_advertised():
+    assert compression.ACCEPT_ENCODING.split(", ")[:2] == ["gzip", "deflate"]
+    assert ("br" in compression.SUPPORTED_ENCODINGS) == compression.BROTLI_BOUNDED
+    assert ("zstd" in compression.SUPPORTED_ENCODINGS) == (compression.zstd is not None)
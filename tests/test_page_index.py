@@ -0,0 +1,30 @@
+"""page_index - 串流索引器的 <head> 結束判定"""
+
+from src.seo_roaster.page_index import StreamingIndexer
+
+PIXEL = '<noscript><img height="1" width="1" src="https://www.facebook.com/tr?id=1&ev=PageView"></noscript>'
+
+
+def _feed(html: str) -> StreamingIndexer:
+    indexer = StreamingIndexer()
+    indexer.feed(html)
+    return indexer
+
+
+def test_noscript_pixel_does_not_end_head():
+    indexer = _feed(f"<html><head><title>t</title>{PIXEL}<script>var x = 1;</script>")
+    assert not indexer.head_complete
+    indexer.feed('<meta name="description" content="d"></head>')
+    assert indexer.head_complete
+    assert indexer.close().meta_name("description") == "d"
+
+
+def test_template_content_does_not_end_head():
+    assert not _feed("<head><template><div><p>x</p></div></template><link rel=canonical href=/a>").head_complete
+
+
+def test_body_tags_end_head_without_closing_tag():
+    assert _feed("<title>t</title><div>").head_complete
+    assert _feed("<head><noscript><body>").head_complete
+    # </noscript> 之後的 body 標籤照常結束 <head>
+    assert _feed(f"<head>{PIXEL}<p>").head_complete